@@ -0,0 +1,83 @@
+import logging
+import uuid
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BOT_ID = "default"
+
+
+class BotManager:
+    """Hosts many bot sessions in one process, keyed by id.
+
+    Sessions are built by ``factory(bot_id)``, which is expected to hand
+    every bot the same capture source and database client; each session
+    keeps its own input worker, broadcaster and CPU account.
+    """
+
+    def __init__(self, factory: Callable[[str], Any], max_sessions: int = 64):
+        self._factory = factory
+        self.max_sessions = max_sessions
+        self.sessions: Dict[str, Any] = {}
+        self._process = psutil.Process()
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(list(self.sessions.values()))
+
+    def __contains__(self, bot_id: str) -> bool:
+        return bot_id in self.sessions
+
+    def create(self, bot_id: Optional[str] = None):
+        """Add a new session; raises ValueError for duplicates or when full"""
+        bot_id = bot_id or str(uuid.uuid4())
+        if bot_id in self.sessions:
+            raise ValueError(f"Bot session {bot_id} already exists")
+        if len(self.sessions) >= self.max_sessions:
+            raise ValueError(f"Session limit reached ({self.max_sessions})")
+        bot = self.sessions[bot_id] = self._factory(bot_id)
+        logger.info(f"Created bot session {bot_id}")
+        return bot
+
+    def get(self, bot_id: str):
+        return self.sessions.get(bot_id)
+
+    def remove(self, bot_id: str):
+        """Drop a stopped session and free its resources"""
+        bot = self.sessions.get(bot_id)
+        if bot is None:
+            return None
+        if bot.is_running:
+            raise ValueError(f"Bot session {bot_id} is still running")
+        del self.sessions[bot_id]
+        bot.close()
+        logger.info(f"Removed bot session {bot_id}")
+        return bot
+
+    def close(self):
+        """Stop every session (server shutdown)"""
+        for bot in self:
+            bot.is_running = False
+            bot.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        sessions = {
+            bot_id: dict(
+                bot.cpu_stats(),
+                is_running=bot.is_running,
+                is_paused=bot.is_paused,
+                session_id=bot.session_id
+            )
+            for bot_id, bot in self.sessions.items()
+        }
+        return {
+            "count": len(self.sessions),
+            "running": sum(1 for bot in self.sessions.values() if bot.is_running),
+            "max_sessions": self.max_sessions,
+            "process_cpu_percent": self._process.cpu_percent(interval=None),
+            "sessions": sessions,
+        }
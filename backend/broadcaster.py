@@ -0,0 +1,188 @@
+import asyncio
+import itertools
+import json
+import logging
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PendingMessage:
+    """Message waiting in a client's mailbox"""
+
+    def __init__(self, kind: str, sequence: int, text: str, base: int = 0,
+                 changes: Optional[Dict[str, Any]] = None):
+        self.kind = kind
+        self.sequence = sequence
+        self.text = text
+        self.base = base
+        self.changes = changes
+
+
+class ClientChannel:
+    """One websocket with a latest-value-wins mailbox and its own sender task"""
+
+    def __init__(self, client_id: int, websocket):
+        self.client_id = client_id
+        self.websocket = websocket
+        self.pending: Optional[PendingMessage] = None
+        self.ready = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.last_sent_sequence = 0
+        self.sent = 0
+        self.dropped = 0
+        self.timeouts = 0
+        self.bytes_sent = 0
+        self.resyncs = 0
+        self.last_send_ms = 0.0
+
+
+class StatsBroadcaster:
+    """Fans updates out to websockets without letting slow clients stall the bot.
+
+    Each update is serialized once. Every client has a single-slot mailbox
+    drained by its own task: an update arriving before the previous one
+    was sent replaces it (counted as dropped), and each send is bounded
+    by ``send_timeout``. Clients that keep timing out are disconnected.
+
+    Stats use a delta protocol: a client gets a full ``stats_update``
+    snapshot on connect or resync, then ``stats_delta`` messages with only
+    the changed fields, a ``seq`` and the ``base`` seq they apply on top of.
+    Deltas coalesced in a slow client's mailbox are merged, so the chain
+    stays intact.
+    """
+
+    def __init__(self, send_timeout: float = 1.0, max_timeouts: int = 5):
+        self.send_timeout = send_timeout
+        self.max_timeouts = max_timeouts
+        self.clients: Dict[Any, ClientChannel] = {}
+        self._ids = itertools.count(1)
+        self.sequence = 0
+        self.published = 0
+        self.state: Dict[str, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self.clients)
+
+    def add(self, websocket, snapshot: Optional[Dict[str, Any]] = None) -> ClientChannel:
+        """Register a websocket and queue a full snapshot for it"""
+        if snapshot is not None:
+            self.publish_stats(snapshot)
+        client = ClientChannel(next(self._ids), websocket)
+        client.last_sent_sequence = self.sequence
+        client.task = asyncio.create_task(self._sender(client))
+        self.clients[websocket] = client
+        self._queue_snapshot(client)
+        return client
+
+    def remove(self, websocket):
+        client = self.clients.pop(websocket, None)
+        if client is not None and client.task is not None and client.task is not asyncio.current_task():
+            client.task.cancel()
+
+    def resync(self, websocket):
+        """Resend a full snapshot to a client that lost track of the deltas"""
+        client = self.clients.get(websocket)
+        if client is not None:
+            client.resyncs += 1
+            self._queue_snapshot(client)
+
+    def _snapshot_text(self) -> str:
+        return json.dumps({"type": "stats_update", "seq": self.sequence, "data": self.state}, default=str)
+
+    def _queue_snapshot(self, client: ClientChannel):
+        self._put(client, PendingMessage("snapshot", self.sequence, self._snapshot_text()))
+
+    def publish_stats(self, data: Dict[str, Any]) -> int:
+        """Send only the fields that changed since the last publish"""
+        changes = {key: value for key, value in data.items() if self.state.get(key, object()) != value}
+        if not changes:
+            return self.sequence
+        self.state = dict(data)
+        base = self.sequence
+        self.sequence += 1
+        self.published += 1
+        if not self.clients:
+            return self.sequence
+
+        # Serialized once for every client whose mailbox is empty
+        text = json.dumps(
+            {"type": "stats_delta", "seq": self.sequence, "base": base, "changes": changes}, default=str
+        )
+        for client in self.clients.values():
+            pending = client.pending
+            if pending is None:
+                self._put(client, PendingMessage("delta", self.sequence, text, base, changes))
+            elif pending.kind == "delta":
+                # Merge into the unsent delta so it still applies on its base
+                merged = dict(pending.changes)
+                merged.update(changes)
+                merged_text = json.dumps(
+                    {"type": "stats_delta", "seq": self.sequence, "base": pending.base, "changes": merged},
+                    default=str
+                )
+                self._put(client, PendingMessage("delta", self.sequence, merged_text, pending.base, merged))
+            else:
+                self._queue_snapshot(client)
+        return self.sequence
+
+    def _put(self, client: ClientChannel, message: PendingMessage):
+        if client.pending is not None:
+            client.dropped += 1
+        client.pending = message
+        client.ready.set()
+
+    async def _sender(self, client: ClientChannel):
+        try:
+            while True:
+                await client.ready.wait()
+                client.ready.clear()
+                if client.pending is None:
+                    continue
+                message = client.pending
+                client.pending = None
+
+                start = time.perf_counter()
+                try:
+                    await asyncio.wait_for(client.websocket.send_text(message.text), self.send_timeout)
+                except asyncio.TimeoutError:
+                    client.timeouts += 1
+                    if client.timeouts >= self.max_timeouts:
+                        logger.warning(f"Disconnecting websocket client {client.client_id}: too slow")
+                        break
+                    # The lost message may have been a delta; start over from a snapshot
+                    self._queue_snapshot(client)
+                    continue
+                except Exception:
+                    break
+                client.last_send_ms = (time.perf_counter() - start) * 1000
+                client.last_sent_sequence = message.sequence
+                client.bytes_sent += len(message.text)
+                client.sent += 1
+        except asyncio.CancelledError:
+            return
+        self.remove(client.websocket)
+        try:
+            await client.websocket.close()
+        except Exception:
+            pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "clients": len(self.clients),
+            "published": self.published,
+            "sequence": self.sequence,
+            "per_client": {
+                client.client_id: {
+                    "lag": self.sequence - client.last_sent_sequence,
+                    "sent": client.sent,
+                    "dropped": client.dropped,
+                    "timeouts": client.timeouts,
+                    "resyncs": client.resyncs,
+                    "bytes_sent": client.bytes_sent,
+                    "last_send_ms": round(client.last_send_ms, 3),
+                }
+                for client in self.clients.values()
+            },
+        }
@@ -0,0 +1,281 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from frame_buffer import FrameRing
+
+logger = logging.getLogger(__name__)
+
+Region = Tuple[int, int, int, int]  # left, top, width, height
+
+# Default panel layout for a 1920x1080 client
+DEFAULT_REGIONS: Dict[str, Region] = {
+    "hp_mp": (1750, 140, 160, 30),
+    "battle_list": (1750, 400, 160, 300),
+    "loot": (800, 380, 320, 320),
+    "minimap": (1753, 28, 108, 108),
+}
+
+SCREEN_SIZE = (1920, 1080)
+
+
+class CapturedFrame:
+    """Set of region crops captured in one tick"""
+
+    def __init__(self, regions: Dict[str, np.ndarray], timestamp: float,
+                 release: Optional[Callable] = None, sequence: int = 0, slot=None):
+        self.regions = regions
+        self.timestamp = timestamp
+        self.sequence = sequence
+        self.slot = slot
+        self._release = release
+
+    def release(self):
+        """Hand the underlying ring buffer back to the capture engine"""
+        if self._release is not None:
+            self._release()
+            self._release = None
+
+    def copy(self, names: Optional[Iterable[str]] = None) -> "CapturedFrame":
+        """Detached copy of some regions, safe to keep after release"""
+        names = self.regions if names is None else names
+        return CapturedFrame(
+            {name: self.regions[name].copy() for name in names if name in self.regions},
+            self.timestamp, sequence=self.sequence
+        )
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.regions[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.regions
+
+    def get(self, name: str, default=None):
+        return self.regions.get(name, default)
+
+
+class SharedScreenSource:
+    """Region screenshots shared by the capture engines of many bot sessions.
+
+    Called like ``pyautogui.screenshot(region=...)``. Each distinct region
+    is grabbed at most once per ``max_age`` seconds and the grab is served
+    to every session asking for it, so N sessions capturing the same
+    panels in a tick cost one grab per panel instead of N, and nothing
+    outside the registered regions is captured.
+    """
+
+    def __init__(self, screenshot: Callable, max_age: float = 0.02):
+        self._screenshot = screenshot
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._grabs: Dict[Optional[Region], Tuple[float, np.ndarray]] = {}
+
+        self.grabs = 0
+        self.reuses = 0
+        self.pixels = 0
+
+    def __call__(self, region: Optional[Region] = None) -> np.ndarray:
+        key = None if region is None else tuple(region)
+        with self._lock:
+            now = time.monotonic()
+            cached = self._grabs.get(key)
+            if cached is not None and now - cached[0] <= self.max_age:
+                self.reuses += 1
+                return cached[1]
+            # Grabs too old to be reused are dropped so the cache stays small
+            for stale in [k for k, (at, _) in self._grabs.items() if now - at > self.max_age]:
+                del self._grabs[stale]
+            image = np.asarray(self._screenshot() if key is None else self._screenshot(region=key))
+            self._grabs[key] = (now, image)
+            self.grabs += 1
+            self.pixels += image.shape[0] * image.shape[1]
+            return image
+
+    def get_stats(self) -> Dict[str, object]:
+        requests = self.grabs + self.reuses
+        return {
+            "grabs": self.grabs,
+            "reuses": self.reuses,
+            "reuse_ratio": round(self.reuses / requests, 4) if requests else 0.0,
+            "grabbed_pixels": self.pixels,
+        }
+
+
+class RegionCaptureEngine:
+    """Grabs and converts only the screen regions detectors registered.
+
+    Each detector registers the panels it reads (HP/MP bars, battle list,
+    loot area); a capture grabs those rectangles instead of the full screen.
+    With ``ring_slots`` set, crops are written in place into a preallocated
+    FrameRing and frames hold views into it; call ``frame.release()`` when
+    the detectors are done with a frame.
+    """
+
+    def __init__(self, screenshot: Callable, convert: Optional[Callable] = None,
+                 convert_into: Optional[Callable] = None,
+                 screen_size: Tuple[int, int] = SCREEN_SIZE,
+                 ring_slots: int = 0, shared: bool = False, channels: int = 3):
+        self._screenshot = screenshot
+        self._convert = convert
+        self._convert_into = convert_into
+        self.screen_size = screen_size
+        self.ring_slots = ring_slots
+        self.shared = shared
+        self.channels = channels
+        self.ring: Optional[FrameRing] = None
+        self._retired: List[FrameRing] = []
+        self._regions: Dict[str, Region] = {}
+        self._owners: Dict[str, set] = {}
+        self._lock = threading.Lock()
+        # Captures come from the pipeline thread and the event loop
+        self._capture_lock = threading.Lock()
+        self._ring_dirty = True
+
+        self.captures = 0
+        self.total_ms = 0.0
+        self.last_ms = 0.0
+        self.last_pixels = 0
+
+    def register(self, name: str, region: Region, owner: str = ""):
+        """Register a region needed by a detector"""
+        left, top, width, height = region
+        if width <= 0 or height <= 0:
+            raise ValueError(f"Invalid capture region {name}: {region}")
+        with self._lock:
+            self._regions[name] = (int(left), int(top), int(width), int(height))
+            self._owners.setdefault(name, set()).add(owner)
+            self._ring_dirty = True
+
+    def unregister(self, name: str, owner: str = ""):
+        """Drop a detector's claim on a region, removing it when unused"""
+        with self._lock:
+            owners = self._owners.get(name)
+            if owners is None:
+                return
+            owners.discard(owner)
+            if not owners:
+                self._owners.pop(name, None)
+                self._regions.pop(name, None)
+                self._ring_dirty = True
+
+    @property
+    def regions(self) -> Dict[str, Region]:
+        with self._lock:
+            return dict(self._regions)
+
+    def grab_region(self, region: Region) -> np.ndarray:
+        """Grab one region and convert it to the detector color space"""
+        image = np.asarray(self._screenshot(region=region))
+        if self._convert is not None:
+            image = self._convert(image)
+        return image
+
+    def grab_region_into(self, region: Region, dst: np.ndarray):
+        """Grab one region and write it converted into a preallocated view"""
+        image = np.asarray(self._screenshot(region=region))
+        if image.shape[:2] != dst.shape[:2]:
+            raise ValueError(f"Captured region {region} has shape {image.shape}, expected {dst.shape}")
+        if self._convert_into is not None:
+            self._convert_into(image, dst)
+        elif self._convert is not None:
+            np.copyto(dst, self._convert(image))
+        else:
+            np.copyto(dst, image)
+
+    def _ensure_ring(self) -> Optional[FrameRing]:
+        if not self.ring_slots:
+            return None
+        if self.ring is None or self._ring_dirty:
+            shapes = {
+                name: (height, width, self.channels)
+                for name, (_, _, width, height) in self.regions.items()
+            }
+            if self.ring is not None:
+                # Its frames may still be read, here or by pipeline workers
+                self._retired.append(self.ring)
+            self.ring = FrameRing(shapes, slots=self.ring_slots, shared=self.shared)
+            self._ring_dirty = False
+        return self.ring
+
+    def _close_retired(self):
+        """Free replaced rings once none of their frames is held"""
+        for ring in [ring for ring in self._retired if not ring.in_use]:
+            ring.close()
+            self._retired.remove(ring)
+
+    def capture(self, names: Optional[Iterable[str]] = None) -> CapturedFrame:
+        """Capture the requested regions (all registered regions by default)"""
+        regions = self.regions
+        if names is not None:
+            regions = {name: regions[name] for name in names if name in regions}
+
+        start = time.perf_counter()
+        pixels = sum(region[2] * region[3] for region in regions.values())
+        # One capture at a time: the ring has a single write slot, and the
+        # latest slot must be the one this capture published
+        with self._capture_lock:
+            ring = self._ensure_ring()
+            if self._retired:
+                self._close_retired()
+            slot = ring.acquire_write() if ring is not None else None
+
+            if slot is not None:
+                try:
+                    for name, region in regions.items():
+                        self.grab_region_into(region, slot.views[name])
+                except Exception:
+                    ring.abort_write(slot)
+                    raise
+                ring.publish(slot, time.time(), list(regions))
+                latest = ring.acquire_latest()
+                frame = CapturedFrame(
+                    {name: latest.views[name] for name in latest.filled},
+                    latest.timestamp,
+                    release=lambda: ring.release(latest),
+                    sequence=latest.sequence,
+                    slot=latest
+                )
+            else:
+                # No ring configured or every slot is still held: allocate
+                crops = {name: self.grab_region(region) for name, region in regions.items()}
+                frame = CapturedFrame(crops, time.time())
+
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.captures += 1
+            self.total_ms += elapsed_ms
+            self.last_ms = elapsed_ms
+            self.last_pixels = pixels
+        return frame
+
+    def use_shared_memory(self, min_slots: int = 4):
+        """Move the frame ring into shared memory for other processes"""
+        with self._lock:
+            if self.shared and self.ring_slots >= min_slots:
+                return
+            self.shared = True
+            self.ring_slots = max(self.ring_slots, min_slots)
+            self._ring_dirty = True
+
+    def close(self):
+        with self._capture_lock:
+            for ring in self._retired:
+                ring.close()
+            self._retired = []
+            if self.ring is not None:
+                self.ring.close()
+                self.ring = None
+
+    def get_stats(self) -> Dict[str, object]:
+        full_pixels = self.screen_size[0] * self.screen_size[1]
+        return {
+            "regions": {name: list(region) for name, region in self.regions.items()},
+            "captures": self.captures,
+            "avg_ms": round(self.total_ms / self.captures, 3) if self.captures else 0.0,
+            "last_ms": round(self.last_ms, 3),
+            "last_pixels": self.last_pixels,
+            "screen_fraction": round(self.last_pixels / full_pixels, 4) if full_pixels else 0.0,
+            "ring": self.ring.get_stats() if self.ring is not None else None,
+        }
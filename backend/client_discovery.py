@@ -0,0 +1,215 @@
+import logging
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+CLIENT_NAMES = ("tibia", "otclient")
+
+try:
+    import win32gui
+    import win32process
+except ImportError:
+    win32gui = None
+    win32process = None
+
+
+def find_window(pid: int) -> Optional[int]:
+    """Handle of the first visible top-level window of a process, if any"""
+    if win32gui is None:
+        return None
+    found = []
+
+    def check(handle, _):
+        if win32gui.IsWindowVisible(handle) and win32process.GetWindowThreadProcessId(handle)[1] == pid:
+            found.append(handle)
+            return False
+        return True
+
+    try:
+        win32gui.EnumWindows(check, None)
+    except Exception:
+        # EnumWindows reports the early stop as an error
+        pass
+    return found[0] if found else None
+
+
+def window_alive(handle: int) -> bool:
+    return win32gui is None or bool(win32gui.IsWindow(handle))
+
+
+def window_origin(handle: int) -> Optional[Tuple[int, int]]:
+    """Screen position of the top-left corner of a window's client area"""
+    if win32gui is None:
+        return None
+    try:
+        left, top = win32gui.ClientToScreen(handle, (0, 0))
+    except Exception:
+        return None
+    return int(left), int(top)
+
+
+class GameClient:
+    """A matched client process and its window handle"""
+
+    __slots__ = ("pid", "name", "create_time", "window", "origin", "process")
+
+    def __init__(self, process: psutil.Process, name: str, create_time: float):
+        self.pid = process.pid
+        self.name = name
+        self.create_time = create_time
+        self.window = None
+        self.origin = None
+        self.process = process
+
+    def to_dict(self) -> Dict[str, object]:
+        return {"pid": self.pid, "name": self.name, "window": self.window, "origin": self.origin}
+
+
+class ClientDiscovery:
+    """Finds game client processes for every bot session of a process.
+
+    One scan of the process table serves all sessions; matches are kept
+    and each session is assigned its own client, which sticks until the
+    process exits. ``acquire`` checks the assigned client with a cheap
+    liveness test (same PID and start time, window still open) and only
+    rescans when that fails. A background thread rescans on a slow
+    interval so new clients show up without a session having to ask.
+    """
+
+    def __init__(self, names=CLIENT_NAMES, rescan_interval: float = 30.0, min_rescan_interval: float = 1.0,
+                 process_iter: Callable = psutil.process_iter, window_finder: Callable = find_window,
+                 window_check: Callable = window_alive, window_locator: Callable = window_origin):
+        self._pattern = re.compile("|".join(re.escape(name) for name in names), re.IGNORECASE)
+        self.rescan_interval = rescan_interval
+        self.min_rescan_interval = min_rescan_interval
+        self._process_iter = process_iter
+        self._find_window = window_finder
+        self._window_alive = window_check
+        self._window_origin = window_locator
+        self._clients: Dict[int, GameClient] = {}
+        self._assigned: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._last_scan = float("-inf")
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.scans = 0
+        self.scan_ms = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.lost = 0
+
+    def start(self):
+        """Rescan in the background every ``rescan_interval`` seconds"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="client-discovery", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.rescan_interval):
+            try:
+                self.scan()
+            except Exception as e:
+                logger.error(f"Error scanning for game clients: {e}")
+
+    def scan(self) -> List[GameClient]:
+        """Walk the process table once and refresh the matched clients"""
+        started = time.perf_counter()
+        found = {}
+        for process in self._process_iter(["name", "create_time"]):
+            name = process.info.get("name")
+            if not name or not self._pattern.search(name):
+                continue
+            known = self._clients.get(process.pid)
+            if known is not None and known.create_time == process.info["create_time"]:
+                found[process.pid] = known
+            else:
+                found[process.pid] = GameClient(process, name, process.info["create_time"])
+
+        with self._lock:
+            self._clients = found
+            # Sessions whose client exited pick a new one on their next acquire
+            for bot_id, pid in list(self._assigned.items()):
+                if pid not in found:
+                    del self._assigned[bot_id]
+                    self.lost += 1
+            self._last_scan = time.monotonic()
+            self.scans += 1
+            self.scan_ms = round((time.perf_counter() - started) * 1000, 3)
+        return list(found.values())
+
+    def _alive(self, client: GameClient) -> bool:
+        try:
+            if not client.process.is_running():
+                return False
+        except psutil.Error:
+            return False
+        return client.window is None or self._window_alive(client.window)
+
+    def acquire(self, bot_id: str) -> Optional[GameClient]:
+        """Client assigned to a session, assigning a free one if needed"""
+        with self._lock:
+            client = self._clients.get(self._assigned.get(bot_id))
+        if client is not None and self._alive(client):
+            self.hits += 1
+            return client
+        self.misses += 1
+
+        with self._lock:
+            if client is not None:
+                self._clients.pop(client.pid, None)
+                self._assigned.pop(bot_id, None)
+                self.lost += 1
+            client = self._assign(bot_id)
+            rescan = client is None and time.monotonic() - self._last_scan >= self.min_rescan_interval
+        if rescan:
+            self.scan()
+            with self._lock:
+                client = self._assign(bot_id)
+        if client is not None:
+            if client.window is None:
+                client.window = self._find_window(client.pid)
+            # Windows can be moved between sessions, so this is looked up every time
+            if client.window is not None:
+                client.origin = self._window_origin(client.window)
+        return client
+
+    def _assign(self, bot_id: str) -> Optional[GameClient]:
+        taken = set(self._assigned.values())
+        for pid, client in self._clients.items():
+            if pid not in taken:
+                self._assigned[bot_id] = pid
+                return client
+        return None
+
+    def release(self, bot_id: str):
+        """Free a session's client for other sessions"""
+        with self._lock:
+            self._assigned.pop(bot_id, None)
+
+    def get_stats(self) -> Dict[str, object]:
+        total = self.hits + self.misses
+        with self._lock:
+            assigned = dict(self._assigned)
+            clients = [client.to_dict() for client in self._clients.values()]
+        return {
+            "clients": clients,
+            "assigned": assigned,
+            "scans": self.scans,
+            "last_scan_ms": self.scan_ms,
+            "hits": self.hits,
+            "misses": self.misses,
+            "lost": self.lost,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
@@ -0,0 +1,82 @@
+import asyncio
+import copy
+import logging
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ConfigCache:
+    """Latest bot configuration kept in process with a version counter.
+
+    The cache is warmed from MongoDB once and afterwards only changes
+    through ``set``, so reads never touch the database. Each change bumps
+    ``version``, which together with the config id forms the ETag.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.version = 0
+        self._config: Optional[Dict[str, Any]] = None
+        self._warmed = False
+        self._lock = asyncio.Lock()
+
+        self.hits = 0
+        self.loads = 0
+        self.not_modified = 0
+
+    @property
+    def etag(self) -> Optional[str]:
+        if self._config is None:
+            return None
+        return f'"{self.version}-{self._config.get("id")}"'
+
+    async def warm(self):
+        """Load the newest stored config, once"""
+        if self._warmed:
+            return
+        async with self._lock:
+            if self._warmed:
+                return
+            config = await self.collection.find_one(sort=[("_id", -1)])
+            self.loads += 1
+            # A save may have landed while the query was in flight
+            if self._config is None and config is not None:
+                config.pop("_id", None)
+                self._config = config
+                self.version += 1
+            self._warmed = True
+
+    async def get(self) -> Optional[Dict[str, Any]]:
+        """Latest config as a fresh dict, or None when nothing was ever saved"""
+        await self.warm()
+        self.hits += 1
+        return copy.deepcopy(self._config) if self._config is not None else None
+
+    def set(self, config: Dict[str, Any]):
+        """Replace the cached config after it was saved"""
+        config = copy.deepcopy(config)
+        config.pop("_id", None)
+        self._config = config
+        self.version += 1
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """Whether an If-None-Match header still matches the cached config"""
+        etag = self.etag
+        if not if_none_match or etag is None:
+            return False
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        if "*" in tags or etag in tags or f"W/{etag}" in tags:
+            self.not_modified += 1
+            return True
+        return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "warmed": self._warmed,
+            "etag": self.etag,
+            "hits": self.hits,
+            "loads": self.loads,
+            "not_modified": self.not_modified,
+        }
@@ -0,0 +1,213 @@
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_DIR = Path(__file__).parent / 'templates' / 'creatures'
+
+
+def to_gray(image: np.ndarray) -> np.ndarray:
+    image = np.asarray(image, dtype=np.float32)
+    return image.mean(axis=-1) if image.ndim == 3 else image
+
+
+def downsample(image: np.ndarray, factor: int) -> np.ndarray:
+    """Block-mean downsample by an integer factor"""
+    if factor == 1:
+        return image
+    height = image.shape[0] // factor * factor
+    width = image.shape[1] // factor * factor
+    blocks = image[:height, :width].reshape(height // factor, factor, width // factor, factor)
+    return blocks.mean(axis=(1, 3))
+
+
+def resize(image: np.ndarray, scale: float) -> np.ndarray:
+    if scale == 1.0:
+        return image
+    height = max(1, int(round(image.shape[0] * scale)))
+    width = max(1, int(round(image.shape[1] * scale)))
+    resized = Image.fromarray(image.astype(np.float32), mode='F').resize((width, height), Image.BILINEAR)
+    return np.asarray(resized, dtype=np.float32)
+
+
+def render_name_label(name: str) -> np.ndarray:
+    """Render a creature name as it appears in the battle list"""
+    font = ImageFont.load_default()
+    left, top, right, bottom = ImageDraw.Draw(Image.new('L', (1, 1))).textbbox((0, 0), name, font=font)
+    image = Image.new('L', (right - left + 2, bottom - top + 2), color=0)
+    ImageDraw.Draw(image).text((1 - left, 1 - top), name, fill=255, font=font)
+    return np.asarray(image, dtype=np.float32)
+
+
+def load_template(name: str) -> np.ndarray:
+    """Sprite from the templates directory, or a rendered name label"""
+    path = TEMPLATE_DIR / f"{name.lower().replace(' ', '_')}.png"
+    if path.exists():
+        return to_gray(np.asarray(Image.open(path).convert('RGB')))
+    return render_name_label(name)
+
+
+def match_ncc(image: np.ndarray, template: np.ndarray) -> np.ndarray:
+    """Normalized cross-correlation of a prepared template over an image.
+
+    ``template`` must be zero-mean with unit norm. Window sums come from
+    integral images so only the correlation term needs a full pass.
+    """
+    th, tw = template.shape
+    if image.shape[0] < th or image.shape[1] < tw:
+        return np.empty((0, 0), dtype=np.float32)
+
+    image = image.astype(np.float64)
+    integral = np.pad(image, ((1, 0), (1, 0))).cumsum(0).cumsum(1)
+    integral_sq = np.pad(image * image, ((1, 0), (1, 0))).cumsum(0).cumsum(1)
+
+    def window_sum(table):
+        return table[th:, tw:] - table[:-th, tw:] - table[th:, :-tw] + table[:-th, :-tw]
+
+    count = th * tw
+    sums = window_sum(integral)
+    variance = window_sum(integral_sq) - sums * sums / count
+    windows = np.lib.stride_tricks.sliding_window_view(image, (th, tw))
+    correlation = np.einsum('ijkl,kl->ij', windows, template)
+    return (correlation / np.sqrt(np.maximum(variance, 1e-6))).astype(np.float32)
+
+
+def prepare(template: np.ndarray) -> Optional[np.ndarray]:
+    """Zero-mean, unit-norm copy of a template (None if it is flat)"""
+    template = template.astype(np.float64) - template.mean()
+    norm = np.sqrt((template * template).sum())
+    if norm < 1e-6:
+        return None
+    return template / norm
+
+
+class CreatureTemplate:
+    """Multi-scale template pyramid for one creature"""
+
+    def __init__(self, name: str, image: np.ndarray, scales: Iterable[float], levels: int):
+        self.name = name
+        # (scale, full-resolution template, coarse template)
+        self.variants: List[Tuple[float, np.ndarray, np.ndarray]] = []
+        factor = 2 ** levels
+        for scale in scales:
+            scaled = resize(image, scale)
+            full = prepare(scaled)
+            coarse = prepare(downsample(scaled, factor)) if min(scaled.shape) >= factor * 2 else None
+            if full is not None and coarse is not None:
+                self.variants.append((scale, full, coarse))
+
+
+class TemplatePyramidDetector:
+    """Finds target creatures by coarse-to-fine template matching.
+
+    Templates and their pyramids are built once per creature name; the
+    frame is downsampled by ``2 ** levels`` for a coarse search and the
+    best coarse hits are refined at full resolution in small windows.
+    Every entry of a creature is reported, so a battle list with three
+    rats gives three hits.
+    """
+
+    def __init__(self, scales: Iterable[float] = (0.8, 1.0, 1.25), levels: int = 1,
+                 threshold: float = 0.8, coarse_threshold: float = 0.6, max_candidates: int = 8):
+        self.scales = tuple(scales)
+        self.levels = levels
+        self.threshold = threshold
+        self.coarse_threshold = coarse_threshold
+        self.max_candidates = max_candidates
+        self.templates: Dict[str, CreatureTemplate] = {}
+        self._lock = threading.Lock()
+
+        self.builds = 0
+        self.detections = 0
+        self.refinements = 0
+
+    def set_creatures(self, names: Iterable[str]):
+        """Build templates for new names and drop removed ones"""
+        wanted = list(dict.fromkeys(names))
+        with self._lock:
+            templates = {name: tmpl for name, tmpl in self.templates.items() if name in wanted}
+        for name in wanted:
+            if name in templates:
+                continue
+            try:
+                templates[name] = CreatureTemplate(name, load_template(name), self.scales, self.levels)
+                self.builds += 1
+            except Exception as e:
+                logger.error(f"Error building template for {name}: {e}")
+        with self._lock:
+            self.templates = templates
+
+    def _candidates(self, scores: np.ndarray, shape: Tuple[int, int]) -> List[Tuple[float, int, int]]:
+        """Best coarse hits, skipping those overlapping a better one"""
+        ys, xs = np.nonzero(scores >= self.coarse_threshold)
+        if ys.size == 0:
+            return []
+        radius_y, radius_x = max(shape[0] // 2, 1), max(shape[1] // 2, 1)
+        candidates = []
+        for i in np.argsort(scores[ys, xs])[::-1]:
+            y, x = int(ys[i]), int(xs[i])
+            if any(abs(y - cy) < radius_y and abs(x - cx) < radius_x for _, cy, cx in candidates):
+                continue
+            candidates.append((float(scores[y, x]), y, x))
+            if len(candidates) == self.max_candidates:
+                break
+        return candidates
+
+    @staticmethod
+    def _suppress(hits: List[Tuple[Dict[str, object], int, int]]) -> List[Dict[str, object]]:
+        """One hit per entry: the best scoring of those overlapping each other"""
+        kept = []
+        for hit, th, tw in sorted(hits, key=lambda item: item[0]['score'], reverse=True):
+            if all(abs(hit['y'] - other['y']) >= th // 2 or abs(hit['x'] - other['x']) >= tw // 2
+                   for other in kept):
+                kept.append(hit)
+        return kept
+
+    def detect(self, image: np.ndarray) -> List[Dict[str, object]]:
+        """Find each template in an image; returns region-relative hits"""
+        self.detections += 1
+        gray = to_gray(image)
+        factor = 2 ** self.levels
+        coarse_frame = downsample(gray, factor)
+        with self._lock:
+            templates = list(self.templates.values())
+
+        found = []
+        for template in templates:
+            hits = []
+            for scale, full, coarse in template.variants:
+                th, tw = full.shape
+                for _, cy, cx in self._candidates(match_ncc(coarse_frame, coarse), coarse.shape):
+                    # Refine around the coarse hit at full resolution
+                    y0 = max(0, cy * factor - factor)
+                    x0 = max(0, cx * factor - factor)
+                    window = gray[y0:y0 + th + 2 * factor, x0:x0 + tw + 2 * factor]
+                    scores = match_ncc(window, full)
+                    self.refinements += 1
+                    if scores.size == 0:
+                        continue
+                    wy, wx = np.unravel_index(np.argmax(scores), scores.shape)
+                    score = float(scores[wy, wx])
+                    if score >= self.threshold:
+                        hits.append(({
+                            'name': template.name,
+                            'x': int(x0 + wx + tw // 2),
+                            'y': int(y0 + wy + th // 2),
+                            'score': round(score, 4),
+                            'scale': scale,
+                        }, th, tw))
+            found.extend(self._suppress(hits))
+        return found
+
+    def get_stats(self) -> Dict[str, object]:
+        return {
+            "creatures": sorted(self.templates),
+            "template_builds": self.builds,
+            "detections": self.detections,
+            "refinements": self.refinements,
+        }
@@ -0,0 +1,157 @@
+import logging
+import threading
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+Shape = Tuple[int, ...]
+
+
+class FrameSlot:
+    """One preallocated frame: a flat buffer exposed as per-region views"""
+
+    def __init__(self, index: int, buffer: np.ndarray, layout: Dict[str, Tuple[int, Shape]]):
+        self.index = index
+        self.buffer = buffer
+        self.views: Dict[str, np.ndarray] = {}
+        for name, (offset, shape) in layout.items():
+            size = int(np.prod(shape))
+            self.views[name] = buffer[offset:offset + size].reshape(shape)
+        self.readers = 0
+        self.sequence = 0
+        self.timestamp = 0.0
+        self.filled: List[str] = []
+
+
+class FrameRing:
+    """Fixed ring of preallocated frame buffers written in place by capture.
+
+    Capture acquires the oldest slot no reader holds, writes region pixels
+    into its views and publishes it; detectors read the latest slot as views
+    and release it when done. When every slot is held the frame is dropped.
+    With ``shared=True`` the ring lives in ``multiprocessing.shared_memory``
+    so other processes can attach to it by name.
+    """
+
+    def __init__(self, shapes: Dict[str, Shape], slots: int = 4, shared: bool = False,
+                 dtype=np.uint8):
+        if slots < 2:
+            raise ValueError("Frame ring needs at least 2 slots")
+        self.shapes = {name: tuple(shape) for name, shape in shapes.items()}
+        self.dtype = np.dtype(dtype)
+        self.layout: Dict[str, Tuple[int, Shape]] = {}
+        offset = 0
+        for name, shape in self.shapes.items():
+            self.layout[name] = (offset, shape)
+            offset += int(np.prod(shape))
+        self.slot_size = offset
+        self.shared = shared
+        self._shm: Optional[shared_memory.SharedMemory] = None
+
+        total = max(self.slot_size * slots, 1)
+        if shared:
+            self._shm = shared_memory.SharedMemory(create=True, size=total * self.dtype.itemsize)
+            storage = np.ndarray((total,), dtype=self.dtype, buffer=self._shm.buf)
+        else:
+            storage = np.empty((total,), dtype=self.dtype)
+        self._storage = storage
+
+        self.slots = [
+            FrameSlot(i, storage[i * self.slot_size:(i + 1) * self.slot_size], self.layout)
+            for i in range(slots)
+        ]
+        self._lock = threading.Lock()
+        self._next = 0
+        self._latest: Optional[FrameSlot] = None
+        self._writing: Optional[FrameSlot] = None
+        self._sequence = 0
+
+        self.writes = 0
+        self.reuses = 0
+        self.drops = 0
+
+    @property
+    def shm_name(self) -> Optional[str]:
+        return self._shm.name if self._shm is not None else None
+
+    @property
+    def in_use(self) -> bool:
+        """Whether a slot is being written or held by a reader"""
+        with self._lock:
+            return self._writing is not None or any(slot.readers for slot in self.slots)
+
+    def acquire_write(self) -> Optional[FrameSlot]:
+        """Reserve the oldest free slot for writing, or None if all are held"""
+        with self._lock:
+            for step in range(len(self.slots)):
+                slot = self.slots[(self._next + step) % len(self.slots)]
+                if slot.readers == 0 and slot is not self._latest and slot is not self._writing:
+                    self._next = (slot.index + 1) % len(self.slots)
+                    self._writing = slot
+                    if slot.sequence:
+                        self.reuses += 1
+                    return slot
+            self.drops += 1
+            return None
+
+    def publish(self, slot: FrameSlot, timestamp: float, filled: List[str]):
+        """Make a written slot the latest frame"""
+        with self._lock:
+            self._sequence += 1
+            slot.sequence = self._sequence
+            slot.timestamp = timestamp
+            slot.filled = list(filled)
+            self._latest = slot
+            self._writing = None
+            self.writes += 1
+
+    def abort_write(self, slot: FrameSlot):
+        """Give back a slot whose capture failed"""
+        with self._lock:
+            if self._writing is slot:
+                self._writing = None
+
+    def acquire_latest(self) -> Optional[FrameSlot]:
+        """Hold the latest published slot for reading"""
+        with self._lock:
+            slot = self._latest
+            if slot is not None:
+                slot.readers += 1
+            return slot
+
+    def release(self, slot: FrameSlot):
+        with self._lock:
+            slot.readers = max(0, slot.readers - 1)
+
+    def close(self):
+        """Free the shared memory segment, if any"""
+        if self._shm is not None:
+            self.slots = []
+            self._latest = None
+            self._storage = None
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+            try:
+                self._shm.close()
+            except BufferError:
+                # Frames still hold views; the mapping goes away with them
+                logger.warning("Frame ring closed while frames were still in use")
+            self._shm = None
+
+    def get_stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "slots": len(self.slots),
+                "slot_bytes": self.slot_size * self.dtype.itemsize,
+                "shared": self.shared,
+                "shm_name": self.shm_name,
+                "writes": self.writes,
+                "reuses": self.reuses,
+                "drops": self.drops,
+                "held": sum(1 for slot in self.slots if slot.readers),
+            }
@@ -0,0 +1,87 @@
+import logging
+import time
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class DirtyRegionTracker:
+    """Marks which captured regions changed since the previous frame.
+
+    Each region crop is downsampled by ``step`` and compared against the
+    previous tick's thumbnail; a region is dirty when any pixel moved by
+    more than ``threshold``. ``steps`` overrides the sampling per region,
+    for regions where a few pixels matter (the HP/MP bars). Detector
+    results can then be reused while their region stays clean, up to
+    ``max_age`` seconds.
+    """
+
+    def __init__(self, step: int = 4, threshold: int = 8, max_age: float = 5.0,
+                 steps: Optional[Dict[str, int]] = None):
+        self.step = step
+        self.steps = dict(steps or {})
+        self.threshold = threshold
+        self.max_age = max_age
+        self._thumbnails: Dict[str, np.ndarray] = {}
+        self._dirty: Set[str] = set()
+        self._results: Dict[Tuple[str, str], Tuple[float, Any]] = {}
+
+        self.dirty_counts: Dict[str, int] = {}
+        self.clean_counts: Dict[str, int] = {}
+        self.reused = 0
+        self.computed = 0
+
+    def _thumbnail(self, name: str, crop: np.ndarray) -> np.ndarray:
+        step = self.steps.get(name, self.step)
+        # astype copies, so ring buffer views can be overwritten afterwards
+        return crop[::step, ::step].astype(np.int16)
+
+    def update(self, frame) -> Set[str]:
+        """Diff the frame's regions against their last capture"""
+        dirty = set()
+        for name, crop in frame.regions.items():
+            thumbnail = self._thumbnail(name, crop)
+            previous = self._thumbnails.get(name)
+            if (previous is None or previous.shape != thumbnail.shape
+                    or np.abs(thumbnail - previous).max(initial=0) > self.threshold):
+                dirty.add(name)
+                self.dirty_counts[name] = self.dirty_counts.get(name, 0) + 1
+            else:
+                self.clean_counts[name] = self.clean_counts.get(name, 0) + 1
+            self._thumbnails[name] = thumbnail
+
+        self._dirty = dirty
+        return dirty
+
+    def is_dirty(self, name: str) -> bool:
+        return name in self._dirty or name not in self._thumbnails
+
+    def reuse(self, name: str, key: str, compute: Callable[[], Any]) -> Any:
+        """Return the cached result for ``key`` unless ``name`` changed"""
+        now = time.monotonic()
+        cached = self._results.get((name, key))
+        if cached is not None and not self.is_dirty(name) and now - cached[0] < self.max_age:
+            self.reused += 1
+            return cached[1]
+
+        result = compute()
+        self._results[(name, key)] = (now, result)
+        self.computed += 1
+        return result
+
+    def reset(self):
+        self._thumbnails.clear()
+        self._results.clear()
+        self._dirty = set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.reused + self.computed
+        return {
+            "dirty": dict(self.dirty_counts),
+            "clean": dict(self.clean_counts),
+            "reused": self.reused,
+            "computed": self.computed,
+            "reuse_rate": round(self.reused / total, 4) if total else 0.0,
+        }
@@ -0,0 +1,345 @@
+import argparse
+import asyncio
+import bisect
+import json
+import logging
+import mmap
+import queue
+import struct
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+Region = Tuple[int, int, int, int]
+
+MAGIC = b"OTFRAME1"
+# timestamp, left, top, width, height, channels, full screen, compressed size
+RECORD = struct.Struct("<diiIIBBI")
+
+# Grabs closer together than this belong to the same capture tick
+TICK_GAP = 0.005
+
+
+class FrameRecorder:
+    """Appends captured screen regions to a capture file.
+
+    Every record is a header (timestamp, region, shape) followed by the
+    zlib-compressed pixels. Compression and writing happen on a
+    background thread, so recording adds a queue put to the capture
+    path; when the writer falls behind, frames are dropped and counted
+    rather than stalling the bot.
+    """
+
+    def __init__(self, path, level: int = 1, max_pending: int = 256):
+        self.path = Path(path)
+        self.level = level
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        new_file = not self.path.exists() or self.path.stat().st_size == 0
+        self._file = open(self.path, "ab")
+        if new_file:
+            self._file.write(MAGIC)
+
+        self.recorded = 0
+        self.dropped = 0
+        self.raw_bytes = 0
+        self.written_bytes = 0
+
+        self._thread = threading.Thread(target=self._run, name="frame-recorder", daemon=True)
+        self._thread.start()
+
+    def append(self, image: np.ndarray, region: Optional[Region] = None, timestamp: Optional[float] = None):
+        """Queue one grab; ``region`` None means the full screen"""
+        try:
+            self._queue.put_nowait((time.time() if timestamp is None else timestamp, region, np.array(image)))
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            timestamp, region, image = item
+            try:
+                self._write(timestamp, region, image)
+            except Exception as e:
+                logger.error(f"Error recording frame: {e}")
+        self._file.close()
+
+    def _write(self, timestamp: float, region: Optional[Region], image: np.ndarray):
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        height, width = image.shape[:2]
+        channels = image.shape[2] if image.ndim == 3 else 1
+        left, top = (region[0], region[1]) if region is not None else (0, 0)
+        data = zlib.compress(image.tobytes(), self.level)
+        self._file.write(RECORD.pack(timestamp, left, top, width, height, channels, region is None, len(data)))
+        self._file.write(data)
+        self.recorded += 1
+        self.raw_bytes += image.nbytes
+        self.written_bytes += RECORD.size + len(data)
+
+    def close(self):
+        """Write what is queued and close the file"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def get_stats(self) -> Dict[str, object]:
+        return {
+            "path": str(self.path),
+            "recorded": self.recorded,
+            "dropped": self.dropped,
+            "pending": self._queue.qsize(),
+            "written_bytes": self.written_bytes,
+            "compression_ratio": round(self.raw_bytes / self.written_bytes, 2) if self.written_bytes else 0.0,
+        }
+
+
+class RecordingScreenSource:
+    """Screen source that records every grab it passes through"""
+
+    def __init__(self, screenshot: Callable, recorder: FrameRecorder):
+        self._screenshot = screenshot
+        self.recorder = recorder
+
+    def __call__(self, region: Optional[Region] = None) -> np.ndarray:
+        image = np.asarray(self._screenshot(region=region))
+        self.recorder.append(image, region)
+        return image
+
+    def get_stats(self) -> Dict[str, object]:
+        stats = self._screenshot.get_stats() if hasattr(self._screenshot, "get_stats") else {}
+        return dict(stats, recorder=self.recorder.get_stats())
+
+
+class CaptureFile:
+    """Read side of a capture file, memory-mapped.
+
+    Opening scans only the record headers; pixels are decompressed
+    straight from the mapping when a record is read.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{self.path} is not a capture file")
+
+        self.timestamps: List[float] = []
+        self.regions: List[Region] = []
+        self.full: List[bool] = []
+        self._shapes: List[Tuple[int, ...]] = []
+        self._offsets: List[Tuple[int, int]] = []
+        offset = len(MAGIC)
+        while offset + RECORD.size <= len(self._map):
+            timestamp, left, top, width, height, channels, full, size = RECORD.unpack_from(self._map, offset)
+            offset += RECORD.size
+            if offset + size > len(self._map):
+                # Truncated by a crash while recording
+                break
+            self.timestamps.append(timestamp)
+            self.regions.append((left, top, width, height))
+            self.full.append(bool(full))
+            self._shapes.append((height, width, channels) if channels > 1 else (height, width))
+            self._offsets.append((offset, size))
+            offset += size
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def read(self, index: int) -> np.ndarray:
+        offset, size = self._offsets[index]
+        data = zlib.decompress(memoryview(self._map)[offset:offset + size])
+        return np.frombuffer(data, dtype=np.uint8).reshape(self._shapes[index])
+
+    def close(self):
+        self._map.close()
+
+
+class ReplayScreenSource:
+    """Serves a capture file in place of ``pyautogui.screenshot``.
+
+    A grab returns the latest recorded image of that region at the
+    replay clock (a crop of a full-screen record works too). With
+    ``speed`` set, the clock follows wall time scaled by it; with
+    ``speed=None`` it only moves on ``advance``, one recorded capture
+    tick at a time, which is what ``replay_session`` uses to rerun a
+    session deterministically as fast as the bot can process it.
+    """
+
+    def __init__(self, path, speed: Optional[float] = 1.0, loop: bool = False):
+        self.capture = CaptureFile(path)
+        if not len(self.capture):
+            raise ValueError(f"{path} has no recorded frames")
+        self.speed = speed
+        self.loop = loop
+
+        # Record indices per region, in time order
+        self._by_region: Dict[Region, List[int]] = {}
+        self._full: List[int] = []
+        for index, region in enumerate(self.capture.regions):
+            if self.capture.full[index]:
+                self._full.append(index)
+            else:
+                self._by_region.setdefault(region, []).append(index)
+        self._region_times = {
+            region: [self.capture.timestamps[i] for i in indices] for region, indices in self._by_region.items()
+        }
+        self._full_times = [self.capture.timestamps[i] for i in self._full]
+
+        # Start of every capture tick
+        timestamps = self.capture.timestamps
+        self.ticks = [0] + [i for i in range(1, len(timestamps)) if timestamps[i] - timestamps[i - 1] > TICK_GAP]
+        self.tick = 0
+        self.start = timestamps[0]
+        self.end = timestamps[-1]
+        self.time = self.start
+        self._started_at = time.monotonic()
+        self._decoded: Dict[int, np.ndarray] = {}
+
+        self.grabs = 0
+        self.decodes = 0
+        self.missing = 0
+
+    def clock(self) -> float:
+        """Recorded time being replayed"""
+        if self.speed is not None:
+            elapsed = (time.monotonic() - self._started_at) * self.speed
+            duration = self.end - self.start
+            if self.loop and duration > 0:
+                elapsed %= duration
+            self.time = min(self.start + elapsed, self.end)
+        return self.time
+
+    def advance(self) -> bool:
+        """Move to the end of the next recorded capture tick; False at the end"""
+        if self.tick >= len(self.ticks) - 1:
+            return False
+        self.tick += 1
+        following = self.ticks[self.tick + 1] if self.tick + 1 < len(self.ticks) else len(self.capture)
+        self.time = self.capture.timestamps[following - 1]
+        return True
+
+    def rewind(self):
+        self.tick = 0
+        following = self.ticks[1] if len(self.ticks) > 1 else len(self.capture)
+        self.time = self.capture.timestamps[following - 1]
+        self._started_at = time.monotonic()
+
+    def _latest(self, indices: List[int], times: List[float], now: float) -> Optional[int]:
+        if not indices:
+            return None
+        position = bisect.bisect_right(times, now) - 1
+        return indices[max(position, 0)]
+
+    def _image(self, index: int) -> np.ndarray:
+        image = self._decoded.get(index)
+        if image is None:
+            if len(self._decoded) > 64:
+                self._decoded.clear()
+            image = self._decoded[index] = self.capture.read(index)
+            self.decodes += 1
+        return image
+
+    def __call__(self, region: Optional[Region] = None) -> np.ndarray:
+        now = self.clock()
+        self.grabs += 1
+        if region is not None:
+            region = tuple(int(value) for value in region)
+            index = self._latest(self._by_region.get(region, []), self._region_times.get(region, []), now)
+            if index is not None:
+                return self._image(index)
+
+        index = self._latest(self._full, self._full_times, now)
+        if index is None:
+            # Region that was not captured while recording
+            self.missing += 1
+            width, height = (region[2], region[3]) if region is not None else (1920, 1080)
+            return np.zeros((height, width, 3), dtype=np.uint8)
+        screen = self._image(index)
+        if region is None:
+            return screen
+        left, top, width, height = region
+        return screen[top:top + height, left:left + width]
+
+    def get_stats(self) -> Dict[str, object]:
+        return {
+            "path": str(self.capture.path),
+            "records": len(self.capture),
+            "ticks": len(self.ticks),
+            "tick": self.tick,
+            "position_s": round(self.time - self.start, 3),
+            "duration_s": round(self.end - self.start, 3),
+            "speed": self.speed,
+            "grabs": self.grabs,
+            "decodes": self.decodes,
+            "missing": self.missing,
+        }
+
+
+async def replay_session(bot, source: ReplayScreenSource, seed: int = 0, max_ticks: Optional[int] = None):
+    """Run a bot over a whole recording on the recorded clock.
+
+    Tasks come due by recorded time, input actions run inline without
+    their human delays after every tick, and the bot's random numbers
+    are seeded, so the same recording gives the same decisions. Returns
+    the number of ticks run.
+    """
+    bot.random.seed(seed)
+    bot.sleep = bot.mouse.wait = lambda seconds: None
+    bot.input_executor.inline = True
+    bot.capture_threaded = False
+    source.rewind()
+    scheduler = bot.scheduler = bot.build_scheduler(clock=source.clock)
+    bot.is_running = True
+    ticks = 0
+    try:
+        while bot.is_running and (max_ticks is None or ticks < max_ticks):
+            due = scheduler.due()
+            if due:
+                bot.metrics.tick()
+                await bot.run_tick(scheduler, due)
+                bot.input_executor.run_pending()
+                while any(not future.done() for future in bot.pending_actions.values()):
+                    await asyncio.sleep(0)
+                    bot.input_executor.run_pending()
+            ticks += 1
+            if not source.advance():
+                break
+    finally:
+        bot.is_running = False
+    return ticks
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Replay a capture file through a bot session")
+    parser.add_argument("capture", help="capture file written with CAPTURE_RECORD")
+    parser.add_argument("--config", help="bot config JSON to replay with (defaults otherwise)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ticks", type=int, help="stop after this many ticks")
+    args = parser.parse_args()
+
+    import server
+
+    replay = ReplayScreenSource(args.capture, speed=None)
+    session = server.TibiaBot("replay", screen_source=replay)
+    config = json.load(open(args.config)) if args.config else {"name": "replay"}
+    session.apply_config(server.BotConfig(**config))
+
+    started = time.perf_counter()
+    ran = asyncio.run(replay_session(session, replay, seed=args.seed, max_ticks=args.ticks))
+    elapsed = time.perf_counter() - started
+    session.close()
+    logger.info(
+        f"Replayed {ran} ticks ({replay.end - replay.start:.1f} s recorded) in {elapsed:.2f} s: "
+        f"{json.dumps(server.session_status(session)['latency'])}"
+    )
@@ -0,0 +1,532 @@
+import argparse
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import random
+import threading
+import time
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from capture_engine import DEFAULT_REGIONS, SCREEN_SIZE
+from creature_detector import render_name_label
+from hp_mp_reader import DEFAULT_HP_BAR, DEFAULT_MP_BAR
+
+logger = logging.getLogger(__name__)
+
+Region = Tuple[int, int, int, int]
+
+# RGB fills inside the bar reader's BGR calibration bounds
+HP_FILL = (200, 30, 30)
+MP_FILL = (30, 40, 200)
+BAR_EMPTY = (40, 40, 40)
+
+# Battle list layout: one name label per row
+BATTLE_LIST_ROW = 22
+LABEL_LEFT = 24
+LABEL_TOP = 4
+
+# name: (hit points, damage per second when adjacent, experience, loot)
+CREATURES: Dict[str, Tuple[int, float, int, List[str]]] = {
+    "rat": (20, 3, 5, ["gold coin", "cheese"]),
+    "cave rat": (30, 4, 10, ["gold coin", "cheese"]),
+    "troll": (50, 6, 20, ["gold coin", "studded armor", "ham"]),
+    "rotworm": (65, 8, 40, ["gold coin", "ham", "leather armor"]),
+    "cyclops": (260, 30, 150, ["gold coin", "platinum coin", "chain armor"]),
+    "dragon": (1000, 80, 700, ["platinum coin", "crystal coin"]),
+}
+
+MOVES = {
+    'up': (0, -1), 'down': (0, 1), 'left': (-1, 0), 'right': (1, 0),
+    'num7': (-1, -1), 'num9': (1, -1), 'num1': (-1, 1), 'num3': (1, 1),
+}
+
+
+@lru_cache(maxsize=64)
+def name_label(name: str) -> np.ndarray:
+    return render_name_label(name).astype(np.uint8)
+
+
+@lru_cache(maxsize=4096)
+def text_label(text: str) -> np.ndarray:
+    """White-on-black text, rendered once per string"""
+    font = ImageFont.load_default()
+    left, top, right, bottom = ImageDraw.Draw(Image.new('L', (1, 1))).textbbox((0, 0), text, font=font)
+    image = Image.new('L', (max(right, 1), max(bottom, 1)), color=0)
+    ImageDraw.Draw(image).text((0, 0), text, fill=255, font=font)
+    return np.asarray(image)
+
+
+def draw_text(panel: np.ndarray, x: int, y: int, text: str):
+    label = text_label(text)[:max(panel.shape[0] - y, 0), :max(panel.shape[1] - x, 0)]
+    area = panel[y:y + label.shape[0], x:x + label.shape[1]]
+    np.maximum(area, label[..., None], out=area)
+
+
+def render_hp_mp(size: Tuple[int, int], hp_percent: float, mp_percent: float,
+                 hp_text: str = "", mp_text: str = "") -> np.ndarray:
+    """'hp_mp' panel (width, height) with both bars and their "cur/max" text"""
+    width, height = size
+    panel = np.zeros((height, width, 3), dtype=np.uint8)
+    bars = ((DEFAULT_HP_BAR, hp_percent, HP_FILL, hp_text), (DEFAULT_MP_BAR, mp_percent, MP_FILL, mp_text))
+    for bar, percent, fill, text in bars:
+        band = bar.band(panel)
+        band[:] = BAR_EMPTY
+        band[:, :int(round(bar.width * max(0.0, min(percent, 100.0)) / 100))] = fill
+        if text:
+            draw_text(panel, bar.cols[0] + 44, max(bar.rows[0] - 3, 0), text)
+    return panel
+
+
+def render_battle_list(size: Tuple[int, int], names: List[str]) -> np.ndarray:
+    """'battle_list' panel with one name label per row, closest first"""
+    width, height = size
+    panel = np.zeros((height, width, 3), dtype=np.uint8)
+    for row, name in enumerate(names):
+        y = LABEL_TOP + row * BATTLE_LIST_ROW
+        if y >= height:
+            break
+        label = name_label(name)[:height - y, :width - LABEL_LEFT]
+        panel[y:y + label.shape[0], LABEL_LEFT:LABEL_LEFT + label.shape[1]] = label[..., None]
+    return panel
+
+
+def render_loot(size: Tuple[int, int], lines: List[str]) -> np.ndarray:
+    """'loot' panel showing server loot messages"""
+    width, height = size
+    panel = np.zeros((height, width, 3), dtype=np.uint8)
+    for row, line in enumerate(lines):
+        if 4 + row * 14 < height:
+            draw_text(panel, 4, 4 + row * 14, line)
+    return panel
+
+
+def ocr_hp_mp(image: np.ndarray, hp_text: str, mp_text: str) -> str:
+    """Text of whichever bar half the reader cropped (HP red, MP blue, in BGR)"""
+    image = np.asarray(image)
+    return mp_text if image.ndim == 3 and image[..., 0].sum() > image[..., 2].sum() else hp_text
+
+
+class VirtualClock:
+    """Simulated time that only moves when slept on or advanced.
+
+    Callable like ``time.monotonic`` so it can drive a TickScheduler,
+    ``sleep`` stands in for ``time.sleep`` in the bot's input delays and
+    ``async_sleep`` for ``asyncio.sleep``: it returns once the clock has
+    been moved past the wakeup and ``wake`` called.
+    """
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+        self._lock = threading.Lock()
+        self._timers: List[Tuple[float, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        with self._lock:
+            self.now += max(seconds, 0.0)
+
+    def advance_to(self, moment: float):
+        with self._lock:
+            self.now = max(self.now, moment)
+
+    async def async_sleep(self, seconds: float):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._timers, (self.now + max(seconds, 0.0), next(self._counter), future))
+        await future
+
+    def next_timer(self) -> Optional[float]:
+        while self._timers and self._timers[0][2].done():
+            heapq.heappop(self._timers)
+        return self._timers[0][0] if self._timers else None
+
+    def wake(self) -> int:
+        """Resolve the sleeps that are due; returns how many"""
+        woken = 0
+        while self._timers and self._timers[0][0] <= self.now:
+            _, _, future = heapq.heappop(self._timers)
+            if not future.done():
+                future.set_result(None)
+                woken += 1
+        return woken
+
+
+class SimCreature:
+    __slots__ = ("name", "hp", "damage", "exp", "loot", "distance")
+
+    def __init__(self, name: str, distance: float):
+        hp, damage, exp, loot = CREATURES[name]
+        self.name = name
+        self.hp = float(hp)
+        self.damage = damage
+        self.exp = exp
+        self.loot = loot
+        self.distance = distance
+
+
+class SimulatedGame:
+    """Small game-state model standing in for the Tibia client.
+
+    It is a screen source (renders the panels the detectors read from
+    the current state), an input device with the ``pyautogui`` methods
+    the bot calls, and an OCR engine. The world moves in fixed ``step``
+    increments up to ``clock()``: creatures spawn, close in and hit the
+    character, die under melee and spells and drop loot messages; typed
+    spells, the food hotkey, battle list clicks and arrow keys act on it.
+
+    With a VirtualClock it runs as fast as the bot can decide (see
+    ``run_simulation``); with the default wall clock it can back a live
+    session. How long the bot took to heal after HP fell to
+    ``heal_at_hp`` is recorded as the heal reaction latency.
+    """
+
+    def __init__(self, config=None, clock: Callable[[], float] = time.monotonic, seed: int = 0,
+                 creatures: Optional[List[str]] = None, hp_max: int = 500, mp_max: int = 300,
+                 spawn_rate: float = 0.25, max_creatures: int = 5, step: float = 0.05,
+                 melee_damage: float = 25.0, heal_amount: float = 0.3, spell_mana: int = 20,
+                 attack_damage: float = 80.0, mana_regen: float = 4.0):
+        self.clock = clock
+        self.random = random.Random(seed)
+        self.heal_spell = getattr(config, 'heal_spell', "exura")
+        self.attack_spell = getattr(config, 'attack_spell', "exori")
+        self.food_hotkey = getattr(config, 'food_hotkey', "f12")
+        self.heal_at_hp = getattr(config, 'heal_at_hp', 70)
+        names = creatures or getattr(config, 'target_creatures', None) or ["rat", "rotworm", "cyclops"]
+        self.creature_names = [name for name in names if name in CREATURES] or ["rat"]
+        self.hp_max = hp_max
+        self.mp_max = mp_max
+        self.spawn_rate = spawn_rate
+        self.max_creatures = max_creatures
+        self.step = step
+        self.melee_damage = melee_damage
+        self.heal_amount = heal_amount
+        self.spell_mana = spell_mana
+        self.attack_damage = attack_damage
+        self.mana_regen = mana_regen
+        self._lock = threading.RLock()
+
+        self.hp = float(hp_max)
+        self.mp = float(mp_max)
+        self.player_position = [32000, 32000, 7]
+        self.creatures: List[SimCreature] = []
+        self.target: Optional[SimCreature] = None
+        self.loot_lines: List[str] = []
+        self.fed_until = 0.0
+        self.mouse = (0, 0)
+        self._typed: List[str] = []
+        self._time: Optional[float] = None
+        self._low_since: Optional[float] = None
+        self._renders: Dict[str, Tuple[object, np.ndarray]] = {}
+
+        self.kills = 0
+        self.items_dropped = 0
+        self.exp = 0
+        self.deaths = 0
+        self.heals = 0
+        self.spells_failed = 0
+        self.attacks = 0
+        self.meals = 0
+        self.steps_walked = 0
+        self.heal_latencies: List[float] = []
+
+    # World
+
+    @property
+    def now(self) -> float:
+        return self._time if self._time is not None else self.clock()
+
+    def update(self):
+        """Advance the world to the clock in fixed steps"""
+        now = self.clock()
+        with self._lock:
+            if self._time is None:
+                self._time = now
+            while self._time + self.step <= now:
+                self._time += self.step
+                self._advance(self.step)
+
+    def _advance(self, dt: float):
+        if len(self.creatures) < self.max_creatures and self.random.random() < self.spawn_rate * dt:
+            self.creatures.append(SimCreature(self.random.choice(self.creature_names), self.random.uniform(3, 8)))
+
+        for creature in self.creatures:
+            if creature.distance > 1:
+                creature.distance = max(1.0, creature.distance - dt)
+        self.hp -= sum(creature.damage for creature in self.creatures if creature.distance <= 1) * dt
+
+        target = self.target
+        if target is not None and target.distance <= 1:
+            target.hp -= self.melee_damage * dt
+        self._remove_dead()
+
+        self.mp = min(self.mp_max, self.mp + self.mana_regen * dt)
+        if self.fed_until > self._time:
+            self.hp = min(self.hp_max, self.hp + 3 * dt)
+
+        if self.hp <= 0:
+            # Died: back at the temple with full HP
+            self.deaths += 1
+            self.hp, self.mp = float(self.hp_max), float(self.mp_max)
+            self.creatures.clear()
+            self.target = None
+            self._low_since = None
+        self._track_low_hp()
+
+    def _remove_dead(self):
+        for creature in [creature for creature in self.creatures if creature.hp <= 0]:
+            self.creatures.remove(creature)
+            if creature is self.target:
+                self.target = None
+            self.kills += 1
+            self.exp += creature.exp
+            items = []
+            for item in self.random.sample(creature.loot, self.random.randint(0, len(creature.loot))):
+                count = self.random.randint(1, 30) if "coin" in item else 1
+                self.items_dropped += count
+                items.append(f"{count} {item}s" if count > 1 else f"a {item}")
+            self.loot_lines = (self.loot_lines + [f"Loot of a {creature.name}: {', '.join(items) or 'nothing'}"])[-5:]
+
+    def _track_low_hp(self):
+        percent = self.hp / self.hp_max * 100
+        if percent <= self.heal_at_hp:
+            if self._low_since is None:
+                self._low_since = self._time
+        elif self._low_since is not None:
+            # Recovered without a heal (regeneration)
+            self._low_since = None
+
+    def battle_list(self) -> List[SimCreature]:
+        return sorted(self.creatures, key=lambda creature: creature.distance)
+
+    # Input device (the pyautogui methods the bot uses)
+
+    def press(self, key: str):
+        self.update()
+        with self._lock:
+            if key == 'enter':
+                self._cast("".join(self._typed))
+                self._typed.clear()
+            elif key == self.food_hotkey:
+                self.fed_until = max(self.fed_until, self.now) + 60
+                self.meals += 1
+            elif key in MOVES:
+                dx, dy = MOVES[key]
+                self.player_position[0] += dx
+                self.player_position[1] += dy
+                self.steps_walked += 1
+            elif len(key) == 1:
+                self._typed.append(key)
+
+    def hotkey(self, *keys):
+        self.press(keys[-1])
+
+    def _cast(self, words: str):
+        if words not in (self.heal_spell, self.attack_spell):
+            return
+        if self.mp < self.spell_mana:
+            self.spells_failed += 1
+            return
+        self.mp -= self.spell_mana
+        if words == self.heal_spell:
+            self.hp = min(self.hp_max, self.hp + self.heal_amount * self.hp_max)
+            self.heals += 1
+            if self._low_since is not None:
+                self.heal_latencies.append(self.now - self._low_since)
+                self._low_since = None
+        elif self.target is not None and self.target.distance <= 3:
+            self.target.hp -= self.attack_damage
+            self._remove_dead()
+
+    def moveTo(self, x, y):
+        self.mouse = (int(x), int(y))
+
+    def position(self) -> Tuple[int, int]:
+        return self.mouse
+
+    def click(self):
+        """Clicking a battle list entry targets that creature"""
+        self.update()
+        left, top, width, height = DEFAULT_REGIONS['battle_list']
+        x, y = self.mouse
+        if not (left <= x < left + width and top <= y < top + height):
+            return
+        row = (y - top - LABEL_TOP) // BATTLE_LIST_ROW
+        with self._lock:
+            creatures = self.battle_list()
+            if 0 <= row < len(creatures):
+                self.target = creatures[row]
+                self.attacks += 1
+
+    def rightClick(self):
+        pass
+
+    def mouseDown(self):
+        pass
+
+    def mouseUp(self):
+        pass
+
+    # Screen and OCR
+
+    def hp_mp_text(self) -> Tuple[str, str]:
+        return f"{max(int(self.hp), 0)}/{self.hp_max}", f"{int(self.mp)}/{self.mp_max}"
+
+    def _render(self, name: str, size: Tuple[int, int]) -> Optional[np.ndarray]:
+        if name == 'hp_mp':
+            hp_text, mp_text = self.hp_mp_text()
+            key = (hp_text, mp_text)
+            draw = lambda: render_hp_mp(size, self.hp / self.hp_max * 100, self.mp / self.mp_max * 100,
+                                        hp_text, mp_text)
+        elif name == 'battle_list':
+            key = tuple(creature.name for creature in self.battle_list())
+            draw = lambda: render_battle_list(size, list(key))
+        elif name == 'loot':
+            key = tuple(self.loot_lines)
+            draw = lambda: render_loot(size, self.loot_lines)
+        else:
+            return None
+        cached = self._renders.get(name)
+        if cached is None or cached[0] != key:
+            cached = self._renders[name] = (key, draw())
+        return cached[1]
+
+    def screenshot(self, region: Optional[Region] = None) -> np.ndarray:
+        self.update()
+        with self._lock:
+            if region is None:
+                width, height = SCREEN_SIZE
+                screen = np.zeros((height, width, 3), dtype=np.uint8)
+                for name, (left, top, w, h) in DEFAULT_REGIONS.items():
+                    panel = self._render(name, (w, h))
+                    if panel is not None:
+                        screen[top:top + h, left:left + w] = panel
+                return screen
+            left, top, width, height = region
+            for name, known in DEFAULT_REGIONS.items():
+                if tuple(known) == tuple(region):
+                    panel = self._render(name, (width, height))
+                    if panel is not None:
+                        return panel
+            return np.zeros((height, width, 3), dtype=np.uint8)
+
+    __call__ = screenshot
+
+    def ocr(self, image, config: str = '') -> str:
+        with self._lock:
+            if '--psm 6' in config:
+                return "\n".join(self.loot_lines)
+            return ocr_hp_mp(image, *self.hp_mp_text())
+
+    def get_stats(self) -> Dict[str, object]:
+        latencies = np.array(self.heal_latencies) * 1000
+        return {
+            "time": round(self.now, 3),
+            "hp": round(self.hp, 1),
+            "mp": round(self.mp, 1),
+            "creatures": [creature.name for creature in self.battle_list()],
+            "kills": self.kills,
+            "items_dropped": self.items_dropped,
+            "exp": self.exp,
+            "deaths": self.deaths,
+            "heals": self.heals,
+            "spells_failed": self.spells_failed,
+            "attacks": self.attacks,
+            "meals": self.meals,
+            "steps_walked": self.steps_walked,
+            "heal_latency_ms": {
+                "count": int(latencies.size),
+                "p50": round(float(np.percentile(latencies, 50)), 1),
+                "p95": round(float(np.percentile(latencies, 95)), 1),
+                "max": round(float(latencies.max()), 1),
+            } if latencies.size else None,
+        }
+
+
+async def run_simulation(bot, game: SimulatedGame, seconds: float, seed: int = 0) -> int:
+    """Run a bot against a SimulatedGame on its VirtualClock for ``seconds``.
+
+    Everything runs on the event loop thread: queued input actions run
+    inline between ticks (sleeping on the virtual clock), mouse moves
+    overlap the ticks on the virtual clock, and between wakeups the
+    clock jumps straight to the next one. With the bot's random numbers
+    seeded, a run is deterministic for a given seed. Returns the number
+    of ticks run.
+    """
+    clock = game.clock
+    bot.random.seed(seed)
+    bot.sleep = clock.sleep
+    bot.input_executor.inline = True
+    bot.capture_threaded = False
+    bot.mouse.clock, bot.mouse.sleep, bot.mouse.threaded = clock, clock.async_sleep, False
+    scheduler = bot.scheduler = bot.build_scheduler(clock=clock)
+    bot.is_running = True
+    end = clock() + seconds
+    ticks = 0
+    try:
+        while bot.is_running and clock() < end:
+            game.update()
+            # Mouse moves that are due, then the actions queued so far
+            clock.wake()
+            await asyncio.sleep(0)
+            bot.input_executor.run_pending()
+            await asyncio.sleep(0)
+            due = scheduler.due()
+            if not due:
+                wakeups = [moment for moment in (scheduler.next_wakeup(), clock.next_timer()) if moment is not None]
+                clock.advance_to(min(wakeups) if wakeups else clock() + game.step)
+                continue
+            bot.metrics.tick()
+            await bot.run_tick(scheduler, due)
+            ticks += 1
+    finally:
+        bot.is_running = False
+        bot.mouse.cancel()
+    return ticks
+
+
+def simulate(seconds: float, seed: int = 0, config: Optional[Dict] = None) -> Dict[str, object]:
+    """Simulated session summary: decision throughput and game outcome"""
+    import server
+
+    clock = VirtualClock()
+    bot_config = server.BotConfig(**dict({"name": "simulation", "anti_idle": False}, **(config or {})))
+    game = SimulatedGame(bot_config, clock=clock, seed=seed)
+    session = server.TibiaBot("simulation", screen_source=game, input_device=game, ocr_engine=game.ocr)
+    session.apply_config(bot_config)
+    started = time.perf_counter()
+    try:
+        ticks = asyncio.run(run_simulation(session, game, seconds, seed=seed))
+    finally:
+        session.close()
+    elapsed = time.perf_counter() - started
+    # Less than asked for when the bot stopped itself (emergency logout)
+    simulated = clock()
+    return {
+        "simulated_s": round(simulated, 3),
+        "wall_s": round(elapsed, 3),
+        "speedup": round(simulated / elapsed, 1) if elapsed else None,
+        "ticks": ticks,
+        "ticks_per_second": round(ticks / elapsed, 1) if elapsed else None,
+        "game": game.get_stats(),
+        "bot": session.stats_payload(),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a bot session against the simulated game")
+    parser.add_argument("--seconds", type=float, default=600, help="simulated time to run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--config", help="bot config JSON overrides")
+    args = parser.parse_args()
+    # Per-action log lines would dominate the run time
+    logging.disable(logging.INFO)
+    overrides = json.load(open(args.config)) if args.config else None
+    print(json.dumps(simulate(args.seconds, args.seed, overrides), indent=2))
@@ -0,0 +1,196 @@
+import logging
+import re
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+HP_MP_TEXT = re.compile(r"(\d+)\s*/\s*(\d+)")
+
+
+class BarCalibration:
+    """Location and fill color of one status bar inside the 'hp_mp' region.
+
+    ``fill_min``/``fill_max`` are inclusive BGR bounds for filled pixels.
+    """
+
+    def __init__(self, rows: Tuple[int, int], cols: Tuple[int, int],
+                 fill_min: Tuple[int, int, int], fill_max: Tuple[int, int, int]):
+        self.rows = rows
+        self.cols = cols
+        self.fill_min = np.array(fill_min, dtype=np.uint8)
+        self.fill_max = np.array(fill_max, dtype=np.uint8)
+
+    @property
+    def width(self) -> int:
+        return self.cols[1] - self.cols[0]
+
+    def band(self, crop: np.ndarray) -> np.ndarray:
+        return crop[self.rows[0]:self.rows[1], self.cols[0]:self.cols[1]]
+
+    def to_dict(self) -> Dict[str, list]:
+        return {
+            "rows": list(self.rows),
+            "cols": list(self.cols),
+            "fill_min": self.fill_min.tolist(),
+            "fill_max": self.fill_max.tolist(),
+        }
+
+
+# Default layout of the 160x30 'hp_mp' region: HP bar on top, MP bar below
+DEFAULT_HP_BAR = BarCalibration(rows=(4, 9), cols=(12, 148), fill_min=(0, 0, 150), fill_max=(90, 90, 255))
+DEFAULT_MP_BAR = BarCalibration(rows=(19, 24), cols=(12, 148), fill_min=(150, 0, 0), fill_max=(255, 120, 90))
+
+
+class HpMpBarReader:
+    """Reads HP/MP percentages from the filled length of the status bars.
+
+    Each bar band is masked by its fill color with NumPy; a column counts
+    as filled when most of its rows match and the rightmost filled column
+    gives the bar length. OCR on the "cur/max" text is kept as a fallback
+    and as a lower-cadence cross-check via ``ocr_every`` ticks. After
+    ``recalibrate`` the first cross-check that reads both bars full fits
+    their column ranges to that crop.
+    """
+
+    def __init__(self, ocr: Optional[Callable] = None, hp_bar: BarCalibration = DEFAULT_HP_BAR,
+                 mp_bar: BarCalibration = DEFAULT_MP_BAR, ocr_every: int = 50,
+                 tolerance: float = 5.0):
+        self.ocr = ocr
+        self.hp_bar = hp_bar
+        self.mp_bar = mp_bar
+        self.ocr_every = ocr_every
+        self.tolerance = tolerance
+        self._ticks = 0
+        self.hp_max = 100
+        self.mp_max = 100
+        self.calibrated = False
+
+        self.bar_reads = 0
+        self.ocr_reads = 0
+        self.ocr_fallbacks = 0
+        self.mismatches = 0
+        self.unreadable = 0
+        self.calibrations = 0
+
+    @staticmethod
+    def bar_percent(crop: np.ndarray, bar: BarCalibration) -> float:
+        """Percentage of the bar filled with its fill color"""
+        band = bar.band(crop)
+        if band.size == 0:
+            return 0.0
+        mask = np.all((band >= bar.fill_min) & (band <= bar.fill_max), axis=-1)
+        filled_columns = np.flatnonzero(mask.mean(axis=0) >= 0.5)
+        if filled_columns.size == 0:
+            return 0.0
+        return float(filled_columns[-1] + 1) / band.shape[1] * 100
+
+    @staticmethod
+    def calibrate(crop: np.ndarray, bar: BarCalibration) -> BarCalibration:
+        """Fit a bar's column range to a crop taken with the bar full"""
+        band = crop[bar.rows[0]:bar.rows[1]]
+        mask = np.all((band >= bar.fill_min) & (band <= bar.fill_max), axis=-1)
+        filled_columns = np.flatnonzero(mask.mean(axis=0) >= 0.5)
+        if filled_columns.size == 0:
+            raise ValueError("No filled bar pixels found to calibrate against")
+        return BarCalibration(bar.rows, (int(filled_columns[0]), int(filled_columns[-1]) + 1),
+                              tuple(bar.fill_min.tolist()), tuple(bar.fill_max.tolist()))
+
+    def recalibrate(self):
+        """Fit the bars again on the next cross-check that reads them full"""
+        self.calibrated = False
+
+    def _calibrate_full(self, crop: np.ndarray):
+        try:
+            hp_bar, mp_bar = self.calibrate(crop, self.hp_bar), self.calibrate(crop, self.mp_bar)
+        except ValueError as e:
+            logger.warning(f"Could not calibrate HP/MP bars: {e}")
+            return
+        self.hp_bar, self.mp_bar = hp_bar, mp_bar
+        self.calibrated = True
+        self.calibrations += 1
+        logger.info(f"Calibrated HP/MP bars to columns {hp_bar.cols} and {mp_bar.cols}")
+
+    def read_ocr(self, crop: np.ndarray) -> Optional[Dict[str, float]]:
+        """Read "cur/max" HP and MP text with OCR"""
+        if self.ocr is None:
+            return None
+        half = crop.shape[0] // 2
+        values = []
+        for text_crop in (crop[:half], crop[half:]):
+            match = HP_MP_TEXT.search(self.ocr(text_crop) or "")
+            if not match:
+                return None
+            values.append((int(match.group(1)), int(match.group(2))))
+        self.ocr_reads += 1
+        (hp_current, hp_max), (mp_current, mp_max) = values
+        return self._status(hp_current, hp_max, mp_current, mp_max)
+
+    @staticmethod
+    def _status(hp_current, hp_max, mp_current, mp_max) -> Dict[str, float]:
+        return {
+            'hp_current': hp_current,
+            'hp_max': hp_max,
+            'hp_percent': (hp_current / hp_max) * 100 if hp_max > 0 else 100,
+            'mp_current': mp_current,
+            'mp_max': mp_max,
+            'mp_percent': (mp_current / mp_max) * 100 if mp_max > 0 else 100
+        }
+
+    def read(self, crop: np.ndarray) -> Optional[Dict[str, float]]:
+        """Read HP/MP from the bars, cross-checking with OCR every few ticks.
+
+        None when neither the bars nor the text can be read.
+        """
+        self._ticks += 1
+        hp_percent = self.bar_percent(crop, self.hp_bar)
+        mp_percent = self.bar_percent(crop, self.mp_bar)
+
+        # Both bars empty means they are not visible (minimized, covered)
+        if hp_percent == 0 and mp_percent == 0:
+            status = self.read_ocr(crop)
+            if status is not None:
+                self.ocr_fallbacks += 1
+                self.hp_max, self.mp_max = status['hp_max'], status['mp_max']
+                return status
+            # Not 0% HP: nothing on screen says anything about it
+            self.unreadable += 1
+            return None
+
+        self.bar_reads += 1
+        if self.ocr_every and self._ticks % self.ocr_every == 0:
+            checked = self.read_ocr(crop)
+            if checked is not None:
+                self.hp_max, self.mp_max = checked['hp_max'], checked['mp_max']
+                if (not self.calibrated and checked['hp_current'] == checked['hp_max']
+                        and checked['mp_current'] == checked['mp_max']):
+                    # Both bars full: their ends are the bar ends
+                    self._calibrate_full(crop)
+                if (abs(checked['hp_percent'] - hp_percent) > self.tolerance
+                        or abs(checked['mp_percent'] - mp_percent) > self.tolerance):
+                    self.mismatches += 1
+                    logger.warning(
+                        f"HP/MP bar reading ({hp_percent:.0f}%/{mp_percent:.0f}%) disagrees with OCR "
+                        f"({checked['hp_percent']:.0f}%/{checked['mp_percent']:.0f}%)"
+                    )
+
+        status = self._status(
+            round(hp_percent * self.hp_max / 100), self.hp_max,
+            round(mp_percent * self.mp_max / 100), self.mp_max
+        )
+        status['hp_percent'] = hp_percent
+        status['mp_percent'] = mp_percent
+        return status
+
+    def get_stats(self) -> Dict[str, object]:
+        return {
+            "bar_reads": self.bar_reads,
+            "ocr_reads": self.ocr_reads,
+            "ocr_fallbacks": self.ocr_fallbacks,
+            "mismatches": self.mismatches,
+            "unreadable": self.unreadable,
+            "calibrations": self.calibrations,
+            "hp_bar": self.hp_bar.to_dict(),
+            "mp_bar": self.mp_bar.to_dict(),
+        }
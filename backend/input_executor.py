@@ -0,0 +1,178 @@
+import asyncio
+import itertools
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Action priorities (lower runs first)
+PRIORITY_EMERGENCY = 0
+PRIORITY_HEAL = 10
+PRIORITY_ATTACK = 20
+PRIORITY_LOOT = 30
+PRIORITY_MOVE = 40
+PRIORITY_IDLE = 50
+
+_STOP = object()
+
+
+class InputExecutor:
+    """Runs blocking mouse/keyboard actions on a dedicated worker thread.
+
+    Actions are queued by priority and each submission returns an asyncio
+    future, so the event loop keeps serving the API while the action runs.
+    With ``inline`` set no thread is started; queued actions run when
+    ``run_pending`` is called, which replays and simulations use to act
+    in the same order every run.
+    """
+
+    def __init__(self, name: str = "input-executor",
+                 on_complete: Optional[Callable[[str, float, bool], None]] = None,
+                 cpu=None):
+        self.name = name
+        self._on_complete = on_complete
+        self._cpu = cpu
+        self._queue = queue.PriorityQueue()
+        self._counter = itertools.count()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._current_action: Optional[str] = None
+        self._stopping = False
+        self.inline = False
+        self.action_stats: Dict[str, Dict[str, float]] = {}
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start the worker thread if it is not already running"""
+        # A worker still finishing after a timed-out stop counts as running,
+        # so two workers never share the queue
+        if self.is_running:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        logger.info("Input executor started")
+
+    def stop(self, timeout: float = 2.0) -> bool:
+        """Stop the worker thread after the actions already queued; False if it is still busy"""
+        if not self.is_running:
+            return True
+        if not self._stopping:
+            self._stopping = True
+            self._queue.put((float("inf"), next(self._counter), _STOP, None, None, None, None))
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning(f"Input executor still busy after {timeout}s, it stops after the current action")
+            return False
+        self._thread = None
+        logger.info("Input executor stopped")
+        return True
+
+    def submit(self, func: Callable, *args, priority: int = PRIORITY_IDLE,
+               name: Optional[str] = None, **kwargs) -> asyncio.Future:
+        """Queue an action and return a future resolved on the event loop"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if not self.is_running and not self.inline:
+            self.start()
+        action_name = name or getattr(func, "__name__", "action")
+        self._queue.put((priority, next(self._counter), func, args, kwargs, action_name, (loop, future)))
+        return future
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def _record(self, action_name: str, elapsed_ms: float, failed: bool):
+        with self._lock:
+            stats = self.action_stats.setdefault(action_name, {
+                "count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0
+            })
+            stats["count"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["last_ms"] = elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            if failed:
+                stats["errors"] += 1
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, result: Any, error: Optional[BaseException]):
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def run_pending(self) -> int:
+        """Run the queued actions on the calling thread; returns how many ran"""
+        ran = 0
+        while True:
+            try:
+                entry = self._queue.get_nowait()
+            except queue.Empty:
+                return ran
+            if entry[2] is not _STOP:
+                self._execute(entry)
+                ran += 1
+
+    def _run(self):
+        while True:
+            entry = self._queue.get()
+            if entry[2] is _STOP:
+                break
+            self._execute(entry)
+
+    def _execute(self, entry):
+        _, _, func, args, kwargs, action_name, target = entry
+        loop, future = target
+        if future.cancelled():
+            return
+
+        self._current_action = action_name
+        result, error = None, None
+        start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            logger.error(f"Error executing input action {action_name}: {e}")
+            error = e
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if self._cpu is not None:
+            self._cpu.add(time.thread_time() - cpu_start)
+        self._current_action = None
+        self._record(action_name, elapsed_ms, error is not None)
+        if self._on_complete is not None:
+            self._on_complete(action_name, elapsed_ms, error is not None)
+
+        try:
+            loop.call_soon_threadsafe(self._resolve, future, result, error)
+        except RuntimeError:
+            # Event loop already closed
+            pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth and per-action wall time in milliseconds"""
+        with self._lock:
+            actions = {
+                action_name: {
+                    "count": int(stats["count"]),
+                    "errors": int(stats["errors"]),
+                    "avg_ms": round(stats["total_ms"] / stats["count"], 3) if stats["count"] else 0.0,
+                    "max_ms": round(stats["max_ms"], 3),
+                    "last_ms": round(stats["last_ms"], 3),
+                }
+                for action_name, stats in self.action_stats.items()
+            }
+        return {
+            "running": self.is_running,
+            "queue_depth": self.queue_depth(),
+            "current_action": self._current_action,
+            "actions": actions,
+        }
@@ -0,0 +1,197 @@
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+LOOT = "loot"
+DISCARD = "discard"
+
+_END = "\0"
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+# "Loot of a rat: 3 gold coins, a cheese."
+_LOOT_MESSAGE = re.compile(r"^.*?loot of [^:]*:", re.IGNORECASE)
+_QUANTITY = re.compile(r"^(an?|\d+)\s+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase words separated by single spaces"""
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+
+def loot_counts(lines: Iterable[str]) -> List[Tuple[str, int]]:
+    """(item name, count) of OCR'd loot messages; "3 gold coins" counts 3"""
+    entries = []
+    for line in lines:
+        line = _LOOT_MESSAGE.sub("", line)
+        for entry in line.split(","):
+            entry = normalize(entry)
+            count = 1
+            quantity = _QUANTITY.match(entry)
+            if quantity is not None:
+                if quantity.group(1).isdigit():
+                    count = int(quantity.group(1))
+                entry = entry[quantity.end():]
+            if entry and entry != "nothing":
+                entries.append((entry, count))
+    return entries
+
+
+def loot_entries(text: str) -> List[str]:
+    """Item names of OCR'd loot messages, without counts or articles"""
+    return [entry for entry, _ in loot_counts(text.splitlines())]
+
+
+class LootLog:
+    """Lines of the scrolling loot panel not seen on the previous read.
+
+    The panel keeps the last few server messages and scrolls up as new
+    ones arrive, so a read repeats the lines of the one before. The new
+    lines are the ones after the longest tail of the previous read that
+    this read starts with; identical messages are still told apart by
+    where they sit.
+    """
+
+    def __init__(self):
+        self._lines: List[str] = []
+        self.reads = 0
+        self.new = 0
+        self.repeated = 0
+
+    def reset(self):
+        self._lines = []
+
+    def new_lines(self, text: str) -> List[str]:
+        lines = [line for line in text.splitlines() if normalize(line)]
+        keys = [normalize(line) for line in lines]
+        previous = self._lines
+        overlap = 0
+        for size in range(min(len(previous), len(keys)), 0, -1):
+            if previous[-size:] == keys[:size]:
+                overlap = size
+                break
+        self._lines = keys
+        self.reads += 1
+        self.new += len(lines) - overlap
+        self.repeated += overlap
+        return lines[overlap:]
+
+    def get_stats(self) -> Dict[str, object]:
+        return {"reads": self.reads, "new_lines": self.new, "repeated_lines": self.repeated}
+
+
+class LootMatcher:
+    """Loot and discard lists compiled into one trie.
+
+    ``match`` walks the trie once, carrying a Levenshtein row per node,
+    so exact names and names within ``max_edits`` OCR errors are found
+    in the same pass without scanning the lists. Short names allow fewer
+    edits (one per ``chars_per_edit`` characters) so "ham" does not
+    match "jam". Resolved strings are memoized, since the same loot
+    messages are read over and over.
+    """
+
+    def __init__(self, loot_items: Iterable[str] = (), discard_items: Iterable[str] = (),
+                 max_edits: int = 2, chars_per_edit: int = 4, cache_size: int = 1024):
+        self.max_edits = max_edits
+        self.chars_per_edit = chars_per_edit
+        self.cache_size = cache_size
+        self._root: Dict[str, object] = {}
+        self._memo: "OrderedDict[str, Optional[Tuple[str, str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+
+        # Loot is added last so it wins when an item is on both lists
+        for name in discard_items:
+            self._add(name, DISCARD)
+        for name in loot_items:
+            self._add(name, LOOT)
+
+        self.hits = 0
+        self.misses = 0
+        self.exact = 0
+        self.fuzzy = 0
+        self.unmatched = 0
+
+    def _add(self, name: str, action: str):
+        key = normalize(name)
+        if not key:
+            return
+        node = self._root
+        for char in key:
+            node = node.setdefault(char, {})
+        if _END not in node:
+            self.size += 1
+        node[_END] = (name, action)
+
+    def match(self, text: str) -> Optional[Tuple[str, str]]:
+        """(configured item name, LOOT or DISCARD) for an OCR'd name, or None"""
+        with self._lock:
+            if text in self._memo:
+                self._memo.move_to_end(text)
+                self.hits += 1
+                return self._memo[text]
+            self.misses += 1
+
+        key = normalize(text)
+        result = self._exact(key)
+        if result is not None:
+            self.exact += 1
+        else:
+            result = self._fuzzy(key, min(self.max_edits, len(key) // self.chars_per_edit))
+            if result is not None:
+                self.fuzzy += 1
+            else:
+                self.unmatched += 1
+
+        with self._lock:
+            self._memo[text] = result
+            while len(self._memo) > self.cache_size:
+                self._memo.popitem(last=False)
+        return result
+
+    def _exact(self, key: str) -> Optional[Tuple[str, str]]:
+        node = self._root
+        for char in key:
+            node = node.get(char)
+            if node is None:
+                return None
+        return node.get(_END)
+
+    def _fuzzy(self, key: str, limit: int) -> Optional[Tuple[str, str]]:
+        if not limit or not key:
+            return None
+        best, best_distance = None, limit + 1
+        first_row = list(range(len(key) + 1))
+        # Depth-first over the trie; each entry carries the DP row of its prefix
+        stack = [(self._root, first_row)]
+        while stack:
+            node, row = stack.pop()
+            for char, child in node.items():
+                if char == _END:
+                    continue
+                current = [row[0] + 1]
+                for column in range(1, len(row)):
+                    cost = 0 if key[column - 1] == char else 1
+                    current.append(min(current[column - 1] + 1, row[column] + 1, row[column - 1] + cost))
+                if current[-1] < best_distance and _END in child:
+                    best, best_distance = child[_END], current[-1]
+                # Nothing below can get back under the best distance
+                if min(current) < best_distance:
+                    stack.append((child, current))
+        return best
+
+    def get_stats(self) -> Dict[str, object]:
+        total = self.hits + self.misses
+        return {
+            "items": self.size,
+            "cached": len(self._memo),
+            "hits": self.hits,
+            "misses": self.misses,
+            "exact": self.exact,
+            "fuzzy": self.fuzzy,
+            "unmatched": self.unmatched,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
@@ -0,0 +1,205 @@
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Bucket boundaries exported to Prometheus, in seconds
+PROMETHEUS_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class LatencyHistogram:
+    """HDR-style log-linear latency histogram.
+
+    Values are recorded in microseconds into ``sub_buckets`` linear
+    buckets per power of two, so recording is O(1) and every percentile
+    is accurate to within 1/sub_buckets of its value.
+    """
+
+    def __init__(self, sub_buckets: int = 16, max_seconds: float = 60.0):
+        self.sub_buckets = sub_buckets
+        self.max_exponent = int(math.log2(max_seconds * 1_000_000)) + 1
+        self.counts = [0] * ((self.max_exponent + 1) * sub_buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def _index(self, micros: float) -> int:
+        if micros < 1:
+            return 0
+        exponent = min(int(math.log2(micros)), self.max_exponent)
+        base = 2 ** exponent
+        sub = min(int((micros - base) / base * self.sub_buckets), self.sub_buckets - 1)
+        return exponent * self.sub_buckets + sub
+
+    def _upper_bound(self, index: int) -> float:
+        """Upper edge of a bucket, in seconds"""
+        exponent, sub = divmod(index, self.sub_buckets)
+        base = 2 ** exponent
+        return (base + base * (sub + 1) / self.sub_buckets) / 1_000_000
+
+    def record(self, seconds: float):
+        self.counts[self._index(seconds * 1_000_000)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, percent: float) -> float:
+        if not self.count:
+            return 0.0
+        target = max(1, math.ceil(self.count * percent / 100))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target:
+                return min(self._upper_bound(index), self.max)
+        return self.max
+
+    def cumulative(self, bounds: Iterable[float]) -> List[Tuple[float, int]]:
+        """Observations at or below each bound (bucket upper edges)"""
+        result = []
+        index, seen = 0, 0
+        for bound in bounds:
+            while index < len(self.counts) and self._upper_bound(index) <= bound:
+                seen += self.counts[index]
+                index += 1
+            result.append((bound, seen))
+        return result
+
+
+class MetricsRegistry:
+    """Per-stage latency histograms and loop tick rate for the bot"""
+
+    def __init__(self, prefix: str = "tibiabot", rate_window: int = 200):
+        self.prefix = prefix
+        self._histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], LatencyHistogram] = {}
+        self._lock = threading.Lock()
+        self._ticks: deque = deque(maxlen=rate_window)
+        self.ticks_total = 0
+
+    def observe(self, stage: str, seconds: float, **labels):
+        key = (stage, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram()
+            histogram.record(seconds)
+
+    @contextmanager
+    def time(self, stage: str, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, **labels)
+
+    def tick(self):
+        with self._lock:
+            self._ticks.append(time.monotonic())
+            self.ticks_total += 1
+
+    def tick_rate(self) -> float:
+        """Loop ticks per second over the recent window"""
+        with self._lock:
+            if len(self._ticks) < 2:
+                return 0.0
+            elapsed = self._ticks[-1] - self._ticks[0]
+            return (len(self._ticks) - 1) / elapsed if elapsed > 0 else 0.0
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """p50/p99/max per stage in milliseconds"""
+        with self._lock:
+            items = list(self._histograms.items())
+        result = {}
+        for (stage, labels), histogram in items:
+            name = stage + "".join(f"[{value}]" for _, value in labels)
+            result[name] = {
+                "count": histogram.count,
+                "p50_ms": round(histogram.percentile(50) * 1000, 3),
+                "p99_ms": round(histogram.percentile(99) * 1000, 3),
+                "max_ms": round(histogram.max * 1000, 3),
+            }
+        return result
+
+    @staticmethod
+    def _labels(labels: Iterable[Tuple[str, str]], extra: Optional[Dict[str, str]] = None) -> str:
+        pairs = list(labels) + list((extra or {}).items())
+        if not pairs:
+            return ""
+        rendered = []
+        for key, value in pairs:
+            value = str(value).replace("\\", "\\\\").replace('"', '\\"')
+            rendered.append(f'{key}="{value}"')
+        return "{" + ",".join(rendered) + "}"
+
+    def render_prometheus(self) -> str:
+        """All metrics in Prometheus text exposition format"""
+        with self._lock:
+            items = sorted(self._histograms.items())
+        name = f"{self.prefix}_stage_latency_seconds"
+        lines = [
+            f"# HELP {name} Latency of each bot loop stage.",
+            f"# TYPE {name} histogram",
+        ]
+        for (stage, labels), histogram in items:
+            series = (("stage", stage),) + labels
+            for bound, seen in histogram.cumulative(PROMETHEUS_BUCKETS):
+                lines.append(f"{name}_bucket{self._labels(series, {'le': repr(bound)})} {seen}")
+            lines.append(f"{name}_bucket{self._labels(series, {'le': '+Inf'})} {histogram.count}")
+            lines.append(f"{name}_sum{self._labels(series)} {histogram.sum}")
+            lines.append(f"{name}_count{self._labels(series)} {histogram.count}")
+
+        lines += [
+            f"# HELP {self.prefix}_loop_ticks_total Bot loop iterations.",
+            f"# TYPE {self.prefix}_loop_ticks_total counter",
+            f"{self.prefix}_loop_ticks_total {self.ticks_total}",
+            f"# HELP {self.prefix}_loop_tick_rate Bot loop iterations per second.",
+            f"# TYPE {self.prefix}_loop_tick_rate gauge",
+            f"{self.prefix}_loop_tick_rate {self.tick_rate()}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+class CpuAccount:
+    """CPU time spent on behalf of one bot session.
+
+    Sections are measured with ``time.thread_time`` so each thread only
+    charges its own work, even when many sessions share the event loop.
+    """
+
+    def __init__(self, window: int = 200):
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+        self._samples: deque = deque(maxlen=window)
+        self._samples.append((time.monotonic(), 0.0))
+
+    @contextmanager
+    def measure(self):
+        start = time.thread_time()
+        try:
+            yield
+        finally:
+            self.add(time.thread_time() - start)
+
+    def add(self, seconds: float):
+        with self._lock:
+            self.seconds += seconds
+            self._samples.append((time.monotonic(), self.seconds))
+
+    def percent(self) -> float:
+        """Share of one core used over the recent window"""
+        with self._lock:
+            (start, first), now = self._samples[0], time.monotonic()
+            used = self.seconds - first
+        elapsed = now - start
+        return used / elapsed * 100 if elapsed > 0 else 0.0
+
+    def get_stats(self) -> Dict[str, float]:
+        return {
+            "cpu_seconds": round(self.seconds, 4),
+            "cpu_percent": round(self.percent(), 2),
+        }
@@ -0,0 +1,334 @@
+import logging
+import os
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from tile_store import TileStore, color_index
+
+logger = logging.getLogger(__name__)
+
+Position = Tuple[int, int, int]
+
+# Screen pixels per minimap tile at the client's default zoom
+DEFAULT_MINIMAP_ZOOM = 2
+
+_ROW_BASE = np.uint64(0x9E3779B97F4A7C15)
+_COLUMN_BASE = np.uint64(0xC2B2AE3D27D4EB4F)
+
+
+def patch_hashes(tiles: np.ndarray, size: int, stride: int = 1) -> np.ndarray:
+    """64-bit polynomial hash of the size x size patches whose top-left tile
+    is on a multiple of ``stride``, indexed by anchor"""
+    height, width = tiles.shape
+    # Only the anchor patches are hashed, not every patch and then strided
+    columns = np.arange(0, width - size + 1, stride)
+    anchors = np.arange(0, height - size + 1, stride)
+    rows = np.zeros((height, len(columns)), dtype=np.uint64)
+    factor = np.uint64(1)
+    with np.errstate(over="ignore"):
+        for column in range(size):
+            rows += np.asarray(tiles[:, columns + column], dtype=np.uint64) * factor
+            factor *= _ROW_BASE
+        hashes = np.zeros((len(anchors), len(columns)), dtype=np.uint64)
+        factor = np.uint64(1)
+        for row in range(size):
+            hashes += rows[anchors + row] * factor
+            factor *= _COLUMN_BASE
+    return hashes
+
+
+class PatchIndex:
+    """Hashes of patches anchored every ``stride`` tiles on one floor.
+
+    Stored as sorted arrays, so probing a batch of query hashes is one
+    ``searchsorted``. Patches that repeat more than ``max_repeats`` times
+    (water, grass, unexplored black) say nothing about position and are
+    left out.
+    """
+
+    def __init__(self, colors: Optional[np.ndarray], origin: Tuple[int, int] = (0, 0), size: int = 8,
+                 stride: int = 4, max_repeats: int = 2):
+        self.size = size
+        self.stride = stride
+        self.max_repeats = max_repeats
+        if colors is None:
+            # Filled in by ``load``
+            return
+
+        hashes = patch_hashes(colors, size, stride)
+        ys, xs = np.mgrid[0:hashes.shape[0], 0:hashes.shape[1]]
+        hashes = hashes.ravel()
+        order = np.argsort(hashes, kind="stable")
+        hashes = hashes[order]
+        xs = xs.ravel()[order] * stride + origin[0]
+        ys = ys.ravel()[order] * stride + origin[1]
+
+        _, counts = np.unique(hashes, return_counts=True)
+        keep = np.repeat(counts <= max_repeats, counts)
+        self.hashes = hashes[keep]
+        self.xs = xs[keep].astype(np.int32)
+        self.ys = ys[keep].astype(np.int32)
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    def save(self, path: Path):
+        """Write the index, replacing any previous file atomically"""
+        partial = path.with_name(path.name + ".partial")
+        with open(partial, "wb") as output:
+            np.savez(output, hashes=self.hashes, xs=self.xs, ys=self.ys,
+                     params=np.array([self.size, self.stride, self.max_repeats]))
+        os.replace(partial, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "PatchIndex":
+        with np.load(path) as data:
+            size, stride, max_repeats = (int(value) for value in data["params"])
+            index = cls(None, size=size, stride=stride, max_repeats=max_repeats)
+            index.hashes, index.xs, index.ys = data["hashes"], data["xs"], data["ys"]
+        return index
+
+    def probe(self, queries: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(query index, map x, map y) of every indexed patch matching a query"""
+        left = np.searchsorted(self.hashes, queries, side="left")
+        right = np.searchsorted(self.hashes, queries, side="right")
+        found_query, found_entry = [], []
+        for repeat in range(self.max_repeats):
+            entries = left + repeat
+            hit = entries < right
+            found_query.append(np.nonzero(hit)[0])
+            found_entry.append(entries[hit])
+        query = np.concatenate(found_query)
+        entry = np.concatenate(found_entry)
+        return query, self.xs[entry], self.ys[entry]
+
+
+class FloorIndexes:
+    """Patch indexes of every floor of a tile store.
+
+    Hashing a floor takes long, so it never happens on a lookup: ``build``
+    (run by the tile store tool, and on a background thread by ``start``)
+    loads each floor's index from a file next to the tile store, or builds
+    and saves it there when missing or older than the store. ``get``
+    returns only indexes that are ready.
+    """
+
+    def __init__(self, store: TileStore, size: int = 8, stride: int = 4):
+        self.store = store
+        self.size = size
+        self.stride = stride
+        self._indexes: Dict[int, PatchIndex] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+        self.loaded = 0
+        self.built = 0
+        self.build_ms = 0.0
+
+    def path(self, z: int) -> Path:
+        return self.store.path.with_name(f"{self.store.path.name}.z{z}.p{self.size}s{self.stride}.npz")
+
+    def start(self):
+        """Build the missing indexes on a background thread"""
+        with self._lock:
+            if self._thread is not None or len(self._indexes) == len(self.store.floors):
+                return
+            self._thread = threading.Thread(target=self._build_logged, name="minimap-index", daemon=True)
+            self._thread.start()
+
+    def _build_logged(self):
+        try:
+            self.build()
+        except Exception as e:
+            logger.error(f"Error indexing minimap floors: {e}")
+
+    def build(self):
+        stored_at = self.store.path.stat().st_mtime
+        for z in sorted(self.store.floors):
+            if z in self._indexes:
+                continue
+            path = self.path(z)
+            index = None
+            if path.exists() and path.stat().st_mtime >= stored_at:
+                try:
+                    index = PatchIndex.load(path)
+                    self.loaded += 1
+                except Exception as e:
+                    logger.warning(f"Rebuilding unreadable minimap index {path}: {e}")
+            if index is None:
+                start = time.perf_counter()
+                floor = self.store.floor(z)
+                index = PatchIndex(floor.color, floor.origin, self.size, self.stride)
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                self.built += 1
+                self.build_ms += elapsed_ms
+                logger.info(f"Indexed minimap floor {z}: {len(index)} patches in {elapsed_ms:.0f} ms")
+                try:
+                    index.save(path)
+                except OSError as e:
+                    logger.warning(f"Could not save minimap index {path}: {e}")
+            with self._lock:
+                self._indexes[z] = index
+
+    def get(self, z: int) -> Optional[PatchIndex]:
+        with self._lock:
+            return self._indexes.get(z)
+
+    def get_stats(self) -> Dict[str, object]:
+        with self._lock:
+            ready = sorted(self._indexes)
+        return {
+            "ready": ready,
+            "floors": len(self.store.floors),
+            "loaded": self.loaded,
+            "built": self.built,
+            "build_ms": round(self.build_ms, 1),
+        }
+
+
+@lru_cache(maxsize=32)
+def floor_indexes(store: TileStore, size: int = 8, stride: int = 4) -> FloorIndexes:
+    """Floor indexes of a tile store, shared by the sessions of a process"""
+    return FloorIndexes(store, size, stride)
+
+
+class MinimapLocator:
+    """Finds the character's tile from the on-screen minimap.
+
+    The minimap is centered on the character. With a recent position the
+    crop is compared directly against the map around it (``radius``
+    tiles); otherwise, or when that fails, its patches are looked up in
+    the floor's PatchIndex and vote for the map offset of the crop. The
+    indexes are built in the background; until a floor's is ready only
+    the local search covers it.
+    """
+
+    def __init__(self, store: TileStore, zoom: int = DEFAULT_MINIMAP_ZOOM, patch_size: int = 8,
+                 stride: int = 4, radius: int = 8, min_votes: int = 3, min_match: float = 0.8,
+                 marker_radius: int = 2):
+        self.store = store
+        self.zoom = zoom
+        self.patch_size = patch_size
+        self.stride = stride
+        self.radius = radius
+        self.min_votes = min_votes
+        self.min_match = min_match
+        self.marker_radius = marker_radius
+        self.indexes = floor_indexes(store, patch_size, stride)
+        self.indexes.start()
+
+        self.lookups = 0
+        self.local_hits = 0
+        self.index_hits = 0
+        self.misses = 0
+        self.total_ms = 0.0
+        self.last_ms = 0.0
+
+    def tiles(self, crop: np.ndarray) -> np.ndarray:
+        """Palette index per minimap tile of a BGR screen crop"""
+        offset = self.zoom // 2
+        pixels = crop[offset::self.zoom, offset::self.zoom, :3]
+        return color_index(pixels[..., ::-1])
+
+    def _valid_mask(self, shape: Tuple[int, int]) -> np.ndarray:
+        # The character marker covers the center tiles
+        valid = np.ones(shape, dtype=bool)
+        cy, cx = shape[0] // 2, shape[1] // 2
+        r = self.marker_radius
+        valid[max(cy - r, 0):cy + r + 1, max(cx - r, 0):cx + r + 1] = False
+        return valid
+
+    def locate(self, crop: np.ndarray, hint: Optional[Position] = None) -> Optional[Position]:
+        """(x, y, z) of the character, or None when the minimap is not recognized"""
+        start = time.perf_counter()
+        self.lookups += 1
+        tiles = self.tiles(crop)
+        valid = self._valid_mask(tiles.shape)
+
+        position = None
+        if hint is not None:
+            position = self._search_near(tiles, valid, hint)
+            if position is not None:
+                self.local_hits += 1
+        if position is None:
+            floors = sorted(self.store.floors, key=lambda z: (hint is None or z != hint[2], z))
+            position = self._search_index(tiles, valid, floors)
+            if position is not None:
+                self.index_hits += 1
+        if position is None:
+            self.misses += 1
+
+        self.last_ms = (time.perf_counter() - start) * 1000
+        self.total_ms += self.last_ms
+        return position
+
+    def _match(self, tiles: np.ndarray, valid: np.ndarray, z: int, left: int, top: int, radius: int):
+        """Best (fraction, dx, dy) of the crop placed around (left, top)"""
+        floor = self.store.floor(z)
+        if floor is None:
+            return None
+        height, width = tiles.shape
+        x0, y0 = left - radius - floor.origin[0], top - radius - floor.origin[1]
+        x1, y1 = x0 + width + 2 * radius, y0 + height + 2 * radius
+        if x0 < 0 or y0 < 0 or x1 > floor.width or y1 > floor.height:
+            return None
+        window = np.asarray(floor.color[y0:y1, x0:x1])
+        placements = sliding_window_view(window, tiles.shape)
+        matches = ((placements == tiles) & valid).sum(axis=(2, 3))
+        dy, dx = np.unravel_index(np.argmax(matches), matches.shape)
+        return matches[dy, dx] / max(valid.sum(), 1), dx - radius, dy - radius
+
+    def _search_near(self, tiles: np.ndarray, valid: np.ndarray, hint: Position) -> Optional[Position]:
+        height, width = tiles.shape
+        x, y, z = hint
+        result = self._match(tiles, valid, z, x - width // 2, y - height // 2, self.radius)
+        if result is None or result[0] < self.min_match:
+            return None
+        _, dx, dy = result
+        return x + int(dx), y + int(dy), z
+
+    def _search_index(self, tiles: np.ndarray, valid: np.ndarray, floors: Iterable[int]) -> Optional[Position]:
+        size = self.patch_size
+        height, width = tiles.shape
+        if height < size or width < size:
+            return None
+        hashes = patch_hashes(tiles, size)
+        usable = sliding_window_view(valid, (size, size)).all(axis=(2, 3))
+        py, px = np.nonzero(usable)
+        queries = hashes[py, px]
+
+        for z in floors:
+            index = self.indexes.get(z)
+            if index is None or not len(index):
+                continue
+            query, xs, ys = index.probe(queries)
+            if not len(query):
+                continue
+            # Each hit votes for where the crop's top-left sits on the map
+            offsets = np.stack([xs - px[query], ys - py[query]], axis=1)
+            candidates, votes = np.unique(offsets, axis=0, return_counts=True)
+            best = np.argmax(votes)
+            if votes[best] < self.min_votes:
+                continue
+            left, top = int(candidates[best][0]), int(candidates[best][1])
+            result = self._match(tiles, valid, z, left, top, 0)
+            if result is not None and result[0] >= self.min_match:
+                return left + width // 2, top + height // 2, z
+        return None
+
+    def get_stats(self) -> Dict[str, object]:
+        return {
+            "lookups": self.lookups,
+            "local_hits": self.local_hits,
+            "index_hits": self.index_hits,
+            "misses": self.misses,
+            "avg_ms": round(self.total_ms / self.lookups, 3) if self.lookups else 0.0,
+            "last_ms": round(self.last_ms, 3),
+            "index": self.indexes.get_stats(),
+        }
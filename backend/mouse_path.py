@@ -0,0 +1,210 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+Point = Tuple[int, int]
+
+
+class Trajectory(NamedTuple):
+    """Screen points of a mouse move and when to reach each, in seconds from the start"""
+    points: np.ndarray
+    times: np.ndarray
+
+    @property
+    def duration(self) -> float:
+        return float(self.times[-1]) if len(self.times) else 0.0
+
+
+class CurveCache:
+    """Quadratic Bezier mouse paths from cached unit curves.
+
+    The unit curve for a number of steps holds the three Bernstein
+    weights of every sample, computed once in a NumPy pass. A move is
+    then a single (steps, 3) x (3, 2) product with its start, control
+    and end points, so no per-point Python runs.
+    """
+
+    def __init__(self, rate: int = 60, capacity: int = 128):
+        self.rate = rate
+        self.capacity = capacity
+        self._bases: "OrderedDict[int, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def basis(self, steps: int) -> np.ndarray:
+        """Weights of start, control and end point for ``steps + 1`` samples"""
+        with self._lock:
+            weights = self._bases.get(steps)
+            if weights is not None:
+                self._bases.move_to_end(steps)
+                self.hits += 1
+                return weights
+            self.misses += 1
+
+        t = np.linspace(0.0, 1.0, steps + 1)
+        weights = np.column_stack(((1 - t) ** 2, 2 * (1 - t) * t, t ** 2))
+        weights.flags.writeable = False
+
+        with self._lock:
+            self._bases[steps] = weights
+            while len(self._bases) > self.capacity:
+                self._bases.popitem(last=False)
+        return weights
+
+    def trajectory(self, start: Point, end: Point, duration: float, rng=random) -> Trajectory:
+        """Path from ``start`` to ``end`` over ``duration`` seconds through a random control point"""
+        steps = max(int(duration * self.rate), 1)
+        (x1, y1), (x2, y2) = start, end
+        control = (rng.uniform(min(x1, x2), max(x1, x2)), rng.uniform(min(y1, y2), max(y1, y2)))
+        points = (self.basis(steps) @ np.array([start, control, end], dtype=np.float64)).astype(np.int64)
+        times = np.arange(steps + 1) * (duration / steps)
+
+        # The start is where the mouse already is; repeated pixels need no move
+        keep = np.empty(len(points), dtype=bool)
+        keep[0] = False
+        keep[1:] = np.any(points[1:] != points[:-1], axis=1)
+        keep[-1] = True
+        return Trajectory(points[keep], times[keep])
+
+    def get_stats(self) -> Dict[str, object]:
+        total = self.hits + self.misses
+        return {
+            "curves": len(self._bases),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class MousePlayer:
+    """Plays trajectories from the event loop.
+
+    Each point is moved to when its time comes, waiting with ``sleep``
+    (``asyncio.sleep``) in between, and points whose time has already
+    passed are skipped so a late wake-up catches up instead of slowing
+    the move down. The moves themselves block (pyautogui pauses after
+    every call), so with ``threaded`` they run on a mouse thread of
+    their own. Starting a move or calling ``cancel`` stops the one in
+    progress, which is how a heal preempts a long mouse move.
+
+    Replays set ``wait``: every point is then played in turn and the
+    time before it is handed to ``wait`` instead. Simulations swap in
+    their virtual ``clock`` and ``sleep``.
+    """
+
+    def __init__(self, move: Callable[[int, int], None], clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], Awaitable[None]] = asyncio.sleep, threaded: bool = True):
+        self._move = move
+        self.clock = clock
+        self.sleep = sleep
+        self.threaded = threaded
+        self.wait: Optional[Callable[[float], None]] = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._current: Optional[asyncio.Task] = None
+
+        self.moves = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.points = 0
+        self.skipped = 0
+
+    @property
+    def is_moving(self) -> bool:
+        return self._current is not None and not self._current.done()
+
+    def cancel(self) -> bool:
+        """Stop the move in progress; False when there is none"""
+        if not self.is_moving:
+            return False
+        self._current.cancel()
+        return True
+
+    async def play(self, trajectory: Trajectory) -> bool:
+        """Run a move to the end; False when it was cancelled"""
+        self.cancel()
+        self.moves += 1
+        task = self._current = asyncio.ensure_future(self._run(trajectory))
+        try:
+            # Not awaited directly, so only ``cancel`` reaches the move task
+            await asyncio.wait([task])
+        except asyncio.CancelledError:
+            task.cancel()
+            self.cancelled += 1
+            raise
+        finally:
+            if self._current is task:
+                self._current = None
+        if task.cancelled():
+            self.cancelled += 1
+            return False
+        task.result()
+        self.completed += 1
+        return True
+
+    async def _move_to(self, x: int, y: int):
+        if not self.threaded:
+            self._move(x, y)
+            return
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mouse")
+        await asyncio.get_running_loop().run_in_executor(self._pool, self._move, x, y)
+
+    async def _run(self, trajectory: Trajectory):
+        points, times = trajectory
+        if self.wait is not None:
+            elapsed = 0.0
+            for (x, y), at in zip(points, times):
+                self.wait(at - elapsed)
+                elapsed = at
+                await self._move_to(int(x), int(y))
+                self.points += 1
+                # Lets a heal cancel the move between points
+                await asyncio.sleep(0)
+            return
+
+        started = self.clock()
+        index = 0
+        woken = False
+        while index < len(points):
+            # Latest point that is due; after a sleep at least the one slept
+            # for, even when rounding leaves the clock a hair short of it
+            due = int(np.searchsorted(times, self.clock() - started, side="right")) - 1
+            if woken:
+                due = max(due, index)
+            if due >= index:
+                self.skipped += due - index
+                x, y = points[due]
+                await self._move_to(int(x), int(y))
+                self.points += 1
+                index = due + 1
+            if index < len(points):
+                await self.sleep(max(times[index] - (self.clock() - started), 0))
+                woken = True
+
+    def close(self):
+        """Stop the move in progress and the mouse thread"""
+        self.cancel()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    def get_stats(self) -> Dict[str, object]:
+        return {
+            "moving": self.is_moving,
+            "moves": self.moves,
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "points": self.points,
+            "skipped": self.skipped,
+        }
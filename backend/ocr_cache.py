@@ -0,0 +1,72 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class OCRCache:
+    """Content-addressed LRU cache in front of an OCR function.
+
+    Crops are binarized and hashed, so a crop whose text pixels match one
+    already seen returns the stored string without calling tesseract.
+    """
+
+    def __init__(self, ocr: Callable[..., str], capacity: int = 2048, threshold: int = 128):
+        self._ocr = ocr
+        self.capacity = capacity
+        self.threshold = threshold
+        self._entries: "OrderedDict[bytes, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, image: np.ndarray, config: str = "") -> bytes:
+        """Hash of the binarized crop, its shape and the OCR config"""
+        image = np.asarray(image)
+        gray = image.mean(axis=-1) if image.ndim == 3 else image
+        bits = np.packbits(gray > self.threshold)
+        digest = hashlib.blake2b(bits.tobytes(), digest_size=16)
+        digest.update(repr((gray.shape, config)).encode())
+        return digest.digest()
+
+    def __call__(self, image: np.ndarray, config: str = "") -> str:
+        key = self.key(image, config)
+        with self._lock:
+            text = self._entries.get(key)
+            if text is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return text
+            self.misses += 1
+
+        text = self._ocr(image, config=config)
+
+        with self._lock:
+            self._entries[key] = text
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return text
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, object]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
@@ -0,0 +1,319 @@
+import heapq
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+Tile = Tuple[int, int]
+
+# Step costs: diagonal steps take longer in game
+ORTHOGONAL_COST = 10
+DIAGONAL_COST = 14
+
+
+class WalkabilityGrid:
+    """Walkable tiles of one floor, with runtime overrides.
+
+    ``tiles`` is a (height, width) array, non-zero where walkable, whose
+    top-left tile is at ``origin`` in game coordinates. It may be a
+    read-only memory map shared between sessions: tiles found blocked
+    (or cleared) at runtime are kept as overrides instead of written to
+    it. Every change bumps ``version``.
+    """
+
+    def __init__(self, tiles: np.ndarray, origin: Tile = (0, 0)):
+        self.tiles = tiles
+        self.origin = (int(origin[0]), int(origin[1]))
+        self.version = 0
+        self._overrides: Dict[Tile, bool] = {}
+        self._changes: List[Tuple[int, Tile]] = []
+
+    @classmethod
+    def open(cls, tiles: Iterable[Tile], margin: int = 64) -> "WalkabilityGrid":
+        """Fully walkable grid covering some tiles (when no map is loaded)"""
+        tiles = list(tiles)
+        xs = [x for x, _ in tiles] or [0]
+        ys = [y for _, y in tiles] or [0]
+        left, top = min(xs) - margin, min(ys) - margin
+        width, height = max(xs) - left + margin + 1, max(ys) - top + margin + 1
+        return cls(np.ones((height, width), dtype=np.uint8), (left, top))
+
+    @property
+    def width(self) -> int:
+        return self.tiles.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self.tiles.shape[0]
+
+    def contains(self, x: int, y: int) -> bool:
+        return 0 <= x - self.origin[0] < self.width and 0 <= y - self.origin[1] < self.height
+
+    def is_walkable(self, x: int, y: int) -> bool:
+        override = self._overrides.get((x, y))
+        if override is not None:
+            return override
+        if not self.contains(x, y):
+            return False
+        return bool(self.tiles[y - self.origin[1], x - self.origin[0]])
+
+    def set_walkable(self, x: int, y: int, walkable: bool) -> bool:
+        """Override one tile; returns False when nothing changed"""
+        if self.is_walkable(x, y) == walkable:
+            return False
+        self._overrides[(x, y)] = walkable
+        self.version += 1
+        self._changes.append((self.version, (x, y)))
+        return True
+
+    def changed_since(self, version: int) -> Set[Tile]:
+        return {tile for changed, tile in self._changes if changed > version}
+
+    def window(self, left: int, top: int, right: int, bottom: int,
+               pad: int = 0) -> Tuple[bytearray, int, int, int, int]:
+        """Walkability of a rectangle (inclusive, clipped) as a flat bytearray.
+
+        Searching over a bytearray avoids a numpy call per visited tile.
+        ``pad`` surrounds it with blocked tiles; the returned origin and
+        size include the padding.
+        """
+        ox, oy = self.origin
+        left, top = max(left, ox), max(top, oy)
+        right, bottom = min(right, ox + self.width - 1), min(bottom, oy + self.height - 1)
+        area = np.zeros((bottom - top + 1 + 2 * pad, right - left + 1 + 2 * pad), dtype=np.uint8)
+        area[pad:area.shape[0] - pad, pad:area.shape[1] - pad] = \
+            self.tiles[top - oy:bottom + 1 - oy, left - ox:right + 1 - ox] != 0
+        left, top = left - pad, top - pad
+        height, width = area.shape
+        cells = bytearray(area.tobytes())
+        for (x, y), walkable in self._overrides.items():
+            if left + pad <= x <= right and top + pad <= y <= bottom:
+                cells[(y - top) * width + (x - left)] = 1 if walkable else 0
+        return cells, left, top, width, height
+
+
+class PathFinder:
+    """A* over a WalkabilityGrid with a path cache and local repair.
+
+    The octile heuristic is inflated by ``heuristic_weight``: paths are at
+    most that factor longer than optimal (1.0 gives optimal paths) while
+    the search visits an order of magnitude fewer tiles on cluttered maps.
+
+    Paths are cached per (start, goal) together with the grid version
+    they were planned on. A lookup on a newer version re-checks only the
+    tiles changed since then: an untouched path is reused as is, and a
+    path crossing a newly blocked tile gets a local detour around it
+    before falling back to a full search.
+    """
+
+    def __init__(self, grid: WalkabilityGrid, cache_size: int = 256, margin: int = 16,
+                 max_expansions: int = 500000, diagonal_cost: int = DIAGONAL_COST,
+                 heuristic_weight: float = 1.2):
+        self.grid = grid
+        self.cache_size = cache_size
+        self.margin = margin
+        self.max_expansions = max_expansions
+        self.heuristic_weight = heuristic_weight
+        self._cache: "OrderedDict[Tuple[Tile, Tile], Tuple[int, List[Tile]]]" = OrderedDict()
+        self._neighbours = [
+            (1, 0, ORTHOGONAL_COST), (-1, 0, ORTHOGONAL_COST),
+            (0, 1, ORTHOGONAL_COST), (0, -1, ORTHOGONAL_COST),
+            (1, 1, diagonal_cost), (1, -1, diagonal_cost),
+            (-1, 1, diagonal_cost), (-1, -1, diagonal_cost),
+        ]
+        self._diagonal_extra = diagonal_cost - 2 * ORTHOGONAL_COST
+
+        self.searches = 0
+        self.cache_hits = 0
+        self.revalidated = 0
+        self.repairs = 0
+        self.failures = 0
+        self.total_ms = 0.0
+        self.last_ms = 0.0
+        self.last_expansions = 0
+
+    def find_path(self, start: Tile, goal: Tile) -> Optional[List[Tile]]:
+        """Tiles from start to goal (both included), or None when unreachable"""
+        start, goal = (int(start[0]), int(start[1])), (int(goal[0]), int(goal[1]))
+        key = (start, goal)
+        cached = self._cache.get(key)
+        if cached is not None:
+            version, path = cached
+            if version == self.grid.version:
+                self.cache_hits += 1
+                self._cache.move_to_end(key)
+                return list(path)
+            path = self.revalidate(path, version)
+            if path is not None:
+                self._store(key, path)
+                return list(path)
+
+        path = self._search(start, goal)
+        if path is not None:
+            self._store(key, path)
+        return path
+
+    def revalidate(self, path: List[Tile], version: int) -> Optional[List[Tile]]:
+        """Bring a path planned on an older grid version up to date"""
+        blocked = {tile for tile in self.grid.changed_since(version) if not self.grid.is_walkable(*tile)}
+        if not blocked.intersection(path):
+            self.revalidated += 1
+            return path
+        return self.repair(path)
+
+    def repair(self, path: List[Tile]) -> Optional[List[Tile]]:
+        """Detour around blocked tiles of a path, replanning only locally"""
+        if not path or not self.grid.is_walkable(*path[0]):
+            return None
+        start = time.perf_counter()
+        path = list(path)
+        index = 1
+        while index < len(path):
+            if self.grid.is_walkable(*path[index]):
+                index += 1
+                continue
+            # Rejoin the old path at the first walkable tile past the blockage
+            rejoin = index + 1
+            while rejoin < len(path) and not self.grid.is_walkable(*path[rejoin]):
+                rejoin += 1
+            if rejoin >= len(path):
+                return None
+            detour = self._astar(path[index - 1], path[rejoin], self.margin, budget=20000)
+            if detour is None:
+                # No local way around: plan the rest from scratch
+                rest = self._search(path[index - 1], path[-1])
+                if rest is None:
+                    return None
+                self.repairs += 1
+                return path[:index - 1] + rest
+            path = path[:index - 1] + detour + path[rejoin + 1:]
+            index += len(detour) - 1
+        self.repairs += 1
+        self.last_ms = (time.perf_counter() - start) * 1000
+        return path
+
+    def _store(self, key: Tuple[Tile, Tile], path: List[Tile]):
+        self._cache[key] = (self.grid.version, path)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _search(self, start: Tile, goal: Tile) -> Optional[List[Tile]]:
+        """A* in a window around start and goal, widened until it covers the grid"""
+        started = time.perf_counter()
+        self.searches += 1
+        path = None
+        if self.grid.is_walkable(*start) and self.grid.is_walkable(*goal):
+            margin = self.margin
+            while True:
+                path = self._astar(start, goal, margin)
+                if path is not None or self._covers_grid(start, goal, margin):
+                    break
+                margin *= 4
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.total_ms += elapsed_ms
+        self.last_ms = elapsed_ms
+        if path is None:
+            self.failures += 1
+        return path
+
+    def _covers_grid(self, start: Tile, goal: Tile, margin: int) -> bool:
+        ox, oy = self.grid.origin
+        return (min(start[0], goal[0]) - margin <= ox and min(start[1], goal[1]) - margin <= oy and
+                max(start[0], goal[0]) + margin >= ox + self.grid.width - 1 and
+                max(start[1], goal[1]) + margin >= oy + self.grid.height - 1)
+
+    def _astar(self, start: Tile, goal: Tile, margin: int, budget: Optional[int] = None) -> Optional[List[Tile]]:
+        # One blocked tile of padding removes the bounds checks
+        cells, left, top, width, _ = self.grid.window(
+            min(start[0], goal[0]) - margin, min(start[1], goal[1]) - margin,
+            max(start[0], goal[0]) + margin, max(start[1], goal[1]) + margin,
+            pad=1
+        )
+
+        gx, gy = goal[0] - left, goal[1] - top
+        source = (start[1] - top) * width + (start[0] - left)
+        target = gy * width + gx
+        if not cells[source] or not cells[target]:
+            return None
+
+        diagonal = self._neighbours[4][2]
+        # Flat offset, cost and the two orthogonal tiles a diagonal step passes
+        steps = [
+            (1, ORTHOGONAL_COST, 0, 0), (-1, ORTHOGONAL_COST, 0, 0),
+            (width, ORTHOGONAL_COST, 0, 0), (-width, ORTHOGONAL_COST, 0, 0),
+            (width + 1, diagonal, 1, width), (-width + 1, diagonal, 1, -width),
+            (width - 1, diagonal, -1, width), (-width - 1, diagonal, -1, -width),
+        ]
+        diagonal_extra = self._diagonal_extra
+        weight = self.heuristic_weight
+        budget = budget or self.max_expansions
+        heappush, heappop = heapq.heappush, heapq.heappop
+
+        sy, sx = divmod(source, width)
+        dx, dy = abs(sx - gx), abs(sy - gy)
+        h = int(weight * (ORTHOGONAL_COST * (dx + dy) + diagonal_extra * min(dx, dy)))
+        g_score = {source: 0}
+        came_from = {source: -1}
+        # Ties go to the entry closest to the goal
+        open_heap = [(h, h, 0, source)]
+        expansions = 0
+
+        while open_heap:
+            _, _, current_g, current = heappop(open_heap)
+            if current == target:
+                break
+            if current_g != g_score[current]:
+                continue
+            expansions += 1
+            if expansions > budget:
+                self.last_expansions = expansions
+                return None
+
+            for offset, cost, side, front in steps:
+                neighbour = current + offset
+                if not cells[neighbour]:
+                    continue
+                # No cutting corners around obstacles
+                if side and not (cells[current + side] and cells[current + front]):
+                    continue
+                tentative = current_g + cost
+                if tentative < g_score.get(neighbour, tentative + 1):
+                    g_score[neighbour] = tentative
+                    came_from[neighbour] = current
+                    ny, nx = divmod(neighbour, width)
+                    dx, dy = abs(nx - gx), abs(ny - gy)
+                    # Octile distance, inflated by the heuristic weight
+                    h = int(weight * (ORTHOGONAL_COST * (dx + dy) + diagonal_extra * (dx if dx < dy else dy)))
+                    heappush(open_heap, (tentative + h, h, tentative, neighbour))
+        else:
+            self.last_expansions = expansions
+            return None
+
+        self.last_expansions = expansions
+        path = []
+        node = target
+        while node != -1:
+            y, x = divmod(node, width)
+            path.append((x + left, y + top))
+            node = came_from[node]
+        path.reverse()
+        return path
+
+    def get_stats(self) -> Dict[str, object]:
+        return {
+            "grid_version": self.grid.version,
+            "cached_paths": len(self._cache),
+            "searches": self.searches,
+            "cache_hits": self.cache_hits,
+            "revalidated": self.revalidated,
+            "repairs": self.repairs,
+            "failures": self.failures,
+            "avg_ms": round(self.total_ms / self.searches, 3) if self.searches else 0.0,
+            "last_ms": round(self.last_ms, 3),
+            "last_expansions": self.last_expansions,
+        }
@@ -0,0 +1,270 @@
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from creature_detector import TemplatePyramidDetector
+from hp_mp_reader import HpMpBarReader
+
+logger = logging.getLogger(__name__)
+
+# Per-process state of detector workers
+_worker: Dict[str, object] = {}
+
+
+def _init_worker():
+    _worker['segment'] = None
+    _worker['reader'] = HpMpBarReader(ocr=None, ocr_every=0)
+    _worker['detector'] = TemplatePyramidDetector()
+    _worker['creatures'] = ()
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    segment = _worker.get('segment')
+    if segment is not None and segment.name == name:
+        return segment
+    if segment is not None:
+        segment.close()
+    # Workers share the parent's resource tracker, which unlinks on exit
+    segment = shared_memory.SharedMemory(name=name)
+    _worker['segment'] = segment
+    return segment
+
+
+def detect_job(job: Dict[str, object]) -> Dict[str, object]:
+    """Run the detectors on one ring slot (executed in a worker process)"""
+    start = time.perf_counter()
+    segment = _attach(job['shm_name'])
+    storage = np.ndarray((job['total'],), dtype=np.uint8, buffer=segment.buf)
+    base = job['slot_offset']
+    views = {}
+    for name in job['regions']:
+        offset, shape = job['layout'][name]
+        size = int(np.prod(shape))
+        views[name] = storage[base + offset:base + offset + size].reshape(shape)
+
+    result = {'sequence': job['sequence'], 'status': None, 'creatures': None}
+
+    if 'hp_mp' in views:
+        reader = _worker['reader']
+        hp_percent = reader.bar_percent(views['hp_mp'], reader.hp_bar)
+        mp_percent = reader.bar_percent(views['hp_mp'], reader.mp_bar)
+        # Unreadable bars are left for the OCR fallback in the main process
+        if hp_percent or mp_percent:
+            result['status'] = reader.read(views['hp_mp'])
+
+    creatures = tuple(job['creatures'])
+    if creatures and 'battle_list' in views:
+        detector = _worker['detector']
+        if creatures != _worker['creatures']:
+            detector.set_creatures(creatures)
+            _worker['creatures'] = creatures
+        result['creatures'] = detector.detect(views['battle_list'])
+
+    del views, storage
+    result['detect_ms'] = (time.perf_counter() - start) * 1000
+    return result
+
+
+class PipelineResult:
+    """Detector output for one captured frame"""
+
+    def __init__(self, frame, status, creatures, detect_ms: float):
+        self.frame = frame
+        self.status = status
+        self.creatures = creatures
+        self.detect_ms = detect_ms
+
+    @property
+    def sequence(self) -> int:
+        return self.frame.sequence
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.frame.timestamp
+
+    def release(self):
+        self.frame.release()
+
+
+class DetectionPipeline:
+    """Overlapping capture, detection and decision stages.
+
+    A capture thread writes frames into the shared-memory frame ring,
+    a process pool runs the detectors on ring slots by name, and the
+    decision stage awaits the newest result. Frames are only submitted
+    while a worker is free, older results are dropped as soon as a newer
+    one lands, and results older than ``max_frame_age`` are never acted on.
+    """
+
+    def __init__(self, capture_engine, workers: int = 2, max_frame_age: float = 0.25,
+                 capture_interval: float = 0.02):
+        self.capture_engine = capture_engine
+        self.workers = max(1, workers)
+        self.max_frame_age = max_frame_age
+        self.capture_interval = capture_interval
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._pending: Optional[PipelineResult] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ready: Optional[asyncio.Event] = None
+
+        self.captured = 0
+        self.busy_waits = 0
+        self.ring_full = 0
+        self.dropped_stale = 0
+        self.errors = 0
+        self.consumed = 0
+        self.last_latency_ms = 0.0
+        self.last_detect_ms = 0.0
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    def start(self, regions: Callable[[], List[str]], creatures: Callable[[], tuple]):
+        """Start capture thread and worker processes"""
+        if self._running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._ready = asyncio.Event()
+        self.capture_engine.use_shared_memory(min_slots=self.workers + 3)
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker
+        )
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._capture_loop, args=(regions, creatures), name='pipeline-capture', daemon=True
+        )
+        self._thread.start()
+        logger.info(f"Detection pipeline started with {self.workers} workers")
+
+    def stop(self):
+        if not self._running:
+            return
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(2.0)
+            self._thread = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+        with self._lock:
+            if self._pending is not None:
+                self._pending.release()
+                self._pending = None
+        logger.info("Detection pipeline stopped")
+
+    def _capture_loop(self, regions, creatures):
+        while self._running:
+            try:
+                with self._lock:
+                    busy = self._in_flight >= self.workers
+                if busy:
+                    # Workers still on older frames; capture a fresh one later
+                    self.busy_waits += 1
+                    time.sleep(self.capture_interval)
+                    continue
+
+                frame = self.capture_engine.capture(regions())
+                ring = self.capture_engine.ring
+                if frame.slot is None or ring is None or ring.shm_name is None:
+                    # Ring exhausted, the frame is not in shared memory
+                    frame.release()
+                    self.ring_full += 1
+                    time.sleep(self.capture_interval)
+                    continue
+
+                job = {
+                    'shm_name': ring.shm_name,
+                    'total': ring.slot_size * len(ring.slots),
+                    'slot_offset': frame.slot.index * ring.slot_size,
+                    'layout': ring.layout,
+                    'regions': list(frame.regions),
+                    'sequence': frame.sequence,
+                    'creatures': creatures(),
+                }
+                with self._lock:
+                    self._in_flight += 1
+                self.captured += 1
+                future = self._pool.submit(detect_job, job)
+                future.add_done_callback(lambda f, frame=frame: self._on_done(f, frame))
+            except Exception as e:
+                logger.error(f"Error in pipeline capture: {e}")
+            time.sleep(self.capture_interval)
+
+    def _on_done(self, future, frame):
+        with self._lock:
+            self._in_flight -= 1
+        try:
+            output = future.result()
+        except Exception as e:
+            if self._running:
+                logger.error(f"Error in pipeline detection: {e}")
+                self.errors += 1
+            frame.release()
+            return
+
+        result = PipelineResult(frame, output['status'], output['creatures'], output['detect_ms'])
+        self.last_detect_ms = result.detect_ms
+        with self._lock:
+            pending = self._pending
+            if pending is not None and pending.sequence > result.sequence:
+                # A newer frame already finished
+                self.dropped_stale += 1
+                result.release()
+                return
+            if pending is not None:
+                self.dropped_stale += 1
+                pending.release()
+            self._pending = result
+
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            pass
+
+    async def next_result(self, timeout: float = 1.0) -> Optional[PipelineResult]:
+        """Wait for the freshest result within the latency bound"""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        self._ready.clear()
+        with self._lock:
+            result, self._pending = self._pending, None
+        if result is None:
+            return None
+        if result.age > self.max_frame_age:
+            self.dropped_stale += 1
+            result.release()
+            return None
+        self.consumed += 1
+        self.last_latency_ms = result.age * 1000
+        return result
+
+    def get_stats(self) -> Dict[str, object]:
+        return {
+            "running": self._running,
+            "workers": self.workers,
+            "in_flight": self._in_flight,
+            "captured": self.captured,
+            "consumed": self.consumed,
+            "busy_waits": self.busy_waits,
+            "ring_full": self.ring_full,
+            "dropped_stale": self.dropped_stale,
+            "errors": self.errors,
+            "last_latency_ms": round(self.last_latency_ms, 3),
+            "last_detect_ms": round(self.last_detect_ms, 3),
+        }
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Default cadence of each bot task, in seconds
+DEFAULT_TASK_PERIODS: Dict[str, float] = {
+    "emergency_logout": 0.05,
+    "heal": 0.05,
+    "food": 20.0,
+    "attack": 0.5,
+    "loot": 1.0,
+    "waypoint": 0.25,
+    "broadcast": 1.0,
+    "persist_stats": 5.0,
+    "anti_idle": 5.0,
+}
+
+
+class ScheduledTask:
+    """A periodic bot task with its own cadence and priority (lower runs first)"""
+
+    def __init__(self, name: str, period: float, priority: int,
+                 callback: Callable[..., Awaitable[Optional[bool]]],
+                 regions: Optional[List[str]] = None, jitter: float = 0.2,
+                 enabled: Optional[Callable[[], bool]] = None):
+        self.name = name
+        self.period = period
+        self.priority = priority
+        self.callback = callback
+        self.regions = regions or []
+        self.jitter = jitter
+        self.enabled = enabled or (lambda: True)
+        self.next_run = 0.0
+
+        self.runs = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_lateness_ms = 0.0
+
+    def reschedule(self, now: float, rng=random):
+        # Jitter keeps cadences from looking machine-regular
+        spread = self.period * self.jitter
+        self.next_run = now + self.period + rng.uniform(-spread, spread)
+
+
+class TickScheduler:
+    """Wakes for the next due task instead of sleeping a fixed interval.
+
+    Tasks that are due together are returned in priority order so the
+    caller can capture their screen regions once and run them in turn.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], Awaitable[None]] = asyncio.sleep, rng=random):
+        self.tasks: Dict[str, ScheduledTask] = {}
+        self._clock = clock
+        self._sleep = sleep
+        self._random = rng
+        self.wakeups = 0
+
+    def add(self, task: ScheduledTask):
+        task.next_run = self._clock()
+        self.tasks[task.name] = task
+
+    def set_period(self, name: str, period: float):
+        task = self.tasks.get(name)
+        if task is not None and period > 0:
+            task.period = period
+            # A shorter period takes effect now, not after the old one runs out
+            task.next_run = min(task.next_run, self._clock() + period)
+
+    def due(self, now: Optional[float] = None) -> List[ScheduledTask]:
+        now = self._clock() if now is None else now
+        return sorted(
+            (task for task in self.tasks.values() if task.next_run <= now and task.enabled()),
+            key=lambda task: task.priority
+        )
+
+    def next_wakeup(self) -> Optional[float]:
+        pending = [task.next_run for task in self.tasks.values() if task.enabled()]
+        return min(pending) if pending else None
+
+    async def wait_due(self, max_wait: float = 1.0) -> List[ScheduledTask]:
+        """Sleep until at least one task is due (or ``max_wait`` passes)"""
+        now = self._clock()
+        wakeup = self.next_wakeup()
+        if wakeup is not None and wakeup > now:
+            await self._sleep(min(wakeup - now, max_wait))
+        elif wakeup is None:
+            await self._sleep(max_wait)
+        else:
+            # Already due: still yield, so a loop that runs late can't starve the others
+            await asyncio.sleep(0)
+        self.wakeups += 1
+        return self.due()
+
+    async def run_task(self, task: ScheduledTask, *args) -> Optional[bool]:
+        """Run one due task and schedule its next run"""
+        start = self._clock()
+        task.max_lateness_ms = max(task.max_lateness_ms, (start - task.next_run) * 1000)
+        result = None
+        try:
+            result = await task.callback(*args)
+        except Exception as e:
+            task.errors += 1
+            logger.error(f"Error in scheduled task {task.name}: {e}")
+        finished = self._clock()
+        task.runs += 1
+        task.total_ms += (finished - start) * 1000
+        task.reschedule(finished, self._random)
+        return result
+
+    def get_stats(self) -> Dict[str, object]:
+        return {
+            "wakeups": self.wakeups,
+            "tasks": {
+                task.name: {
+                    "period": task.period,
+                    "priority": task.priority,
+                    "runs": task.runs,
+                    "errors": task.errors,
+                    "avg_ms": round(task.total_ms / task.runs, 3) if task.runs else 0.0,
+                    "max_lateness_ms": round(task.max_lateness_ms, 3),
+                }
+                for task in sorted(self.tasks.values(), key=lambda task: task.priority)
+            },
+        }
@@ -7,7 +7,6 @@ import uuid
 import json
 import numpy as np
 from PIL import Image, ImageDraw
-import psutil
 import websockets
 
 # Mock GUI libraries for headless environment
@@ -15,8 +14,10 @@ class MockPyAutoGUI:
     FAILSAFE = False
     PAUSE = 0.01
     
-    def screenshot(self):
+    def screenshot(self, region=None):
         # Return a mock PIL image
+        if region is not None:
+            return Image.new('RGB', (region[2], region[3]), color='black')
         return Image.new('RGB', (1920, 1080), color='black')
     
     def position(self):
@@ -51,8 +52,15 @@ class MockCV2:
     COLOR_RGB2BGR = 4
     COLOR_BGR2GRAY = 6
     
-    def cvtColor(self, img, code):
-        return np.zeros((100, 100), dtype=np.uint8)
+    def cvtColor(self, img, code, dst=None):
+        if code == self.COLOR_BGR2GRAY:
+            result = np.zeros(img.shape[:2], dtype=np.uint8)
+        else:
+            result = img[..., ::-1]
+        if dst is not None:
+            np.copyto(dst, result)
+            return dst
+        return np.ascontiguousarray(result)
 
 class MockPynput:
     class mouse:
@@ -70,17 +78,41 @@ cv2 = MockCV2()
 mouse = MockPynput.mouse
 keyboard = MockPynput.keyboard
 
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, APIRouter
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, APIRouter, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from motor.motor_asyncio import AsyncIOMotorClient
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import Dict, List, Optional, Any
 import logging
 from datetime import datetime
 from scipy import interpolate
 from pathlib import Path
 from dotenv import load_dotenv
+from input_executor import (
+    InputExecutor, PRIORITY_HEAL, PRIORITY_ATTACK, PRIORITY_LOOT, PRIORITY_MOVE, PRIORITY_IDLE
+)
+from capture_engine import RegionCaptureEngine, SharedScreenSource, DEFAULT_REGIONS
+from frame_diff import DirtyRegionTracker
+from hp_mp_reader import HpMpBarReader
+from ocr_cache import OCRCache
+from loot_matcher import LootMatcher, LootLog, LOOT, DISCARD, loot_counts
+from creature_detector import TemplatePyramidDetector
+from pipeline import DetectionPipeline
+from scheduler import TickScheduler, ScheduledTask, DEFAULT_TASK_PERIODS
+from metrics import MetricsRegistry, CpuAccount
+from broadcaster import StatsBroadcaster
+from stats_writer import WriteBehindWriter, ensure_timeseries_collection, STATS_COLLECTION
+from config_cache import ConfigCache
+from bot_manager import BotManager, DEFAULT_BOT_ID
+from supervisor import Supervisor, RemoteError
+from pathfinder import WalkabilityGrid, PathFinder
+from tile_store import open_tile_store, GROUND_FLOOR
+from minimap_locator import MinimapLocator
+from frame_recorder import FrameRecorder, RecordingScreenSource, ReplayScreenSource
+from game_sim import SimulatedGame
+from client_discovery import ClientDiscovery
+from mouse_path import CurveCache, MousePlayer
 
 # Load environment variables
 ROOT_DIR = Path(__file__).parent
@@ -94,9 +126,43 @@ logger = logging.getLogger(__name__)
 MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
 DB_NAME = os.environ.get('DB_NAME', 'otbot_database')
 
+# Preallocated capture buffers
+FRAME_RING_SLOTS = int(os.environ.get('FRAME_RING_SLOTS', '4'))
+FRAME_RING_SHARED = os.environ.get('FRAME_RING_SHARED', 'false').lower() == 'true'
+
+# Bot sessions hosted by this process
+MAX_BOT_SESSIONS = int(os.environ.get('MAX_BOT_SESSIONS', '64'))
+
+# Supervisor mode: bot sessions run in worker processes
+BOT_SUPERVISOR = os.environ.get('BOT_SUPERVISOR', 'false').lower() == 'true'
+SESSIONS_PER_WORKER = int(os.environ.get('SESSIONS_PER_WORKER', '4'))
+# Set in the worker processes of a supervisor
+BOT_SHARD = os.environ.get('BOT_SHARD')
+
+# Run sessions against the simulated game instead of a Tibia client
+GAME_SIMULATION = os.environ.get('GAME_SIMULATION', 'false').lower() == 'true'
+
+# Record captured frames to a file, or replay one instead of the screen
+CAPTURE_RECORD = os.environ.get('CAPTURE_RECORD')
+CAPTURE_REPLAY = os.environ.get('CAPTURE_REPLAY')
+CAPTURE_REPLAY_SPEED = float(os.environ.get('CAPTURE_REPLAY_SPEED', '1.0'))
+
+# Waypoint ticks a step may fail before its tile is treated as blocked
+STUCK_TICKS = 4
+
+# Minimap tiles (built with tile_store.py), mapped once and shared by all sessions
+MINIMAP_TILES = Path(os.environ.get('MINIMAP_TILES', ROOT_DIR / 'data' / 'minimap.tiles'))
+
 client = AsyncIOMotorClient(MONGO_URL)
 db = client[DB_NAME]
 
+tile_store = None
+if MINIMAP_TILES.exists():
+    try:
+        tile_store = open_tile_store(MINIMAP_TILES)
+    except Exception as e:
+        logger.error(f"Error opening minimap tile store {MINIMAP_TILES}: {e}")
+
 # Initialize FastAPI
 app = FastAPI(title="OT Bot Indetectável", version="1.0.0")
 api_router = APIRouter(prefix="/api")
@@ -127,8 +193,11 @@ class BotConfig(BaseModel):
     heal_at_hp: int = 70
     heal_mana_spell: str = "exura gran"
     heal_at_mp: int = 50
+    hp_mp_reader: str = "bars"  # bars, ocr
+    ocr_check_interval: int = 50  # ticks between OCR cross-checks of the bars (0 disables)
     attack_spell: str = "exori"
     food_type: str = "ham"
+    food_hotkey: str = "f12"  # hotkey the food is bound to in the client
     food_at: int = 90
     waypoints: List[Dict[str, Any]] = []
     waypoint_mode: str = "loop"  # loop, back_and_forth, once
@@ -140,7 +209,19 @@ class BotConfig(BaseModel):
     loot_range: int = 3  # Squares from player
     anti_idle: bool = True
     emergency_logout_hp: int = 10
+    pipeline_mode: bool = False  # capture/detect/act stages overlapped across threads and processes
+    pipeline_workers: int = 2
+    max_frame_age_ms: int = 250  # never act on frames older than this in pipeline mode
+    task_periods: Dict[str, float] = {}  # per-task period overrides in seconds (heal, attack, loot...)
     enabled: bool = False
+    
+    @field_validator('task_periods')
+    @classmethod
+    def check_task_periods(cls, periods):
+        for name, period in periods.items():
+            if period <= 0:
+                raise ValueError(f"task period of {name} must be positive, got {period}")
+        return periods
 
 class BotStats(BaseModel):
     id: Optional[str] = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -161,18 +242,66 @@ class Waypoint(BaseModel):
     y: int
     description: Optional[str] = ""
 
-# Global bot instance
 class TibiaBot:
-    def __init__(self):
+    def __init__(self, bot_id=DEFAULT_BOT_ID, screen_source=None, stats_writer=None,
+                 input_device=None, ocr_engine=None, discovery=None):
+        self.bot_id = bot_id
         self.config = None
         self.is_running = False
         self.is_paused = False
         self.session_id = str(uuid.uuid4())
         self.stats = BotStats(session_id=self.session_id, created_at=datetime.utcnow())
         self.game_window = None
+        self.discovery = discovery or ClientDiscovery()
         self.screen_capture = None
         self.last_action_time = 0
-        self.websocket_connections = set()
+        # Keyboard and mouse (pyautogui, or a simulated game)
+        self.input = input_device or pyautogui
+        self.broadcaster = StatsBroadcaster()
+        self.metrics = MetricsRegistry()
+        self.cpu = CpuAccount()
+        self.stats_writer = stats_writer or WriteBehindWriter(db[STATS_COLLECTION])
+        self.input_executor = InputExecutor(
+            name=f"input-executor-{bot_id}", on_complete=self.on_action_complete, cpu=self.cpu
+        )
+        self.capture_engine = RegionCaptureEngine(
+            screen_source or pyautogui.screenshot,
+            convert=lambda image: cv2.cvtColor(image, cv2.COLOR_RGB2BGR),
+            convert_into=lambda image, dst: cv2.cvtColor(image, cv2.COLOR_RGB2BGR, dst=dst),
+            ring_slots=FRAME_RING_SLOTS,
+            shared=FRAME_RING_SHARED
+        )
+        
+        # Capture and detection run on a worker thread so the event loop keeps
+        # serving other sessions; simulations and replays run them inline
+        self.capture_threaded = True
+        
+        # Every pixel of the bars is compared: a few pixels of HP lost must not read as unchanged
+        self.dirty_tracker = DirtyRegionTracker(steps={'hp_mp': 1})
+        self.ocr_cache = OCRCache(ocr_engine or pytesseract.image_to_string)
+        self.creature_detector = TemplatePyramidDetector()
+        self.loot_matcher = LootMatcher()
+        self.loot_log = LootLog()
+        self.pipeline = None
+        self.scheduler = None
+        self.last_status = None
+        self.last_creatures = []
+        self.attack_target = None
+        self.attack_entries = 0
+        self.battle_list = []
+        self.pending_actions = {}
+        self.start_time = time.time()
+        self.last_snapshot_time = 0
+        self.hp_mp_reader = HpMpBarReader(
+            ocr=lambda image: self.ocr(image, config='--psm 7 -c tessedit_char_whitelist=0123456789/')
+        )
+        
+        # Position from the minimap, when map data is available
+        self.locator = MinimapLocator(tile_store) if tile_store is not None else None
+        
+        # Screen regions each detector reads, moved with the client window
+        self.window_origin = (0, 0)
+        self.register_regions()
         
         # Anti-detection variables
         self.human_delays = {
@@ -187,46 +316,130 @@ class TibiaBot:
         self.last_positions = []
         self.action_patterns = []
         
+        # Waits between input steps (replays skip them) and the session's
+        # own random numbers (seeded for replays and simulations)
+        self.sleep = time.sleep
+        self.random = random.Random()
+        
+        # Mouse moves: cached curve shapes played back on the event loop
+        self.curves = CurveCache()
+        self.mouse = MousePlayer(lambda x, y: self.input.moveTo(x, y))
+        
+        # Waypoint navigation
+        self.pathfinders = {}
+        self.position = None
+        self.floor = GROUND_FLOOR
+        self.current_path = []
+        self.path_index = 0
+        self.stuck_ticks = 0
+        
+    def apply_config(self, config):
+        """Use a new config, rebuilding only what changed"""
+        self.config = config
+        # Templates are built once per creature name, not per tick
+        self.creature_detector.set_creatures(config.target_creatures)
+        # Fit the HP/MP bars again, the client layout may have changed
+        self.hp_mp_reader.recalibrate()
+        # Loot decisions are trie lookups instead of list scans
+        self.loot_matcher = LootMatcher(config.loot_items, config.discard_items)
+        # Plan on the new waypoints
+        self.pathfinders = {}
+        self.current_path = []
+        # New task cadences apply to the running loop
+        if self.scheduler is not None:
+            for name, period in dict(DEFAULT_TASK_PERIODS, **config.task_periods).items():
+                self.scheduler.set_period(name, period)
+    
+    def close(self):
+        """Release the input workers, capture buffers and game client"""
+        self.input_executor.stop()
+        self.capture_engine.close()
+        self.discovery.release(self.bot_id)
+        self.mouse.close()
+    
+    def cpu_stats(self):
+        """CPU used by this session's loop and input actions"""
+        return self.cpu.get_stats()
+    
     async def broadcast_stats(self):
         """Broadcast current stats to all connected websockets"""
-        if self.websocket_connections:
-            stats_data = {
-                "type": "stats_update",
-                "data": {
-                    "session_id": self.stats.session_id,
-                    "exp_gained": self.stats.exp_gained,
-                    "time_running": self.stats.time_running,
-                    "heals_used": self.stats.heals_used,
-                    "food_used": self.stats.food_used,
-                    "attacks_made": self.stats.attacks_made,
-                    "creatures_killed": self.stats.creatures_killed,
-                    "items_looted": self.stats.items_looted,
-                    "items_discarded": self.stats.items_discarded,
-                    "is_running": self.is_running,
-                    "is_paused": self.is_paused
-                }
-            }
-            
-            disconnected = set()
-            for websocket in self.websocket_connections:
-                try:
-                    await websocket.send_text(json.dumps(stats_data))
-                except:
-                    disconnected.add(websocket)
-            
-            # Remove disconnected websockets
-            self.websocket_connections -= disconnected
+        with self.metrics.time('broadcast_stats'):
+            await self._broadcast_stats()
+    
+    def on_action_complete(self, action, elapsed_ms, failed):
+        """Record an executed input action (called from the executor thread)"""
+        self.metrics.observe('action', elapsed_ms / 1000, action=action)
+        self.stats_writer.add({
+            "timestamp": datetime.utcnow(),
+            "meta": {"session_id": self.session_id, "kind": "action", "action": action},
+            "elapsed_ms": elapsed_ms,
+            "ok": not failed
+        })
+    
+    def record_stats_snapshot(self):
+        """Queue a stats snapshot for the time-series collection"""
+        snapshot = self.stats.dict(exclude={'id', 'session_id', 'created_at'})
+        snapshot.update({
+            "timestamp": datetime.utcnow(),
+            "meta": {"session_id": self.session_id, "kind": "stats"}
+        })
+        self.stats_writer.add(snapshot)
+        self.last_snapshot_time = time.time()
+    
+    def stats_payload(self):
+        """Stats fields streamed to the dashboards"""
+        return {
+            "session_id": self.stats.session_id,
+            "exp_gained": self.stats.exp_gained,
+            "time_running": self.stats.time_running,
+            "heals_used": self.stats.heals_used,
+            "food_used": self.stats.food_used,
+            "attacks_made": self.stats.attacks_made,
+            "creatures_killed": self.stats.creatures_killed,
+            "items_looted": self.stats.items_looted,
+            "items_discarded": self.stats.items_discarded,
+            "is_running": self.is_running,
+            "is_paused": self.is_paused
+        }
+    
+    async def _broadcast_stats(self):
+        if len(self.broadcaster):
+            # Only changed fields go out; each client's sender task delivers them
+            self.broadcaster.publish_stats(self.stats_payload())
     
     def find_tibia_window(self):
         """Find Tibia game window"""
         try:
-            # Get all windows
-            for proc in psutil.process_iter(['pid', 'name']):
-                if 'tibia' in proc.info['name'].lower() or 'otclient' in proc.info['name'].lower():
-                    return proc.info['pid']
-        except:
-            pass
-        return None
+            client = self.discovery.acquire(self.bot_id)
+        except Exception as e:
+            logger.error(f"Error finding game client: {e}")
+            client = None
+        return self.attach_client(client.to_dict() if client is not None else None)
+    
+    def attach_client(self, client):
+        """Read and click in the given client's window; returns its PID"""
+        if client is None:
+            self.game_window = None
+            return None
+        self.game_window = client.get('window')
+        origin = client.get('origin')
+        if origin is not None and tuple(origin) != self.window_origin:
+            self.register_regions(tuple(origin))
+        return client['pid']
+    
+    def register_regions(self, origin=(0, 0)):
+        """Register the detector regions, laid out from a client window's top-left corner"""
+        self.window_origin = origin
+        regions = [('hp_mp', 'detect_hp_mp'), ('battle_list', 'detect_creatures'), ('loot', 'auto_loot_corpses')]
+        if self.locator is not None:
+            regions.append(('minimap', 'locate_position'))
+        for name, owner in regions:
+            left, top, width, height = DEFAULT_REGIONS[name]
+            self.capture_engine.register(name, (left + origin[0], top + origin[1], width, height), owner=owner)
+    
+    def ocr(self, image, config=''):
+        """Run OCR on a crop through the content-addressed cache"""
+        return self.ocr_cache(image, config=config)
     
     def human_delay(self, min_delay=None, max_delay=None):
         """Generate human-like delay with micro-pauses"""
@@ -236,91 +449,89 @@ class TibiaBot:
             max_delay = self.human_delays['max_action_delay']
         
         # Base delay
-        delay = random.uniform(min_delay, max_delay)
+        delay = self.random.uniform(min_delay, max_delay)
         
         # Add micro-pause chance
-        if random.random() < self.human_delays['micro_pause_chance']:
-            micro_pause = random.uniform(*self.human_delays['micro_pause_duration'])
+        if self.random.random() < self.human_delays['micro_pause_chance']:
+            micro_pause = self.random.uniform(*self.human_delays['micro_pause_duration'])
             delay += micro_pause
         
-        time.sleep(delay)
+        self.sleep(delay)
     
-    def bezier_mouse_move(self, start_pos, end_pos, duration=None):
-        """Move mouse using Bezier curve for natural movement"""
-        if duration is None:
-            duration = random.uniform(*self.human_delays['mouse_move_duration'])
-        
-        x1, y1 = start_pos
-        x2, y2 = end_pos
+    async def bezier_mouse_move(self, start_pos, end_pos, duration=None):
+        """Move mouse using Bezier curve for natural movement.
         
-        # Create control points for Bezier curve
-        control_x = random.uniform(min(x1, x2), max(x1, x2))
-        control_y = random.uniform(min(y1, y2), max(y1, y2))
-        
-        # Generate points along Bezier curve
-        steps = int(duration * 60)  # 60 steps per second
-        for i in range(steps + 1):
-            t = i / steps
-            
-            # Bezier curve formula
-            x = (1-t)**2 * x1 + 2*(1-t)*t * control_x + t**2 * x2
-            y = (1-t)**2 * y1 + 2*(1-t)*t * control_y + t**2 * y2
-            
-            pyautogui.moveTo(int(x), int(y))
-            time.sleep(duration / steps)
+        Returns False when a heal (or another move) cut the move short.
+        """
+        if duration is None:
+            duration = self.random.uniform(*self.human_delays['mouse_move_duration'])
+        return await self.mouse.play(self.curves.trajectory(start_pos, end_pos, duration, rng=self.random))
+    
+    def required_regions(self):
+        """Regions needed by the detectors enabled in the current config"""
+        regions = ['hp_mp']
+        if self.config.auto_attack:
+            regions.append('battle_list')
+        if self.config.auto_loot:
+            regions.append('loot')
+        return regions
     
-    def capture_game_area(self):
-        """Capture game screen area"""
+    def capture_game_area(self, regions=None):
+        """Capture the game screen regions registered by the detectors"""
         try:
-            screenshot = pyautogui.screenshot()
-            # Convert to OpenCV format
-            screenshot_cv = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
-            return screenshot_cv
+            with self.metrics.time('capture'):
+                return self.capture_engine.capture(regions)
         except Exception as e:
             logger.error(f"Error capturing screen: {e}")
             return None
     
-    def detect_hp_mp(self, screenshot):
-        """Detect HP and MP using OCR"""
+    def detect_hp_mp(self, frame):
+        """Detect HP and MP from the 'hp_mp' region (bar pixels or OCR)"""
         try:
-            # Simulate HP/MP detection
-            hp_current = random.randint(50, 100)
-            hp_max = 100
-            mp_current = random.randint(30, 100)  
-            mp_max = 100
-            
-            return {
-                'hp_current': hp_current,
-                'hp_max': hp_max,
-                'hp_percent': (hp_current / hp_max) * 100 if hp_max > 0 else 100,
-                'mp_current': mp_current,
-                'mp_max': mp_max,
-                'mp_percent': (mp_current / mp_max) * 100 if mp_max > 0 else 100
-            }
+            with self.metrics.time('detect_hp_mp'):
+                status = self._read_hp_mp(frame['hp_mp'])
+            if status is not None:
+                return status
         except Exception as e:
             logger.error(f"Error detecting HP/MP: {e}")
-            return {'hp_percent': 100, 'mp_percent': 100}
+        # Unreadable (window covered or minimized): don't act on it as low HP
+        return {'hp_percent': 100, 'mp_percent': 100}
+    
+    def _read_hp_mp(self, crop):
+        if self.config.hp_mp_reader == 'ocr':
+            return self.hp_mp_reader.read_ocr(crop)
+        
+        # Bar pixel ratio, with OCR as a lower-cadence cross-check
+        self.hp_mp_reader.ocr_every = self.config.ocr_check_interval
+        return self.hp_mp_reader.read(crop)
     
-    def detect_creatures(self, screenshot):
-        """Detect creatures on screen"""
+    def detect_creatures(self, frame):
+        """Detect creatures in the 'battle_list' region"""
         creatures = []
         try:
-            # Simulate creature detection
-            for creature_name in self.config.target_creatures:
-                if random.random() < 0.3:  # 30% chance to find creature
-                    x = random.randint(300, 700)
-                    y = random.randint(200, 500)
-                    creatures.append({
-                        'name': creature_name,
-                        'x': x,
-                        'y': y,
-                        'distance': random.randint(1, 5)
-                    })
+            with self.metrics.time('detect_creatures'):
+                matches = self.creature_detector.detect(frame['battle_list'])
+            creatures = self.battle_list_creatures(matches)
         except Exception as e:
             logger.error(f"Error detecting creatures: {e}")
         
         return creatures
     
+    def battle_list_creatures(self, matches):
+        """Convert battle list template matches to screen positions and distances"""
+        left, top, _, _ = self.capture_engine.regions['battle_list']
+        creatures = []
+        
+        # Battle list is sorted by distance, closest entry on top
+        for distance, match in enumerate(sorted(matches, key=lambda m: m['y']), start=1):
+            creatures.append({
+                'name': match['name'],
+                'x': left + match['x'],
+                'y': top + match['y'],
+                'distance': distance
+            })
+        return creatures
+    
     def cast_healing_spell(self):
         """Cast healing spell with human-like behavior"""
         try:
@@ -328,10 +539,10 @@ class TibiaBot:
             
             # Type healing spell
             for char in self.config.heal_spell:
-                pyautogui.press(char)
-                time.sleep(random.uniform(*self.human_delays['typing_delay']))
+                self.input.press(char)
+                self.sleep(self.random.uniform(*self.human_delays['typing_delay']))
             
-            pyautogui.press('enter')
+            self.input.press('enter')
             self.stats.heals_used += 1
             
             logger.info(f"Cast healing spell: {self.config.heal_spell}")
@@ -343,47 +554,167 @@ class TibiaBot:
         """Use food with human-like behavior"""
         try:
             self.human_delay(0.2, 0.5)
+            self.input.press(self.config.food_hotkey)
             self.stats.food_used += 1
             logger.info("Used food")
         except Exception as e:
             logger.error(f"Error using food: {e}")
     
-    def attack_creature(self, creature):
-        """Attack a detected creature"""
+    async def attack_creature(self, creature):
+        """Attack a detected creature by moving to its battle list entry and clicking it"""
         try:
-            self.human_delay(0.2, 0.5)
-            self.stats.attacks_made += 1
-            
-            # Chance to kill creature
-            if random.random() < 0.3:  # 30% chance to kill
-                self.stats.creatures_killed += 1
-                logger.info(f"Killed {creature['name']}")
-            
-            logger.info(f"Attacked {creature['name']} with {self.config.attack_spell}")
-            
+            if not await self.bezier_mouse_move(self.input.position(), (creature['x'], creature['y'])):
+                # A heal cut the move short; the next attack tick retries
+                return
+            await self.input_executor.submit(self.click_target, creature, priority=PRIORITY_ATTACK, name="attack")
         except Exception as e:
             logger.error(f"Error attacking creature {creature['name']}: {e}")
     
-    def auto_loot_corpses(self, screenshot):
-        """Automatically loot corpses and manage inventory"""
+    def click_target(self, creature):
+        """Click the battle list entry under the mouse"""
+        self.human_delay(0.05, 0.15)
+        self.input.click()
+        # Entries with that name when clicked; set before the name the loop reads
+        self.attack_entries = self.count_entries(creature['name'])
+        self.attack_target = creature['name']
+        self.stats.attacks_made += 1
+        
+        logger.info(f"Attacked {creature['name']} with {self.config.attack_spell}")
+    
+    def count_entries(self, name):
+        """Battle list entries with a creature name in the latest detection"""
+        return sum(1 for c in self.battle_list if c['name'] == name)
+    
+    def track_kills(self, creatures):
+        """Count a kill when an entry with the attacked creature's name leaves the battle list.
+        
+        Entries are counted rather than names checked, so killing one of
+        several creatures with the same name is seen too.
+        """
+        self.battle_list = creatures
+        if self.attack_target is None:
+            return
+        entries = self.count_entries(self.attack_target)
+        if entries < self.attack_entries:
+            self.stats.creatures_killed += 1
+            logger.info(f"Killed {self.attack_target}")
+            self.attack_target = None
+        else:
+            # More of them came into view
+            self.attack_entries = entries
+    
+    def auto_loot_corpses(self, frame):
+        """Automatically loot corpses in the 'loot' region and manage inventory"""
         try:
             if not self.config.auto_loot:
                 return
             
-            # Simulate looting
-            if random.random() < 0.2:  # 20% chance to loot
-                items_looted = random.randint(1, 3)
-                self.stats.items_looted += items_looted
-                logger.info(f"Looted {items_looted} items")
+            looted = discarded = 0
+            with self.metrics.time('auto_loot'):
+                text = self.ocr(frame['loot'], config='--psm 6')
+                # Only messages that scrolled in since the last read
+                for entry, count in loot_counts(self.loot_log.new_lines(text)):
+                    item = self.loot_matcher.match(entry)
+                    if item is None:
+                        continue
+                    if item[1] == LOOT:
+                        looted += count
+                    elif item[1] == DISCARD:
+                        discarded += count
+            
+            if looted or discarded:
+                self.stats.items_looted += looted
+                self.stats.items_discarded += discarded
+                logger.info(f"Looted {looted} items, discarded {discarded}")
             
         except Exception as e:
             logger.error(f"Error in auto loot: {e}")
     
-    def execute_waypoint_movement(self):
+    def navigation(self, z=None):
+        """Pathfinder for one floor, over the minimap tile store when available"""
+        z = self.floor if z is None else z
+        pathfinder = self.pathfinders.get(z)
+        if pathfinder is None:
+            floor = tile_store.floor(z) if tile_store is not None else None
+            if floor is not None:
+                # Shared read-only map; blocked tiles become per-session overrides
+                grid = WalkabilityGrid(floor.cost, floor.origin)
+            else:
+                # No map data: every tile around the route counts as walkable
+                grid = WalkabilityGrid.open(
+                    (wp['x'], wp['y']) for wp in self.config.waypoints if wp.get('z', GROUND_FLOOR) == z
+                )
+            pathfinder = self.pathfinders[z] = PathFinder(grid)
+        return pathfinder
+    
+    def current_position(self):
+        """Last known tile of the character"""
+        if self.position is None:
+            return None
+        return {"x": self.position[0], "y": self.position[1], "z": self.floor, "source": "tracked"}
+    
+    def locate_position(self, frame=None):
+        """Find the character on the minimap, searching near the last known tile first"""
+        if self.locator is None:
+            return None
+        captured = frame is None
+        if captured:
+            frame = self.capture_game_area(['minimap'])
+        try:
+            if frame is None or 'minimap' not in frame:
+                return None
+            hint = (self.position[0], self.position[1], self.floor) if self.position is not None else None
+            with self.metrics.time('locate_position'):
+                found = self.locator.locate(frame['minimap'], hint=hint)
+        except Exception as e:
+            logger.error(f"Error locating position: {e}")
+            return None
+        finally:
+            if captured and frame is not None:
+                frame.release()
+        if found is None:
+            return None
+        return {"x": found[0], "y": found[1], "z": found[2], "source": "minimap"}
+    
+    def sync_position(self, detected):
+        """Follow the detected position along the current route.
+        
+        A step that keeps not happening means the next tile is blocked.
+        """
+        position = (detected['x'], detected['y'])
+        if detected['z'] != self.floor:
+            self.floor = detected['z']
+            self.current_path = []
+        self.position = position
+        if not self.current_path:
+            return
+        
+        window = self.current_path[max(self.path_index - 3, 0):self.path_index + 1]
+        if position not in window:
+            # Off the route (pushed, teleported...): plan again from here
+            self.current_path = []
+            return
+        index = self.current_path.index(position, max(self.path_index - 3, 0))
+        if index + 1 >= self.path_index:
+            self.path_index = index + 1
+            self.stuck_ticks = 0
+            return
+        
+        # Behind the steps already sent: resend, or give up on that tile
+        self.stuck_ticks += 1
+        self.path_index = index + 1
+        if self.stuck_ticks >= STUCK_TICKS and self.path_index < len(self.current_path):
+            self.stuck_ticks = 0
+            self.mark_tile_blocked(*self.current_path[self.path_index])
+    
+    def execute_waypoint_movement(self, detected=None):
         """Execute waypoint-based movement"""
         try:
             if not self.config.auto_walk or not self.config.waypoints:
                 return
+            
+            if detected is not None:
+                self.sync_position(detected)
                 
             # Get current waypoint index (stored in bot instance)
             if not hasattr(self, 'current_waypoint_index'):
@@ -395,6 +726,36 @@ class TibiaBot:
             if not waypoints:
                 return
             
+            # Get current waypoint
+            current_waypoint = waypoints[self.current_waypoint_index]
+            goal = (current_waypoint['x'], current_waypoint['y'])
+            if self.position is None:
+                # Assume the character starts on the first waypoint
+                self.position = (waypoints[0]['x'], waypoints[0]['y'])
+                self.floor = waypoints[0].get('z', GROUND_FLOOR)
+            
+            # Plan the route to the waypoint (cached per start, goal and map version)
+            if not self.current_path or self.current_path[-1] != goal:
+                self.floor = current_waypoint.get('z', self.floor)
+                path = self.navigation().find_path(self.position, goal)
+                if path is None:
+                    logger.warning(f"No route to waypoint {current_waypoint['name']} ({goal[0]}, {goal[1]})")
+                    path = [self.position]
+                else:
+                    logger.info(f"Walking to waypoint: {current_waypoint['name']} ({goal[0]}, {goal[1]}) - {len(path) - 1} steps")
+                self.current_path = path
+                self.path_index = 1
+            
+            # One step per tick, so healing and attacks are never queued behind a long walk
+            if self.path_index < len(self.current_path):
+                step_from, step_to = self.current_path[self.path_index - 1], self.current_path[self.path_index]
+                if self.submit_action('walk', self.walk_step, PRIORITY_MOVE, step_from, step_to) is not None:
+                    self.position = step_to
+                    self.path_index += 1
+                    if self.path_index == len(self.current_path):
+                        self.last_waypoint_time = time.time() * 1000
+                return
+            
             # Check if it's time to move to next waypoint
             current_time = time.time() * 1000  # Convert to milliseconds
             if not hasattr(self, 'last_waypoint_time'):
@@ -403,11 +764,6 @@ class TibiaBot:
             if current_time - self.last_waypoint_time < self.config.waypoint_delay:
                 return
             
-            # Get current waypoint
-            current_waypoint = waypoints[self.current_waypoint_index]
-            
-            logger.info(f"Walking to waypoint: {current_waypoint['name']} ({current_waypoint['x']}, {current_waypoint['y']})")
-            
             # Update waypoint index based on mode
             if self.config.waypoint_mode == "loop":
                 self.current_waypoint_index = (self.current_waypoint_index + 1) % len(waypoints)
@@ -432,20 +788,225 @@ class TibiaBot:
                     self.config.auto_walk = False
                     logger.info("Waypoint sequence completed - disabling auto walk")
             
+            self.current_path = []
             self.last_waypoint_time = current_time
             
         except Exception as e:
             logger.error(f"Error in waypoint movement: {e}")
     
+    def walk_step(self, step_from, step_to):
+        """Press the arrow (or numpad diagonal) key for one tile step"""
+        dx, dy = step_to[0] - step_from[0], step_to[1] - step_from[1]
+        key = {
+            (0, -1): 'up', (0, 1): 'down', (-1, 0): 'left', (1, 0): 'right',
+            (-1, -1): 'num7', (1, -1): 'num9', (-1, 1): 'num1', (1, 1): 'num3'
+        }.get((dx, dy))
+        if key is None:
+            return
+        self.human_delay(0.05, 0.15)
+        self.input.press(key)
+    
+    def mark_tile_blocked(self, x, y):
+        """Record a tile found blocked and detour the remaining route around it"""
+        pathfinder = self.navigation()
+        if not pathfinder.grid.set_walkable(x, y, False):
+            return
+        remaining = self.current_path[self.path_index - 1:] if self.current_path else []
+        if (x, y) in remaining:
+            repaired = pathfinder.repair(remaining)
+            if repaired is None:
+                logger.warning(f"Route blocked at ({x}, {y}), replanning")
+                self.current_path = []
+            else:
+                self.current_path = repaired
+                self.path_index = 1
+    
     def anti_idle_action(self):
         """Perform random anti-idle action"""
-        if random.random() < 0.1:  # 10% chance every cycle
+        if self.random.random() < 0.1:  # 10% chance every cycle
             logger.info("Performed anti-idle action")
     
+    async def act_on_frame(self, frame, status, find_creatures):
+        """Decision/act stage of the pipelined loop.
+        
+        Actions are queued, not awaited, so the next detector result is
+        acted on as soon as it lands. Returns False when the bot must stop.
+        """
+        self.last_status = status
+        
+        # Emergency logout
+        if status['hp_percent'] <= self.config.emergency_logout_hp:
+            logger.warning("Emergency logout triggered!")
+            self.is_running = False
+            return False
+        
+        # Auto heal
+        if self.config.auto_heal and status['hp_percent'] <= self.config.heal_at_hp:
+            self.submit_action('heal', self.cast_healing_spell, PRIORITY_HEAL)
+        
+        # Auto attack
+        if self.config.auto_attack:
+            creatures = find_creatures()
+            self.track_kills(creatures)
+            if creatures:
+                target = min(creatures, key=lambda c: c['distance'])
+                self.submit_attack(target)
+        
+        # Auto walk (waypoints)
+        if self.config.auto_walk:
+            self.execute_waypoint_movement()
+        
+        # Auto loot (only when something changed in the loot area); the
+        # action gets its own copy since the frame is released after this
+        if self.config.auto_loot and self.dirty_tracker.is_dirty('loot'):
+            self.submit_action('loot', self.auto_loot_corpses, PRIORITY_LOOT, frame.copy(['loot']))
+        
+        return True
+    
+    def submit_action(self, name, func, priority, *args):
+        """Queue an input action unless the previous one of that kind is still pending"""
+        pending = self.pending_actions.get(name)
+        if pending is not None and not pending.done():
+            return None
+        if priority <= PRIORITY_HEAL:
+            # Heals don't wait for a mouse move to finish
+            self.mouse.cancel()
+        future = self.input_executor.submit(func, *args, priority=priority, name=name)
+        # Errors are logged by the executor; mark them retrieved
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self.pending_actions[name] = future
+        return future
+    
+    def submit_attack(self, creature):
+        """Start an attack unless the previous one is still moving or clicking"""
+        pending = self.pending_actions.get('attack')
+        if pending is not None and not pending.done():
+            return None
+        task = asyncio.ensure_future(self.attack_creature(creature))
+        task.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self.pending_actions['attack'] = task
+        return task
+    
+    def build_scheduler(self, clock=time.monotonic):
+        """Declare every bot task with its own period and priority"""
+        periods = dict(DEFAULT_TASK_PERIODS, **self.config.task_periods)
+        scheduler = TickScheduler(clock=clock, rng=self.random)
+        scheduler.add(ScheduledTask('emergency_logout', periods['emergency_logout'], 0,
+                                    self.emergency_logout_task, regions=['hp_mp'], jitter=0))
+        scheduler.add(ScheduledTask('heal', periods['heal'], 1, self.heal_task, regions=['hp_mp'],
+                                    jitter=0, enabled=lambda: self.config.auto_heal))
+        scheduler.add(ScheduledTask('food', periods['food'], 2, self.food_task,
+                                    enabled=lambda: self.config.auto_food))
+        scheduler.add(ScheduledTask('attack', periods['attack'], 3, self.attack_task, regions=['battle_list'],
+                                    enabled=lambda: self.config.auto_attack))
+        scheduler.add(ScheduledTask('loot', periods['loot'], 4, self.loot_task, regions=['loot'],
+                                    enabled=lambda: self.config.auto_loot))
+        # waypoint_delay still gates the actual moves
+        scheduler.add(ScheduledTask('waypoint', periods['waypoint'], 5, self.waypoint_task,
+                                    regions=['minimap'] if self.locator is not None else [],
+                                    enabled=lambda: self.config.auto_walk))
+        scheduler.add(ScheduledTask('broadcast', periods['broadcast'], 8, self.broadcast_task, jitter=0))
+        scheduler.add(ScheduledTask('persist_stats', periods['persist_stats'], 8, self.persist_stats_task, jitter=0))
+        scheduler.add(ScheduledTask('anti_idle', periods['anti_idle'], 9, self.anti_idle_task,
+                                    enabled=lambda: self.config.anti_idle))
+        return scheduler
+    
+    async def emergency_logout_task(self, frame):
+        if self.last_status and self.last_status['hp_percent'] <= self.config.emergency_logout_hp:
+            logger.warning("Emergency logout triggered!")
+            self.is_running = False
+            return False
+    
+    async def heal_task(self, frame):
+        if self.last_status and self.last_status['hp_percent'] <= self.config.heal_at_hp:
+            self.submit_action('heal', self.cast_healing_spell, PRIORITY_HEAL)
+    
+    async def food_task(self, frame):
+        self.submit_action('food', self.use_food, PRIORITY_IDLE)
+    
+    async def attack_task(self, frame):
+        # Detected along with the capture, off the event loop
+        creatures = self.last_creatures
+        self.track_kills(creatures)
+        if creatures:
+            target = min(creatures, key=lambda c: c['distance'])
+            self.submit_attack(target)
+    
+    async def loot_task(self, frame):
+        # Only when something changed in the loot area; the action gets its
+        # own copy since it runs after this frame's buffers are released
+        if self.dirty_tracker.is_dirty('loot'):
+            self.submit_action('loot', self.auto_loot_corpses, PRIORITY_LOOT, frame.copy(['loot']))
+    
+    async def waypoint_task(self, frame):
+        detected = self.locate_position(frame) if frame is not None else None
+        self.execute_waypoint_movement(detected)
+    
+    async def broadcast_task(self, frame):
+        self.stats.time_running = int(time.time() - self.start_time)
+        await self.broadcast_stats()
+    
+    async def persist_stats_task(self, frame):
+        self.record_stats_snapshot()
+    
+    async def anti_idle_task(self, frame):
+        self.submit_action('anti_idle', self.anti_idle_action, PRIORITY_IDLE)
+    
+    def capture_tick(self, regions):
+        """Capture the regions and run the detectors on them; None when capture failed"""
+        with self.cpu.measure():
+            frame = self.capture_game_area(regions)
+            if frame is not None:
+                # Mark regions that changed since they were last captured
+                self.dirty_tracker.update(frame)
+                
+                # Detect HP/MP and creatures (reused while their regions are unchanged)
+                if 'hp_mp' in frame:
+                    self.last_status = self.dirty_tracker.reuse(
+                        'hp_mp', 'detect_hp_mp', lambda: self.detect_hp_mp(frame)
+                    )
+                if 'battle_list' in frame:
+                    self.last_creatures = self.dirty_tracker.reuse(
+                        'battle_list', 'detect_creatures', lambda: self.detect_creatures(frame)
+                    )
+        return frame
+    
+    async def run_tick(self, scheduler, due):
+        """Capture once for the due tasks and run them; False when capture failed"""
+        frame = None
+        try:
+            # Capture the regions of all due tasks at once
+            regions = sorted({region for task in due for region in task.regions})
+            if regions:
+                if self.capture_threaded:
+                    frame = await asyncio.to_thread(self.capture_tick, regions)
+                else:
+                    frame = self.capture_tick(regions)
+                if frame is None:
+                    return False
+            
+            for task in due:
+                # Detection is done, so tasks only queue actions and run without yielding
+                with self.cpu.measure():
+                    stop = await scheduler.run_task(task, frame) is False
+                if stop:
+                    break
+            return True
+        finally:
+            if frame is not None:
+                frame.release()
+    
     async def bot_main_loop(self):
         """Main bot execution loop"""
+        if self.config.pipeline_mode:
+            await self.pipelined_main_loop()
+            return
+        
         logger.info("Bot main loop started")
-        start_time = time.time()
+        self.start_time = time.time()
+        self.last_status = None
+        self.last_creatures = []
+        scheduler = self.scheduler = self.build_scheduler()
         
         while self.is_running:
             try:
@@ -453,71 +1014,323 @@ class TibiaBot:
                     await asyncio.sleep(1)
                     continue
                 
-                # Update running time
-                self.stats.time_running = int(time.time() - start_time)
-                
-                # Capture screen
-                screenshot = self.capture_game_area()
-                if screenshot is None:
-                    await asyncio.sleep(1)
+                # Sleep until the next task is due
+                due = await scheduler.wait_due()
+                if not due or not self.is_running:
                     continue
+                self.metrics.tick()
                 
-                # Detect HP/MP
-                status = self.detect_hp_mp(screenshot)
-                
-                # Emergency logout
-                if status['hp_percent'] <= self.config.emergency_logout_hp:
-                    logger.warning("Emergency logout triggered!")
-                    self.is_running = False
-                    break
-                
-                # Auto heal
-                if self.config.auto_heal and status['hp_percent'] <= self.config.heal_at_hp:
-                    self.cast_healing_spell()
-                
-                # Auto food
-                if self.config.auto_food and random.random() < 0.05:  # 5% chance per cycle
-                    self.use_food()
-                
-                # Auto attack
-                if self.config.auto_attack:
-                    creatures = self.detect_creatures(screenshot)
-                    if creatures:
-                        target = min(creatures, key=lambda c: c['distance'])
-                        self.attack_creature(target)
-                
-                # Auto walk (waypoints)
-                if self.config.auto_walk:
-                    self.execute_waypoint_movement()
-                
-                # Auto loot
-                if self.config.auto_loot:
-                    self.auto_loot_corpses(screenshot)
-                
-                # Anti-idle
-                if self.config.anti_idle:
-                    self.anti_idle_action()
-                
-                # Broadcast stats
-                await self.broadcast_stats()
-                
-                # Random delay between main loop iterations
-                await asyncio.sleep(random.uniform(0.5, 2.0))
+                if not await self.run_tick(scheduler, due):
+                    await asyncio.sleep(1)
                 
             except Exception as e:
                 logger.error(f"Error in bot main loop: {e}")
                 await asyncio.sleep(1)
         
         logger.info("Bot main loop ended")
+    
+    async def pipelined_main_loop(self):
+        """Decision loop fed by the capture thread and detector processes"""
+        logger.info("Bot pipelined loop started")
+        self.start_time = time.time()
+        
+        self.pipeline = DetectionPipeline(
+            self.capture_engine,
+            workers=self.config.pipeline_workers,
+            max_frame_age=self.config.max_frame_age_ms / 1000
+        )
+        self.pipeline.start(
+            self.required_regions,
+            lambda: tuple(self.config.target_creatures) if self.config.auto_attack else ()
+        )
+        
+        # Frame decisions are made per result in act_on_frame; the timed
+        # tasks that read no frame keep their own cadence
+        scheduler = self.scheduler = self.build_scheduler()
+        for name in list(scheduler.tasks):
+            if name not in PIPELINE_TIMED_TASKS:
+                del scheduler.tasks[name]
+        
+        try:
+            while self.is_running:
+                result = None
+                try:
+                    if self.is_paused:
+                        await asyncio.sleep(1)
+                        continue
+                    
+                    # Freshest detector output paces the loop; stale frames were dropped
+                    result = await self.pipeline.next_result(timeout=1.0)
+                    if result is not None:
+                        self.metrics.tick()
+                        
+                        with self.cpu.measure():
+                            # Diff against the previous result so only a changed loot panel is OCR'd
+                            self.dirty_tracker.update(result.frame)
+                            # Bars unreadable in the worker: OCR fallback in-process
+                            status = result.status or self.detect_hp_mp(result.frame)
+                            creatures = self.battle_list_creatures(result.creatures or [])
+                        
+                        if not await self.act_on_frame(result.frame, status, lambda: creatures):
+                            break
+                    
+                    for task in scheduler.due():
+                        await scheduler.run_task(task, None)
+                
+                except Exception as e:
+                    logger.error(f"Error in bot pipelined loop: {e}")
+                    await asyncio.sleep(1)
+                finally:
+                    if result is not None:
+                        result.release()
+        finally:
+            await asyncio.get_running_loop().run_in_executor(None, self.pipeline.stop)
+        
+        logger.info("Bot pipelined loop ended")
 
-# Global bot instance
-bot = TibiaBot()
+# Scheduled tasks the pipelined loop runs besides its per-frame decisions
+PIPELINE_TIMED_TASKS = ('food', 'broadcast', 'persist_stats', 'anti_idle')
 
-# WebSocket endpoint
-@api_router.websocket("/bot/ws")
-async def websocket_endpoint(websocket: WebSocket):
+# Shared by every bot session: one grab per screen region per tick, one batched writer
+frame_recorder = None
+simulated_game = SimulatedGame() if GAME_SIMULATION else None
+if CAPTURE_REPLAY:
+    screen_source = ReplayScreenSource(CAPTURE_REPLAY, speed=CAPTURE_REPLAY_SPEED, loop=True)
+else:
+    screen_source = simulated_game or SharedScreenSource(pyautogui.screenshot)
+    if CAPTURE_RECORD and not BOT_SUPERVISOR:
+        # Each worker process of a supervisor records its own file
+        frame_recorder = FrameRecorder(f"{CAPTURE_RECORD}.shard{BOT_SHARD}" if BOT_SHARD else CAPTURE_RECORD)
+        screen_source = RecordingScreenSource(screen_source, frame_recorder)
+stats_writer = WriteBehindWriter(db[STATS_COLLECTION])
+# One process table scan for every session's game client; in supervisor
+# mode it runs in the supervisor, which hands shards their clients
+client_discovery = ClientDiscovery()
+
+manager = BotManager(
+    lambda bot_id: TibiaBot(
+        bot_id, screen_source=screen_source, stats_writer=stats_writer, input_device=simulated_game,
+        ocr_engine=simulated_game.ocr if simulated_game is not None else None, discovery=client_discovery
+    ),
+    max_sessions=MAX_BOT_SESSIONS
+)
+
+# Session behind the single-bot /api/bot routes; a supervisor places it on
+# one of its shards instead (see start_supervisor)
+bot = manager.create(DEFAULT_BOT_ID) if not BOT_SUPERVISOR and BOT_SHARD is None else None
+
+# Latest saved configuration, served without a database round trip
+config_cache = ConfigCache(db.bot_configs)
+
+def get_session(bot_id):
+    """Bot session by id, or 404"""
+    session = manager.get(bot_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Bot session {bot_id} not found")
+    return session
+
+async def start_session(session, config_data=None, client=None):
+    if session.is_running:
+        return {"message": "Bot is already running"}
+    
+    if not session.config:
+        # Last saved config, as sent along by the supervisor or from the cache
+        config_data = config_data or await config_cache.get()
+        if config_data:
+            session.apply_config(BotConfig(**config_data))
+        else:
+            raise HTTPException(status_code=400, detail="No configuration found")
+    
+    session.is_running = True
+    session.is_paused = False
+    session.session_id = str(uuid.uuid4())
+    session.stats = BotStats(session_id=session.session_id, created_at=datetime.utcnow())
+    session.dirty_tracker.reset()
+    session.loot_log.reset()
+    
+    if simulated_game is None and not CAPTURE_REPLAY:
+        if client is None and BOT_SHARD is None:
+            client_discovery.start()
+            pid = await asyncio.get_running_loop().run_in_executor(None, session.find_tibia_window)
+        else:
+            # Shards are handed the client the supervisor assigned
+            pid = session.attach_client(client)
+        if pid is None:
+            logger.warning(f"No game client found for bot session {session.bot_id}")
+    
+    # Start input worker, stats writer and bot in background
+    session.input_executor.start()
+    session.stats_writer.start()
+    asyncio.create_task(session.bot_main_loop())
+    
+    return {"message": "Bot started successfully", "session_id": session.session_id}
+
+async def stop_session(session):
+    session.is_running = False
+    session.is_paused = False
+    session.mouse.cancel()
+    
+    # Save session stats
+    if session.stats:
+        session.record_stats_snapshot()
+        stats_dict = session.stats.dict()
+        await db.bot_sessions.insert_one(stats_dict)
+    
+    # Write out buffered snapshots and action events
+    await session.stats_writer.flush()
+    
+    return {"message": "Bot stopped successfully"}
+
+def pause_session(session):
+    session.is_paused = not session.is_paused
+    status = "paused" if session.is_paused else "resumed"
+    return {"message": f"Bot {status} successfully", "is_paused": session.is_paused}
+
+def session_status(session):
+    return {
+        "bot_id": session.bot_id,
+        "is_running": session.is_running,
+        "is_paused": session.is_paused,
+        "session_id": session.session_id,
+        "stats": session.stats.dict() if session.stats else None,
+        "cpu": session.cpu_stats(),
+        "input_executor": session.input_executor.get_stats(),
+        "capture": session.capture_engine.get_stats(),
+        "dirty_regions": session.dirty_tracker.get_stats(),
+        "hp_mp_reader": session.hp_mp_reader.get_stats(),
+        "ocr_cache": session.ocr_cache.get_stats(),
+        "creature_detector": session.creature_detector.get_stats(),
+        "loot_matcher": dict(session.loot_matcher.get_stats(), log=session.loot_log.get_stats()),
+        "game_window": session.game_window,
+        "mouse": dict(session.mouse.get_stats(), curves=session.curves.get_stats()),
+        "pipeline": session.pipeline.get_stats() if session.pipeline else None,
+        "scheduler": session.scheduler.get_stats() if session.scheduler else None,
+        "pathfinder": {z: pathfinder.get_stats() for z, pathfinder in session.pathfinders.items()},
+        "locator": session.locator.get_stats() if session.locator else None,
+        "latency": session.metrics.summary(),
+        "websockets": session.broadcaster.get_stats()
+    }
+
+async def handle_control(op, bot_id, payload=None):
+    """Run a control operation on a session hosted by this process"""
+    if op == "create":
+        session = manager.get(bot_id) or manager.create(bot_id)
+        if payload is not None:
+            session.apply_config(BotConfig(**payload))
+        return {"message": "Bot session created", "bot_id": bot_id}
+    
+    session = get_session(bot_id)
+    if op == "config":
+        session.apply_config(BotConfig(**payload))
+        return {"message": "Configuration applied", "bot_id": bot_id}
+    if op == "start":
+        payload = payload or {}
+        return await start_session(session, payload.get("config"), payload.get("client"))
+    if op == "stop":
+        return await stop_session(session)
+    if op == "pause":
+        return pause_session(session)
+    if op == "status":
+        return session_status(session)
+    if op == "metrics":
+        return session.metrics.render_prometheus()
+    if op == "position":
+        return session.locate_position() or session.current_position()
+    if op == "remove":
+        if bot_id == DEFAULT_BOT_ID:
+            raise HTTPException(status_code=400, detail="The default bot session cannot be removed")
+        # Closing joins the session's input thread, so keep it off the event loop
+        await asyncio.get_running_loop().run_in_executor(None, manager.remove, bot_id)
+        return {"message": "Bot session removed", "bot_id": bot_id}
+    raise HTTPException(status_code=400, detail=f"Unknown operation {op}")
+
+async def control(bot_id, op, payload=None):
+    """Run a control operation here, or on the owning shard in supervisor mode"""
+    try:
+        if supervisor is not None:
+            if op == "create":
+                return await supervisor.create(bot_id, payload)
+            if op == "start":
+                # Shards keep the config cache they started with, so sessions
+                # without a config of their own get the latest save along, and
+                # every session the client assigned here so two shards never
+                # claim the same one
+                config = None if supervisor.configs.get(bot_id) else await config_cache.get()
+                payload = {"config": config, "client": await assign_client(bot_id)}
+            result = await supervisor.call(bot_id, op, payload)
+            if op == "remove":
+                client_discovery.release(bot_id)
+            return result
+        return await handle_control(op, bot_id, payload)
+    except RemoteError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+async def assign_client(bot_id):
+    """Game client for a session, picked by the supervisor's discovery"""
+    if simulated_game is not None or CAPTURE_REPLAY:
+        return None
+    client_discovery.start()
+    client = await asyncio.get_running_loop().run_in_executor(None, client_discovery.acquire, bot_id)
+    return client.to_dict() if client is not None else None
+
+def shard_stats(bot_ids):
+    """Stats a shard worker pushes to the supervisor for its sessions"""
+    stats = {}
+    for bot_id in bot_ids:
+        session = manager.get(bot_id)
+        if session is not None:
+            stats[bot_id] = {
+                "stats": session.stats_payload(),
+                "cpu": session.cpu_stats(),
+                "is_running": session.is_running,
+                "is_paused": session.is_paused,
+                "session_id": session.session_id
+            }
+    return stats
+
+async def close_sessions():
+    """Stop every session of a shard worker, saving their stats"""
+    for session in manager:
+        if session.is_running:
+            try:
+                await stop_session(session)
+            except Exception as e:
+                logger.error(f"Error stopping bot session {session.bot_id}: {e}")
+    manager.close()
+    client_discovery.stop()
+    if frame_recorder is not None:
+        frame_recorder.close()
+    await stats_writer.stop()
+
+def publish_shard_stats(bot_id, data):
+    """Feed stats pushed by a shard to that session's websocket clients"""
+    broadcaster = remote_broadcasters.setdefault(bot_id, StatsBroadcaster())
+    broadcaster.publish_stats(data["stats"])
+
+# Supervisor mode: sessions run in worker processes, SESSIONS_PER_WORKER each
+supervisor = Supervisor(SESSIONS_PER_WORKER, on_stats=publish_shard_stats) if BOT_SUPERVISOR else None
+remote_broadcasters = {}
+
+async def serve_stats_websocket(websocket, bot_id):
+    if supervisor is not None:
+        if bot_id not in supervisor.placement:
+            await websocket.close(code=4404)
+            return
+        broadcaster = remote_broadcasters.setdefault(bot_id, StatsBroadcaster())
+        snapshot = supervisor.session_stats.get(bot_id, {}).get("stats")
+    else:
+        session = manager.get(bot_id)
+        if session is None:
+            await websocket.close(code=4404)
+            return
+        broadcaster = session.broadcaster
+        snapshot = session.stats_payload()
+    
     await websocket.accept()
-    bot.websocket_connections.add(websocket)
+    # Full snapshot first, then stats_delta messages
+    broadcaster.add(websocket, snapshot=snapshot)
     
     try:
         while True:
@@ -526,9 +1339,22 @@ async def websocket_endpoint(websocket: WebSocket):
             
             if message.get("type") == "ping":
                 await websocket.send_text(json.dumps({"type": "pong"}))
+            elif message.get("type") == "resync":
+                broadcaster.resync(websocket)
     
     except WebSocketDisconnect:
-        bot.websocket_connections.discard(websocket)
+        pass
+    finally:
+        broadcaster.remove(websocket)
+
+# WebSocket endpoints
+@api_router.websocket("/bot/ws")
+async def websocket_endpoint(websocket: WebSocket):
+    await serve_stats_websocket(websocket, DEFAULT_BOT_ID)
+
+@api_router.websocket("/bots/{bot_id}/ws")
+async def session_websocket_endpoint(websocket: WebSocket, bot_id: str):
+    await serve_stats_websocket(websocket, bot_id)
 
 # API Routes
 @api_router.get("/health")
@@ -542,19 +1368,24 @@ async def save_bot_config(config: BotConfig):
         config_dict = config.dict()
         
         await db.bot_configs.insert_one(config_dict)
-        bot.config = config
+        config_cache.set(config_dict)
+        await control(DEFAULT_BOT_ID, "config", config.dict())
         
         return {"message": "Configuration saved successfully", "config_id": config.id}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.get("/bot/config")
-async def get_bot_config():
+async def get_bot_config(request: Request):
     try:
-        config = await db.bot_configs.find_one(sort=[("_id", -1)])
+        config = await config_cache.get()
         if config:
-            config.pop("_id", None)
-            return config
+            headers = {"ETag": config_cache.etag}
+            if config_cache.matches(request.headers.get("if-none-match")):
+                return Response(status_code=304, headers=headers)
+            return JSONResponse(config, headers=headers)
         return {"message": "No configuration found"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -562,63 +1393,125 @@ async def get_bot_config():
 @api_router.post("/bot/start")
 async def start_bot():
     try:
-        if bot.is_running:
-            return {"message": "Bot is already running"}
-        
-        if not bot.config:
-            # Load last config
-            config_data = await db.bot_configs.find_one(sort=[("_id", -1)])
-            if config_data:
-                config_data.pop("_id", None)
-                bot.config = BotConfig(**config_data)
-            else:
-                raise HTTPException(status_code=400, detail="No configuration found")
-        
-        bot.is_running = True
-        bot.is_paused = False
-        bot.session_id = str(uuid.uuid4())
-        bot.stats = BotStats(session_id=bot.session_id, created_at=datetime.utcnow())
-        
-        # Start bot in background
-        asyncio.create_task(bot.bot_main_loop())
-        
-        return {"message": "Bot started successfully", "session_id": bot.session_id}
+        return await control(DEFAULT_BOT_ID, "start")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.post("/bot/stop")
 async def stop_bot():
     try:
-        bot.is_running = False
-        bot.is_paused = False
-        
-        # Save session stats
-        if bot.stats:
-            stats_dict = bot.stats.dict()
-            await db.bot_sessions.insert_one(stats_dict)
-        
-        return {"message": "Bot stopped successfully"}
+        return await control(DEFAULT_BOT_ID, "stop")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.post("/bot/pause")
 async def pause_bot():
     try:
-        bot.is_paused = not bot.is_paused
-        status = "paused" if bot.is_paused else "resumed"
-        return {"message": f"Bot {status} successfully", "is_paused": bot.is_paused}
+        return await control(DEFAULT_BOT_ID, "pause")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.get("/bot/status")
 async def get_bot_status():
     try:
-        return {
-            "is_running": bot.is_running,
-            "is_paused": bot.is_paused,
-            "session_id": bot.session_id,
-            "stats": bot.stats.dict() if bot.stats else None
-        }
+        status = await control(DEFAULT_BOT_ID, "status")
+        status["config_cache"] = config_cache.get_stats()
+        if supervisor is not None:
+            status["supervisor"] = supervisor.get_stats()
+        else:
+            status["stats_writer"] = stats_writer.get_stats()
+            status["screen_source"] = screen_source.get_stats()
+            status["sessions"] = manager.get_stats()
+            status["client_discovery"] = client_discovery.get_stats()
+        return status
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.get("/bots")
+async def list_bots():
+    """All bot sessions hosted by this server with their CPU use"""
+    try:
+        if supervisor is not None:
+            return supervisor.get_stats()
+        return manager.get_stats()
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.post("/bots")
+async def create_bot(config: Optional[BotConfig] = None):
+    """Create a bot session, with its own config or the latest saved one"""
+    try:
+        return await control(str(uuid.uuid4()), "create", config.dict() if config is not None else None)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.delete("/bots/{bot_id}")
+async def delete_bot(bot_id: str):
+    try:
+        return await control(bot_id, "remove")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.post("/bots/{bot_id}/start")
+async def start_bot_session(bot_id: str):
+    try:
+        return await control(bot_id, "start")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.post("/bots/{bot_id}/stop")
+async def stop_bot_session(bot_id: str):
+    try:
+        return await control(bot_id, "stop")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.post("/bots/{bot_id}/pause")
+async def pause_bot_session(bot_id: str):
+    try:
+        return await control(bot_id, "pause")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.get("/bots/{bot_id}/status")
+async def get_bot_session_status(bot_id: str):
+    try:
+        return await control(bot_id, "status")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.get("/bot/metrics")
+async def get_bot_metrics():
+    """Stage latency histograms and loop tick rate in Prometheus text format"""
+    try:
+        return PlainTextResponse(
+            await control(DEFAULT_BOT_ID, "metrics"),
+            media_type="text/plain; version=0.0.4; charset=utf-8"
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -635,18 +1528,28 @@ async def get_bot_sessions():
 
 @api_router.get("/bot/current-position")
 async def get_current_position():
-    """Get current player position (simulated for now)"""
+    """Get current player position"""
     try:
-        # Simulate position detection
-        simulated_x = random.randint(1000, 1100)
-        simulated_y = random.randint(1000, 1100)
+        # Minimap match, else the tile the bot is tracking
+        position = await control(DEFAULT_BOT_ID, "position")
+        if position is None:
+            # No minimap data and not walking: simulate position detection
+            position = {
+                "x": random.randint(1000, 1100), "y": random.randint(1000, 1100),
+                "z": GROUND_FLOOR, "source": "simulated"
+            }
         
-        return {
-            "x": simulated_x,
-            "y": simulated_y,
-            "message": "Posição capturada com sucesso!",
-            "timestamp": datetime.utcnow()
-        }
+        walkable = None
+        if tile_store is not None:
+            walkable = tile_store.is_walkable(position["x"], position["y"], position["z"])
+        return dict(
+            position,
+            walkable=walkable,
+            message="Posição capturada com sucesso!",
+            timestamp=datetime.utcnow()
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -659,8 +1562,31 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 
+@app.on_event("startup")
+async def prepare_collections():
+    # In the background so a slow database doesn't delay startup
+    asyncio.create_task(ensure_timeseries_collection(db))
+    asyncio.create_task(warm_config_cache())
+
+@app.on_event("startup")
+async def start_supervisor():
+    if supervisor is not None:
+        await supervisor.start()
+        await supervisor.create(DEFAULT_BOT_ID)
+
+async def warm_config_cache():
+    try:
+        await config_cache.warm()
+    except Exception as e:
+        logger.error(f"Error loading bot configuration: {e}")
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    if supervisor is not None:
+        await supervisor.stop()
+    await asyncio.get_running_loop().run_in_executor(None, manager.close)
+    client_discovery.stop()
+    await stats_writer.stop()
     client.close()
 
 if __name__ == "__main__":
@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+STATS_COLLECTION = "bot_stats_timeseries"
+
+
+async def ensure_timeseries_collection(db, name: str = STATS_COLLECTION):
+    """Create the stats collection as a MongoDB time-series collection.
+
+    Falls back to a plain collection indexed on (session, time) when the
+    server does not support time-series collections (MongoDB < 5.0).
+    """
+    try:
+        if name in await db.list_collection_names():
+            return
+        try:
+            await db.create_collection(
+                name, timeseries={"timeField": "timestamp", "metaField": "meta", "granularity": "seconds"}
+            )
+        except Exception as e:
+            logger.warning(f"Time-series collections unavailable, using a plain collection: {e}")
+            await db[name].create_index([("meta.session_id", 1), ("timestamp", 1)])
+    except Exception as e:
+        logger.error(f"Error preparing {name} collection: {e}")
+
+
+class WriteBehindWriter:
+    """Buffers stats snapshots and action events and writes them in batches.
+
+    ``add`` only appends to an in-memory buffer and is safe to call from
+    any thread; a background task flushes with ``insert_many`` every
+    ``flush_interval`` seconds or as soon as ``batch_size`` documents are
+    waiting. When the database is down the buffer keeps at most
+    ``max_buffer`` documents, dropping the oldest.
+    """
+
+    def __init__(self, collection, batch_size: int = 200, flush_interval: float = 5.0,
+                 max_buffer: int = 10000):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer: deque = deque(maxlen=max_buffer)
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._stopping = False
+
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.failures = 0
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Start the background flush task on the running event loop"""
+        if self.is_running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+
+    def add(self, document: Dict[str, Any]):
+        """Queue a document for writing; never blocks"""
+        with self._lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.dropped += 1
+            self._buffer.append(document)
+            full = len(self._buffer) >= self.batch_size
+        if full and self._loop is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:
+                pass
+
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        """Write everything buffered so far"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            while True:
+                with self._lock:
+                    if not self._buffer:
+                        return
+                    batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+                try:
+                    await self.collection.insert_many(batch, ordered=False)
+                    self.written += len(batch)
+                    self.batches += 1
+                except Exception as e:
+                    self.failures += 1
+                    logger.error(f"Error writing {len(batch)} stats documents: {e}")
+                    # Put the batch back in front and retry on the next flush
+                    with self._lock:
+                        space = self._buffer.maxlen - len(self._buffer)
+                        kept = batch[-space:] if space > 0 else []
+                        self.dropped += len(batch) - len(kept)
+                        self._buffer.extendleft(reversed(kept))
+                    return
+
+    async def stop(self):
+        """Stop the flush task after a final flush"""
+        if self._task is not None:
+            # Let an in-flight batch finish instead of cancelling it
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "pending": self.pending(),
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "failures": self.failures,
+        }
@@ -0,0 +1,317 @@
+import asyncio
+import importlib
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RemoteError(Exception):
+    """A control call that failed in (or could not reach) a shard"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def shard_main(conn, shard_index: int, module_name: str = "server"):
+    """Entry point of a worker process hosting a shard of bot sessions"""
+    # The worker hosts sessions itself instead of supervising
+    os.environ["BOT_SUPERVISOR"] = "false"
+    os.environ["BOT_SHARD"] = str(shard_index)
+    server = importlib.import_module(module_name)
+    asyncio.run(_serve_shard(conn, shard_index, server))
+
+
+async def _serve_shard(conn, shard_index: int, server, stats_interval: float = 0.5):
+    loop = asyncio.get_running_loop()
+    inbox: asyncio.Queue = asyncio.Queue()
+    hosted = set()
+
+    def receive():
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                # Supervisor went away
+                message = {"op": "shutdown"}
+            loop.call_soon_threadsafe(inbox.put_nowait, message)
+            if message.get("op") == "shutdown":
+                return
+
+    async def handle(message):
+        op, bot_id = message.get("op"), message.get("bot_id")
+        try:
+            result = await server.handle_control(op, bot_id, message.get("payload"))
+            if op == "create":
+                hosted.add(bot_id)
+            elif op == "remove":
+                hosted.discard(bot_id)
+            reply = {"id": message["id"], "ok": True, "result": result}
+        except Exception as e:
+            reply = {
+                "id": message["id"], "ok": False,
+                "status_code": getattr(e, "status_code", 500),
+                "detail": str(getattr(e, "detail", e)),
+            }
+        send(reply)
+
+    def send(message):
+        try:
+            conn.send(message)
+        except Exception as e:
+            logger.error(f"Error sending to supervisor from shard {shard_index}: {e}")
+
+    async def publish_stats():
+        while True:
+            await asyncio.sleep(stats_interval)
+            if hosted:
+                send({"type": "stats", "sessions": server.shard_stats(sorted(hosted))})
+
+    threading.Thread(target=receive, name=f"shard-{shard_index}-ipc", daemon=True).start()
+    publisher = asyncio.create_task(publish_stats())
+    handlers = set()
+    logger.info(f"Bot shard {shard_index} ready (pid {os.getpid()})")
+
+    while True:
+        message = await inbox.get()
+        if message.get("op") == "shutdown":
+            break
+        task = asyncio.create_task(handle(message))
+        handlers.add(task)
+        task.add_done_callback(handlers.discard)
+
+    publisher.cancel()
+    await server.close_sessions()
+    conn.close()
+
+
+class Shard:
+    """One worker process and the sessions placed on it"""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.process = None
+        self.conn = None
+        self.sessions = set()
+        self.pending: Dict[int, asyncio.Future] = {}
+        self.restarts = 0
+        self.started_at = 0.0
+
+    @property
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+
+class Supervisor:
+    """Spreads bot sessions over worker processes, ``sessions_per_worker`` each.
+
+    Control calls are forwarded to the owning shard over a pipe and
+    answered asynchronously; shards push session stats back every half
+    second. A shard whose process dies is restarted on its own and its
+    sessions are recreated, and restarted (with their last start payload) if
+    they were running.
+    """
+
+    def __init__(self, sessions_per_worker: int = 4, target: Callable = shard_main,
+                 on_stats: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+                 call_timeout: float = 15.0, check_interval: float = 1.0):
+        self.sessions_per_worker = max(1, sessions_per_worker)
+        self.call_timeout = call_timeout
+        self.check_interval = check_interval
+        self._target = target
+        self._on_stats = on_stats
+        self._ctx = multiprocessing.get_context("spawn")
+        self._ids = itertools.count(1)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._monitor: Optional[asyncio.Task] = None
+
+        self.shards: List[Shard] = []
+        self.placement: Dict[str, Shard] = {}
+        self.configs: Dict[str, Optional[Dict[str, Any]]] = {}
+        self.starts: Dict[str, Any] = {}
+        self.session_stats: Dict[str, Dict[str, Any]] = {}
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        if self._monitor is None:
+            self._monitor = asyncio.create_task(self._watch())
+
+    def _spawn(self, shard: Shard):
+        parent_conn, child_conn = self._ctx.Pipe()
+        shard.process = self._ctx.Process(
+            target=self._target, args=(child_conn, shard.index), name=f"bot-shard-{shard.index}", daemon=True
+        )
+        shard.process.start()
+        child_conn.close()
+        shard.conn = parent_conn
+        shard.started_at = time.time()
+        threading.Thread(
+            target=self._receive, args=(shard, parent_conn), name=f"shard-{shard.index}-reader", daemon=True
+        ).start()
+        logger.info(f"Started bot shard {shard.index} (pid {shard.process.pid})")
+
+    def _receive(self, shard: Shard, conn):
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                return
+            try:
+                self._loop.call_soon_threadsafe(self._dispatch, shard, message)
+            except RuntimeError:
+                return
+
+    def _dispatch(self, shard: Shard, message: Dict[str, Any]):
+        if "id" in message:
+            future = shard.pending.pop(message["id"], None)
+            if future is not None and not future.done():
+                future.set_result(message)
+        elif message.get("type") == "stats":
+            for bot_id, data in message["sessions"].items():
+                if self.placement.get(bot_id) is not shard:
+                    continue
+                self.session_stats[bot_id] = data
+                if self._on_stats is not None:
+                    self._on_stats(bot_id, data)
+
+    async def _request(self, shard: Shard, op: str, bot_id: Optional[str] = None,
+                       payload: Any = None, timeout: Optional[float] = None):
+        request_id = next(self._ids)
+        future = self._loop.create_future()
+        shard.pending[request_id] = future
+        try:
+            shard.conn.send({"id": request_id, "op": op, "bot_id": bot_id, "payload": payload})
+        except Exception:
+            shard.pending.pop(request_id, None)
+            raise RemoteError(503, f"Bot shard {shard.index} is unavailable")
+        try:
+            reply = await asyncio.wait_for(future, timeout or self.call_timeout)
+        except asyncio.TimeoutError:
+            shard.pending.pop(request_id, None)
+            raise RemoteError(504, f"Bot shard {shard.index} did not answer {op}")
+        if not reply["ok"]:
+            raise RemoteError(reply["status_code"], reply["detail"])
+        return reply.get("result")
+
+    def _place(self) -> Shard:
+        candidates = [shard for shard in self.shards if len(shard.sessions) < self.sessions_per_worker]
+        if candidates:
+            return min(candidates, key=lambda shard: len(shard.sessions))
+        shard = Shard(len(self.shards))
+        self.shards.append(shard)
+        self._spawn(shard)
+        return shard
+
+    async def create(self, bot_id: str, config: Optional[Dict[str, Any]] = None):
+        """Place a new session on the least loaded shard"""
+        if bot_id in self.placement:
+            raise RemoteError(409, f"Bot session {bot_id} already exists")
+        shard = self._place()
+        # Reserved before awaiting so concurrent creates respect the limit
+        shard.sessions.add(bot_id)
+        self.placement[bot_id] = shard
+        try:
+            result = await self._request(shard, "create", bot_id, config)
+        except RemoteError:
+            shard.sessions.discard(bot_id)
+            self.placement.pop(bot_id, None)
+            raise
+        self.configs[bot_id] = config
+        return result
+
+    async def call(self, bot_id: str, op: str, payload: Any = None):
+        """Run a control operation on the shard owning ``bot_id``"""
+        shard = self.placement.get(bot_id)
+        if shard is None:
+            raise RemoteError(404, f"Bot session {bot_id} not found")
+        result = await self._request(shard, op, bot_id, payload)
+        if op == "config":
+            self.configs[bot_id] = payload
+        elif op == "start":
+            self.starts[bot_id] = payload
+        elif op == "remove":
+            shard.sessions.discard(bot_id)
+            self.placement.pop(bot_id, None)
+            self.configs.pop(bot_id, None)
+            self.starts.pop(bot_id, None)
+            self.session_stats.pop(bot_id, None)
+        return result
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.check_interval)
+            for shard in list(self.shards):
+                if shard.process is not None and not shard.is_alive:
+                    try:
+                        await self._restart(shard)
+                    except Exception as e:
+                        logger.error(f"Error restarting bot shard {shard.index}: {e}")
+
+    async def _restart(self, shard: Shard):
+        logger.error(f"Bot shard {shard.index} exited with code {shard.process.exitcode}, restarting")
+        for future in shard.pending.values():
+            if not future.done():
+                future.set_exception(RemoteError(503, f"Bot shard {shard.index} crashed"))
+        shard.pending.clear()
+        try:
+            shard.conn.close()
+        except Exception:
+            pass
+        shard.restarts += 1
+        self._spawn(shard)
+
+        # Bring back only this shard's sessions, as they were
+        for bot_id in sorted(shard.sessions):
+            was_running = self.session_stats.get(bot_id, {}).get("is_running", False)
+            try:
+                await self._request(shard, "create", bot_id, self.configs.get(bot_id))
+                if was_running:
+                    await self._request(shard, "start", bot_id, self.starts.get(bot_id))
+            except RemoteError as e:
+                logger.error(f"Error restoring bot session {bot_id} on shard {shard.index}: {e.detail}")
+
+    async def stop(self, timeout: float = 10.0):
+        """Shut every shard down, letting sessions save their stats"""
+        if self._monitor is not None:
+            self._monitor.cancel()
+            self._monitor = None
+        for shard in self.shards:
+            try:
+                shard.conn.send({"op": "shutdown"})
+            except Exception:
+                pass
+        loop = asyncio.get_running_loop()
+        for shard in self.shards:
+            if shard.process is None:
+                continue
+            await loop.run_in_executor(None, shard.process.join, timeout)
+            if shard.process.is_alive():
+                shard.process.terminate()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "sessions_per_worker": self.sessions_per_worker,
+            "shards": [
+                {
+                    "index": shard.index,
+                    "pid": shard.process.pid if shard.process is not None else None,
+                    "alive": shard.is_alive,
+                    "restarts": shard.restarts,
+                    "uptime": round(time.time() - shard.started_at, 1) if shard.is_alive else 0.0,
+                    "sessions": sorted(shard.sessions),
+                    "pending_calls": len(shard.pending),
+                }
+                for shard in self.shards
+            ],
+            "sessions": {
+                bot_id: dict(self.session_stats.get(bot_id, {}), shard=shard.index)
+                for bot_id, shard in self.placement.items()
+            },
+        }
@@ -0,0 +1,190 @@
+import argparse
+import logging
+import re
+import struct
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"OTTILES1"
+HEADER = struct.Struct("<8sI")
+FLOOR_ENTRY = struct.Struct("<iiiIIQ")  # z, left, top, width, height, data offset
+
+GROUND_FLOOR = 7
+
+# Tile cost layer: 0 is blocked or unexplored, otherwise the walking cost
+BLOCKED = 0
+
+# Minimap files of the Tibia client, 256x256 tiles each
+MINIMAP_FILE = re.compile(r"Minimap_(Color|WaypointCost)_(\d+)_(\d+)_(\d+)\.png$")
+MINIMAP_TILE_SIZE = 256
+
+
+def color_index(rgb: np.ndarray) -> np.ndarray:
+    """Minimap colors (6x6x6 web palette) as one byte per tile"""
+    levels = (rgb.astype(np.uint16) + 25) // 51
+    return (levels[..., 0] * 36 + levels[..., 1] * 6 + levels[..., 2]).astype(np.uint8)
+
+
+def palette_rgb(index: np.ndarray) -> np.ndarray:
+    """Inverse of color_index"""
+    index = index.astype(np.uint16)
+    return (np.stack([index // 36, index // 6 % 6, index % 6], axis=-1) * 51).astype(np.uint8)
+
+
+def waypoint_cost(rgb: np.ndarray) -> np.ndarray:
+    """Cost layer from a WaypointCost image: yellow is blocked, gray is the cost"""
+    blocked = (rgb[..., 0] == 255) & (rgb[..., 1] == 255) & (rgb[..., 2] == 0)
+    unexplored = (rgb[..., 0] >= 250) & (rgb[..., 1] >= 250) & (rgb[..., 2] >= 250)
+    cost = np.clip(rgb[..., 0], 1, 254).astype(np.uint8)
+    cost[blocked | unexplored] = BLOCKED
+    return cost
+
+
+class Floor:
+    """One z level: color and cost layers as views into the mapped file"""
+
+    def __init__(self, z: int, left: int, top: int, color: np.ndarray, cost: np.ndarray):
+        self.z = z
+        self.origin = (left, top)
+        self.color = color
+        self.cost = cost
+
+    @property
+    def width(self) -> int:
+        return self.color.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self.color.shape[0]
+
+    def contains(self, x: int, y: int) -> bool:
+        return 0 <= x - self.origin[0] < self.width and 0 <= y - self.origin[1] < self.height
+
+
+class TileStore:
+    """Minimap tiles in one memory-mapped file.
+
+    Every floor is two (height, width) uint8 layers, a palette color and
+    a walking cost, so a tile is found by offset arithmetic alone. The
+    file is mapped read-only: sessions and worker processes opening the
+    same store share its pages through the OS page cache instead of
+    each loading the minimap images.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._data = np.memmap(self.path, dtype=np.uint8, mode="r")
+        magic, floor_count = HEADER.unpack_from(self._data, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a tile store")
+
+        self.floors: Dict[int, Floor] = {}
+        for index in range(floor_count):
+            z, left, top, width, height, offset = FLOOR_ENTRY.unpack_from(
+                self._data, HEADER.size + index * FLOOR_ENTRY.size
+            )
+            size = width * height
+            color = self._data[offset:offset + size].reshape(height, width)
+            cost = self._data[offset + size:offset + 2 * size].reshape(height, width)
+            self.floors[z] = Floor(z, left, top, color, cost)
+
+    def floor(self, z: int) -> Optional[Floor]:
+        return self.floors.get(z)
+
+    def tile(self, x: int, y: int, z: int) -> Optional[Tuple[int, int]]:
+        """(color index, cost) of a tile, or None outside the mapped area"""
+        floor = self.floors.get(z)
+        if floor is None or not floor.contains(x, y):
+            return None
+        row, column = y - floor.origin[1], x - floor.origin[0]
+        return int(floor.color[row, column]), int(floor.cost[row, column])
+
+    def is_walkable(self, x: int, y: int, z: int) -> bool:
+        tile = self.tile(x, y, z)
+        return tile is not None and tile[1] != BLOCKED
+
+    def get_stats(self) -> Dict[str, object]:
+        return {
+            "path": str(self.path),
+            "bytes": int(self._data.size),
+            "floors": {
+                z: {"origin": list(floor.origin), "width": floor.width, "height": floor.height}
+                for z, floor in sorted(self.floors.items())
+            },
+        }
+
+
+@lru_cache(maxsize=None)
+def open_tile_store(path) -> TileStore:
+    """Tile store mapped once per process"""
+    return TileStore(path)
+
+
+def write_tile_store(path, floors: Dict[int, Tuple[Tuple[int, int], np.ndarray, np.ndarray]]):
+    """Write floors given as {z: ((left, top), color, cost)}"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    offset = HEADER.size + len(floors) * FLOOR_ENTRY.size
+    entries, layers = [], []
+    for z, ((left, top), color, cost) in sorted(floors.items()):
+        if color.shape != cost.shape:
+            raise ValueError(f"Floor {z} color and cost layers differ in shape")
+        height, width = color.shape
+        entries.append(FLOOR_ENTRY.pack(z, left, top, width, height, offset))
+        layers += [np.ascontiguousarray(color, dtype=np.uint8), np.ascontiguousarray(cost, dtype=np.uint8)]
+        offset += 2 * width * height
+
+    with open(path, "wb") as output:
+        output.write(HEADER.pack(MAGIC, len(floors)))
+        for entry in entries:
+            output.write(entry)
+        for layer in layers:
+            output.write(layer.tobytes())
+
+
+def build_from_minimap(minimap_dir) -> Dict[int, Tuple[Tuple[int, int], np.ndarray, np.ndarray]]:
+    """Assemble the client's Minimap_Color/WaypointCost images into floors"""
+    files: Dict[int, Dict[Tuple[int, int], Dict[str, Path]]] = {}
+    for file in Path(minimap_dir).glob("Minimap_*.png"):
+        match = MINIMAP_FILE.search(file.name)
+        if match:
+            kind, x, y, z = match.group(1), int(match.group(2)), int(match.group(3)), int(match.group(4))
+            files.setdefault(z, {}).setdefault((x, y), {})[kind] = file
+
+    floors = {}
+    for z, areas in files.items():
+        left = min(x for x, _ in areas)
+        top = min(y for _, y in areas)
+        width = max(x for x, _ in areas) + MINIMAP_TILE_SIZE - left
+        height = max(y for _, y in areas) + MINIMAP_TILE_SIZE - top
+        color = np.zeros((height, width), dtype=np.uint8)
+        cost = np.zeros((height, width), dtype=np.uint8)
+        for (x, y), kinds in areas.items():
+            rows = slice(y - top, y - top + MINIMAP_TILE_SIZE)
+            columns = slice(x - left, x - left + MINIMAP_TILE_SIZE)
+            if "Color" in kinds:
+                color[rows, columns] = color_index(np.asarray(Image.open(kinds["Color"]).convert("RGB")))
+            if "WaypointCost" in kinds:
+                cost[rows, columns] = waypoint_cost(np.asarray(Image.open(kinds["WaypointCost"]).convert("RGB")))
+        floors[z] = ((left, top), color, cost)
+        logger.info(f"Floor {z}: {len(areas)} minimap areas, {width}x{height} tiles")
+    return floors
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Convert the Tibia client minimap into a tile store")
+    parser.add_argument("minimap_dir", help="folder with Minimap_Color_*.png and Minimap_WaypointCost_*.png")
+    parser.add_argument("output", help="tile store file to write")
+    args = parser.parse_args()
+    write_tile_store(args.output, build_from_minimap(args.minimap_dir))
+    logger.info(f"Tile store written to {args.output}")
+    # Patch indexes for the minimap locator, so sessions don't build them
+    from minimap_locator import floor_indexes
+    floor_indexes(TileStore(args.output)).build()
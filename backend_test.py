@@ -119,7 +119,18 @@ class OTCavebotTester:
                             len(retrieved_config.get("waypoints", [])) == len(test_config["waypoints"])):
                             
                             self.log_test("Retrieve Bot Config", True, "Configuration retrieved and verified")
-                            return True
+                            
+                            # Unchanged config revalidates with its ETag
+                            etag = get_response.headers.get("ETag")
+                            cached_response = self.session.get(
+                                f"{API_BASE}/bot/config", headers={"If-None-Match": etag or ""}, timeout=10
+                            )
+                            if etag and cached_response.status_code == 304:
+                                self.log_test("Config ETag", True, f"304 Not Modified for {etag}")
+                                return True
+                            else:
+                                self.log_test("Config ETag", False, f"ETag {etag}, HTTP {cached_response.status_code}")
+                                return False
                         else:
                             self.log_test("Retrieve Bot Config", False, "Retrieved config doesn't match saved config")
                             return False
@@ -277,6 +288,57 @@ class OTCavebotTester:
             self.log_test("Current Position", False, f"Error: {str(e)}")
             return False
     
+    def test_metrics_endpoint(self):
+        """Test Prometheus metrics endpoint"""
+        try:
+            response = self.session.get(f"{API_BASE}/bot/metrics", timeout=10)
+            
+            if response.status_code == 200:
+                if "tibiabot_loop_ticks_total" in response.text:
+                    self.log_test("Metrics Endpoint", True, "Prometheus metrics exposed")
+                    return True
+                else:
+                    self.log_test("Metrics Endpoint", False, "Missing loop tick counter")
+                    return False
+            else:
+                self.log_test("Metrics Endpoint", False, f"HTTP {response.status_code}: {response.text}")
+                return False
+                
+        except Exception as e:
+            self.log_test("Metrics Endpoint", False, f"Error: {str(e)}")
+            return False
+    
+    def test_bot_sessions(self):
+        """Test multi-session bot manager endpoints"""
+        try:
+            response = self.session.post(f"{API_BASE}/bots", json={"name": "Second Character"}, timeout=10)
+            if response.status_code != 200 or "bot_id" not in response.json():
+                self.log_test("Create Bot Session", False, f"HTTP {response.status_code}: {response.text}")
+                return False
+            bot_id = response.json()["bot_id"]
+            self.log_test("Create Bot Session", True, f"Session {bot_id}")
+            
+            start_response = self.session.post(f"{API_BASE}/bots/{bot_id}/start", timeout=10)
+            time.sleep(2)
+            status_response = self.session.get(f"{API_BASE}/bots/{bot_id}/status", timeout=10)
+            stop_response = self.session.post(f"{API_BASE}/bots/{bot_id}/stop", timeout=10)
+            delete_response = self.session.delete(f"{API_BASE}/bots/{bot_id}", timeout=10)
+            
+            if (start_response.status_code == 200 and status_response.status_code == 200 and
+                status_response.json().get("is_running") and "cpu" in status_response.json() and
+                stop_response.status_code == 200 and delete_response.status_code == 200):
+                self.log_test("Bot Session Control", True, f"CPU: {status_response.json()['cpu']}")
+                return True
+            else:
+                self.log_test("Bot Session Control", False,
+                              f"start {start_response.status_code}, status {status_response.status_code}, "
+                              f"stop {stop_response.status_code}, delete {delete_response.status_code}")
+                return False
+                
+        except Exception as e:
+            self.log_test("Bot Sessions", False, f"Error: {str(e)}")
+            return False
+    
     async def test_websocket_connection(self):
         """Test WebSocket real-time updates"""
         try:
@@ -288,10 +350,13 @@ class OTCavebotTester:
                 ping_message = {"type": "ping"}
                 await websocket.send(json.dumps(ping_message))
                 
-                # Wait for pong response
+                # Wait for pong response (skipping the stats snapshot sent on connect)
                 try:
                     response = await asyncio.wait_for(websocket.recv(), timeout=5)
                     data = json.loads(response)
+                    if data.get("type") == "stats_update":
+                        response = await asyncio.wait_for(websocket.recv(), timeout=5)
+                        data = json.loads(response)
                     
                     if data.get("type") == "pong":
                         self.log_test("WebSocket Ping/Pong", True, "Ping/Pong working")
@@ -372,6 +437,8 @@ class OTCavebotTester:
             self.test_bot_control_endpoints,
             self.test_session_history,
             self.test_current_position,
+            self.test_metrics_endpoint,
+            self.test_bot_sessions,
         ]
         
         sync_results = []
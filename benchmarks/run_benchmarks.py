@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the bot's per-tick work on synthetic frames.
+
+Times capture_game_area, detect_hp_mp, detect_creatures, auto_loot_corpses
+and a full main loop iteration (every task due at once) against a
+SyntheticScreen, runs a session against the simulated game for decision
+throughput and heal reaction latency, and writes the results as JSON so
+runs on different commits can be compared. Needs no display, game client
+or database.
+
+    python benchmarks/run_benchmarks.py --output bench.json
+    python benchmarks/run_benchmarks.py --compare bench.json
+"""
+
+import argparse
+import asyncio
+import inspect
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / 'backend'))
+
+import numpy as np
+
+import server
+from game_sim import simulate
+from synthetic_frames import SyntheticScreen, CREATURES
+
+BENCHMARK_CREATURES = CREATURES[:4]
+
+
+def summarize(samples):
+    """Latency summary of a list of durations in seconds"""
+    ms = np.array(samples) * 1000
+    return {
+        "iterations": len(samples),
+        "mean_ms": round(float(ms.mean()), 4),
+        "p50_ms": round(float(np.percentile(ms, 50)), 4),
+        "p95_ms": round(float(np.percentile(ms, 95)), 4),
+        "p99_ms": round(float(np.percentile(ms, 99)), 4),
+        "min_ms": round(float(ms.min()), 4),
+        "max_ms": round(float(ms.max()), 4),
+        "per_second": round(1000 / float(ms.mean()), 1) if ms.mean() > 0 else None,
+    }
+
+
+async def measure(iterations, warmup, prepare, call, cleanup=None):
+    """Time ``call(prepare())``; preparing and cleaning up is not timed"""
+    samples = []
+    for index in range(warmup + iterations):
+        argument = prepare()
+        start = time.perf_counter()
+        result = call(argument)
+        if inspect.isawaitable(result):
+            await result
+        elapsed = time.perf_counter() - start
+        if cleanup is not None:
+            cleanup(argument)
+        if index >= warmup:
+            samples.append(elapsed)
+    return summarize(samples)
+
+
+def create_bot(screen):
+    # The server's tesseract is a stub; OCR answers with the text that was drawn
+    bot = server.TibiaBot('benchmark', screen_source=screen.screenshot, ocr_engine=screen.ocr)
+    bot.apply_config(server.BotConfig(
+        name='benchmark',
+        target_creatures=BENCHMARK_CREATURES,
+        emergency_logout_hp=0
+    ))
+    return bot
+
+
+async def run(args):
+    screen = SyntheticScreen(seed=args.seed)
+    bot = create_bot(screen)
+    results = {}
+    accuracy = {"hp_error": [], "mp_error": [], "creatures_expected": 0, "creatures_found": 0}
+
+    def capture(regions):
+        def prepare():
+            screen.advance()
+            return bot.capture_game_area(regions)
+        return prepare
+
+    def release(frame):
+        if frame is not None:
+            frame.release()
+
+    def check_hp_mp(frame):
+        status = bot.detect_hp_mp(frame)
+        accuracy["hp_error"].append(abs(status['hp_percent'] - screen.hp_percent))
+        accuracy["mp_error"].append(abs(status['mp_percent'] - screen.mp_percent))
+        release(frame)
+
+    def check_creatures(frame):
+        expected = set(screen.creatures) & set(BENCHMARK_CREATURES)
+        found = {creature['name'] for creature in bot.detect_creatures(frame)}
+        accuracy["creatures_expected"] += len(expected)
+        accuracy["creatures_found"] += len(expected & found)
+        release(frame)
+
+    try:
+        results["capture_game_area"] = await measure(
+            args.iterations, args.warmup, screen.advance, lambda _: release(bot.capture_game_area())
+        )
+        results["detect_hp_mp"] = await measure(
+            args.iterations, args.warmup, capture(['hp_mp']), bot.detect_hp_mp, check_hp_mp
+        )
+        results["detect_creatures"] = await measure(
+            args.iterations, args.warmup, capture(['battle_list']), bot.detect_creatures, check_creatures
+        )
+        results["auto_loot_corpses"] = await measure(
+            args.iterations, args.warmup, capture(['loot']), bot.auto_loot_corpses, release
+        )
+
+        scheduler = bot.scheduler = bot.build_scheduler()
+
+        def every_task():
+            return sorted((task for task in scheduler.tasks.values() if task.enabled()),
+                          key=lambda task: task.priority)
+
+        def changed_tick():
+            screen.advance()
+            return every_task()
+
+        results["main_loop_iteration"] = await measure(
+            args.iterations, args.warmup, changed_tick, lambda due: bot.run_tick(scheduler, due)
+        )
+        # Same screen every tick: detections are reused from the last frame
+        results["main_loop_iteration_unchanged"] = await measure(
+            args.iterations, args.warmup, every_task, lambda due: bot.run_tick(scheduler, due)
+        )
+    finally:
+        bot.is_running = False
+        bot.close()
+
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "iterations": args.iterations,
+        "warmup": args.warmup,
+        "seed": args.seed,
+        "results": results,
+        "accuracy": {
+            "hp_max_error": round(max(accuracy["hp_error"]), 3),
+            "mp_max_error": round(max(accuracy["mp_error"]), 3),
+            "creature_recall": round(accuracy["creatures_found"] / accuracy["creatures_expected"], 4)
+            if accuracy["creatures_expected"] else None,
+        },
+        "loot_matcher": bot.loot_matcher.get_stats(),
+        "ocr_cache": bot.ocr_cache.get_stats(),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+def print_report(report, baseline=None):
+    print(f"Commit {report['commit']}, {report['iterations']} iterations", file=sys.stderr)
+    header = f"{'benchmark':32} {'mean ms':>10} {'p95 ms':>10} {'p99 ms':>10}"
+    if baseline is not None:
+        header += f" {'vs ' + str(baseline.get('commit')):>14}"
+    print(header, file=sys.stderr)
+    for name, result in report["results"].items():
+        line = f"{name:32} {result['mean_ms']:>10.3f} {result['p95_ms']:>10.3f} {result['p99_ms']:>10.3f}"
+        before = (baseline or {}).get("results", {}).get(name)
+        if before and before["mean_ms"]:
+            change = (result["mean_ms"] - before["mean_ms"]) / before["mean_ms"] * 100
+            line += f" {change:>+13.1f}%"
+        print(line, file=sys.stderr)
+    print(f"Accuracy: {report['accuracy']}", file=sys.stderr)
+    simulation = report.get("simulation")
+    if simulation:
+        print(f"Simulation: {simulation['ticks_per_second']} ticks/s, {simulation['speedup']}x real time, "
+              f"heal latency {simulation['game']['heal_latency_ms']}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the bot's detectors and main loop on synthetic frames")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--simulate", type=float, default=120,
+                        help="seconds of simulated play for decision throughput and heal latency (0 skips)")
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    parser.add_argument("--compare", help="earlier JSON results to compare the means against")
+    args = parser.parse_args()
+
+    # Per-action log lines would dominate the timings
+    logging.disable(logging.INFO)
+    report = asyncio.run(run(args))
+    if args.simulate:
+        report["simulation"] = simulate(args.simulate, seed=args.seed)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+    print_report(report, baseline)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Synthetic Tibia-like screens for the benchmarks.
+
+Draws what the detectors read, at the positions of DEFAULT_REGIONS: HP
+and MP bars at known fill levels, creature name labels in the battle
+list and loot messages in the loot area. Everything else is a dark
+textured background so frame diffs and template matching have
+realistic noise to work through.
+"""
+
+import random
+from typing import Dict, List
+
+import numpy as np
+
+from capture_engine import DEFAULT_REGIONS, SCREEN_SIZE
+from game_sim import render_hp_mp, render_battle_list, render_loot, ocr_hp_mp
+
+CREATURES = ["rat", "rotworm", "cyclops", "dragon", "cave rat", "troll"]
+LOOT = ["gold coin", "platinum coin", "leather armor", "studded armor", "cheese", "ham", "chain armor"]
+
+
+class SyntheticScreen:
+    """Sequence of full-screen RGB frames with known contents.
+
+    ``screenshot`` is called like ``pyautogui.screenshot(region=...)`` and
+    serves the current frame; ``advance`` moves to the next state. The
+    bot's tesseract is a stub in this tree, so ``ocr`` answers with the
+    text that was drawn into the crop being read.
+    """
+
+    def __init__(self, seed: int = 0, hp_max: int = 500, mp_max: int = 300):
+        self.random = random.Random(seed)
+        self.hp_max = hp_max
+        self.mp_max = mp_max
+        width, height = SCREEN_SIZE
+        noise = np.random.default_rng(seed).integers(0, 24, (height, width, 1), dtype=np.uint8)
+        self.background = np.repeat(noise, 3, axis=2)
+        self.hp_percent = 100.0
+        self.mp_percent = 100.0
+        self.creatures: List[str] = []
+        self.loot_lines: List[str] = []
+        self.frame = self.render()
+
+    def advance(self) -> np.ndarray:
+        """Move to a new random state and render it"""
+        self.hp_percent = self.random.uniform(5, 100)
+        self.mp_percent = self.random.uniform(5, 100)
+        self.creatures = self.random.sample(CREATURES, self.random.randint(0, 4))
+        self.loot_lines = [self.loot_message() for _ in range(self.random.randint(0, 3))]
+        self.frame = self.render()
+        return self.frame
+
+    def loot_message(self) -> str:
+        items = []
+        for item in self.random.sample(LOOT, self.random.randint(1, 3)):
+            count = self.random.randint(1, 40)
+            items.append(f"{count} {item}s" if count > 1 else f"a {item}")
+        return f"Loot of a {self.random.choice(CREATURES)}: {', '.join(items)}"
+
+    def render(self) -> np.ndarray:
+        """Full screen showing the current state"""
+        frame = self.background.copy()
+        hp_text, mp_text = self.hp_mp_text()
+        panels = {
+            'hp_mp': lambda size: render_hp_mp(size, self.hp_percent, self.mp_percent, hp_text, mp_text),
+            'battle_list': lambda size: render_battle_list(size, self.creatures),
+            'loot': lambda size: render_loot(size, self.loot_lines),
+        }
+        for name, draw in panels.items():
+            left, top, width, height = DEFAULT_REGIONS[name]
+            frame[top:top + height, left:left + width] = draw((width, height))
+        return frame
+
+    def screenshot(self, region=None) -> np.ndarray:
+        if region is None:
+            return self.frame
+        left, top, width, height = region
+        return self.frame[top:top + height, left:left + width]
+
+    def ocr(self, image, config: str = '') -> str:
+        if '--psm 6' in config:
+            return "\n".join(self.loot_lines)
+        return ocr_hp_mp(image, *self.hp_mp_text())
+
+    def hp_mp_text(self) -> List[str]:
+        return [
+            f"{round(self.hp_percent * self.hp_max / 100)}/{self.hp_max}",
+            f"{round(self.mp_percent * self.mp_max / 100)}/{self.mp_max}",
+        ]
+
+    def expected(self) -> Dict[str, object]:
+        """What the detectors should find in the current frame"""
+        return {
+            "hp_percent": self.hp_percent,
+            "mp_percent": self.mp_percent,
+            "creatures": list(self.creatures),
+            "loot_lines": list(self.loot_lines),
+        }
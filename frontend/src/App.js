@@ -38,6 +38,7 @@ function App() {
   const [waypointForm, setWaypointForm] = useState({ name: '', x: '', y: '', description: '' });
   const [sessions, setSessions] = useState([]);
   const ws = useRef(null);
+  const statsSeq = useRef(0);
 
   useEffect(() => {
     loadBotConfig();
@@ -58,11 +59,27 @@ function App() {
     ws.current.onmessage = (event) => {
       const data = JSON.parse(event.data);
       if (data.type === 'stats_update') {
+        // Full snapshot (on connect or after a resync)
+        statsSeq.current = data.seq;
         setBotStats(data.data);
         setBotStatus({
           is_running: data.data.is_running,
           is_paused: data.data.is_paused
         });
+      } else if (data.type === 'stats_delta') {
+        if (data.base !== statsSeq.current) {
+          // Missed an update, ask for a fresh snapshot
+          ws.current.send(JSON.stringify({ type: 'resync' }));
+          return;
+        }
+        statsSeq.current = data.seq;
+        setBotStats((prev) => ({ ...prev, ...data.changes }));
+        if ('is_running' in data.changes || 'is_paused' in data.changes) {
+          setBotStatus((prev) => ({
+            is_running: data.changes.is_running ?? prev.is_running,
+            is_paused: data.changes.is_paused ?? prev.is_paused
+          }));
+        }
       }
     };
 
@@ -0,0 +1,32 @@
+import numpy as np
+
+import server
+
+
+def make_bot(panel):
+    bot = server.TibiaBot("auto-loot-test", ocr_engine=lambda image, config="": panel["text"])
+    bot.apply_config(server.BotConfig(name="test"))
+    return bot
+
+
+def read(bot, lines):
+    # A different crop per panel state, as the OCR cache is keyed by its pixels
+    crop = np.zeros((32, 32, 3), dtype=np.uint8)
+    crop[:lines * 4] = 255
+    bot.auto_loot_corpses({"loot": crop})
+    return bot.stats.items_looted, bot.stats.items_discarded
+
+
+def test_same_panel_is_counted_once():
+    panel = {"text": "12:01 Loot of a cyclops: 12 gold coins, a chain armor."}
+    bot = make_bot(panel)
+    try:
+        assert read(bot, 1) == (12, 1)
+        assert read(bot, 1) == (12, 1)
+        # Same text from other pixels, as when the panel was redrawn
+        assert read(bot, 3) == (12, 1)
+
+        panel["text"] += "\n12:02 Loot of a rat: 3 gold coins, a cheese."
+        assert read(bot, 2) == (15, 1)
+    finally:
+        bot.close()
@@ -0,0 +1,52 @@
+import pytest
+
+from bot_manager import BotManager
+
+
+class FakeBot:
+    def __init__(self, bot_id):
+        self.bot_id = bot_id
+        self.session_id = f"session-{bot_id}"
+        self.is_running = False
+        self.is_paused = False
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+    def cpu_stats(self):
+        return {"cpu_seconds": 0.0, "cpu_percent": 0.0}
+
+
+def test_sessions_are_created_once_up_to_the_limit():
+    manager = BotManager(FakeBot, max_sessions=2)
+    first = manager.create("a")
+    assert manager.get("a") is first and "a" in manager
+    with pytest.raises(ValueError):
+        manager.create("a")
+    manager.create()
+    with pytest.raises(ValueError):
+        manager.create("c")
+    assert len(manager) == 2
+
+
+def test_only_stopped_sessions_are_removed():
+    manager = BotManager(FakeBot)
+    bot = manager.create("a")
+    bot.is_running = True
+    with pytest.raises(ValueError):
+        manager.remove("a")
+
+    bot.is_running = False
+    assert manager.remove("a") is bot
+    assert bot.closed and "a" not in manager
+    assert manager.remove("a") is None
+
+
+def test_stats_cover_every_session():
+    manager = BotManager(FakeBot)
+    manager.create("a").is_running = True
+    manager.create("b")
+    stats = manager.get_stats()
+    assert (stats["count"], stats["running"]) == (2, 1)
+    assert stats["sessions"]["a"]["session_id"] == "session-a"
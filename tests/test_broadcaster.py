@@ -0,0 +1,96 @@
+import asyncio
+import json
+
+from broadcaster import StatsBroadcaster
+
+
+class FakeWebSocket:
+    """Records sent messages; sends block while ``gate`` is clear"""
+
+    def __init__(self):
+        self.sent = []
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def send_text(self, text):
+        await self.gate.wait()
+        self.sent.append(json.loads(text))
+
+    async def close(self):
+        pass
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def apply(messages):
+    """Client-side state rebuilt from a snapshot and its deltas"""
+    state, sequence = None, None
+    for message in messages:
+        if message["type"] == "stats_update":
+            state, sequence = dict(message["data"]), message["seq"]
+        else:
+            assert message["base"] == sequence
+            state.update(message["changes"])
+            sequence = message["seq"]
+    return state, sequence
+
+
+def test_unchanged_stats_are_not_published():
+    broadcaster = StatsBroadcaster()
+    assert broadcaster.publish_stats({"hp": 100}) == 1
+    assert broadcaster.publish_stats({"hp": 100}) == 1
+    assert broadcaster.published == 1
+
+
+def test_pending_deltas_are_merged():
+    async def run():
+        broadcaster = StatsBroadcaster()
+        websocket = FakeWebSocket()
+        client = broadcaster.add(websocket, {"hp": 100, "mp": 50, "kills": 0})
+        await settle()
+
+        websocket.gate.clear()
+        broadcaster.publish_stats({"hp": 90, "mp": 50, "kills": 0})
+        await settle()
+        # The first delta is in flight; the next two wait in the mailbox
+        broadcaster.publish_stats({"hp": 80, "mp": 50, "kills": 0})
+        broadcaster.publish_stats({"hp": 80, "mp": 40, "kills": 1})
+        assert client.dropped == 1
+        assert client.pending.base == 2
+        assert client.pending.changes == {"hp": 80, "mp": 40, "kills": 1}
+
+        websocket.gate.set()
+        await settle()
+        broadcaster.remove(websocket)
+        return broadcaster, websocket
+
+    broadcaster, websocket = asyncio.run(run())
+    assert [message["type"] for message in websocket.sent] == ["stats_update", "stats_delta", "stats_delta"]
+    assert websocket.sent[-1]["base"] == 2
+    assert apply(websocket.sent) == (broadcaster.state, broadcaster.sequence)
+
+
+def test_pending_snapshot_is_replaced_by_a_newer_snapshot():
+    async def run():
+        broadcaster = StatsBroadcaster()
+        websocket = FakeWebSocket()
+        websocket.gate.clear()
+        broadcaster.add(websocket, {"hp": 100})
+        await settle()
+        # The first snapshot is still being sent; queue another behind it
+        broadcaster.resync(websocket)
+        broadcaster.publish_stats({"hp": 70})
+        pending = broadcaster.clients[websocket].pending
+        assert pending.kind == "snapshot"
+        assert pending.sequence == broadcaster.sequence
+
+        websocket.gate.set()
+        await settle()
+        broadcaster.remove(websocket)
+        return broadcaster, websocket
+
+    broadcaster, websocket = asyncio.run(run())
+    assert websocket.sent[-1] == {"type": "stats_update", "seq": broadcaster.sequence, "data": {"hp": 70}}
@@ -0,0 +1,66 @@
+import threading
+import time
+
+import numpy as np
+
+from capture_engine import RegionCaptureEngine
+
+
+def make_engine(shared=False):
+    def screenshot(region=None):
+        left, top, width, height = region
+        # Every pixel tells which region it came from
+        return np.full((height, width, 3), left % 251, dtype=np.uint8)
+
+    engine = RegionCaptureEngine(screenshot, ring_slots=4, shared=shared)
+    engine.register("hp_mp", (10, 0, 8, 4))
+    engine.register("loot", (20, 0, 16, 16))
+    return engine
+
+
+def test_concurrent_captures_get_their_own_frames():
+    engine = make_engine()
+    engine.capture().release()
+    publish = engine.ring.publish
+
+    def slow_publish(*args):
+        publish(*args)
+        # Let the other thread in between publishing and reading back
+        time.sleep(0.0005)
+
+    engine.ring.publish = slow_publish
+    errors = []
+
+    def capture(names):
+        for _ in range(200):
+            frame = engine.capture(names)
+            if sorted(frame.regions) != sorted(names):
+                errors.append(sorted(frame.regions))
+            elif any(int(crop.max()) != crop.min() for crop in frame.regions.values()):
+                errors.append("torn")
+            frame.release()
+
+    threads = [threading.Thread(target=capture, args=(names,)) for names in (["hp_mp"], ["hp_mp", "loot"])]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.close()
+    assert errors == []
+
+
+def test_replaced_ring_stays_mapped_while_frames_are_held():
+    engine = make_engine(shared=True)
+    held = engine.capture()
+    old_ring = engine.ring
+
+    engine.register("minimap", (40, 0, 8, 8))
+    engine.capture().release()
+    assert engine.ring is not old_ring
+    assert old_ring.shm_name is not None
+    assert int(held["loot"][0, 0, 0]) == 20
+
+    held.release()
+    engine.capture().release()
+    assert old_ring.shm_name is None
+    engine.close()
@@ -0,0 +1,54 @@
+from client_discovery import ClientDiscovery
+
+
+class FakeProcess:
+    def __init__(self, pid, name, create_time=1.0):
+        self.pid = pid
+        self.info = {"name": name, "create_time": create_time}
+        self.running = True
+
+    def is_running(self):
+        return self.running
+
+
+def make_discovery(processes):
+    return ClientDiscovery(
+        process_iter=lambda attrs: list(processes),
+        window_finder=lambda pid: pid * 10,
+        window_check=lambda handle: True,
+        window_locator=lambda handle: (handle, 0),
+    )
+
+
+def test_sessions_get_distinct_clients_with_their_window_origin():
+    processes = [FakeProcess(1, "Tibia.exe"), FakeProcess(2, "client.exe"), FakeProcess(3, "otclient")]
+    discovery = make_discovery(processes)
+
+    first, second = discovery.acquire("a"), discovery.acquire("b")
+    assert (first.pid, second.pid) == (1, 3)
+    assert first.to_dict() == {"pid": 1, "name": "Tibia.exe", "window": 10, "origin": (10, 0)}
+    assert discovery.acquire("c") is None
+    # Assignments stick without another scan
+    assert discovery.acquire("a") is first
+    assert discovery.scans == 1
+
+
+def test_client_of_an_exited_process_is_reassigned():
+    processes = [FakeProcess(1, "Tibia.exe")]
+    discovery = make_discovery(processes)
+    assert discovery.acquire("a").pid == 1
+
+    processes[0].running = False
+    processes[:] = [FakeProcess(4, "Tibia.exe")]
+    discovery.min_rescan_interval = 0
+    assert discovery.acquire("a").pid == 4
+    assert discovery.lost == 1
+
+
+def test_released_client_goes_to_the_next_session():
+    discovery = make_discovery([FakeProcess(1, "Tibia.exe")])
+    discovery.acquire("a")
+    assert discovery.acquire("b") is None
+
+    discovery.release("a")
+    assert discovery.acquire("b").pid == 1
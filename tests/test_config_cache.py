@@ -0,0 +1,43 @@
+import asyncio
+
+from config_cache import ConfigCache
+
+
+class FakeCollection:
+    def __init__(self, document=None):
+        self.document = document
+        self.queries = 0
+
+    async def find_one(self, sort=None):
+        self.queries += 1
+        await asyncio.sleep(0)
+        return dict(self.document) if self.document is not None else None
+
+
+def test_warmed_once_then_served_from_memory():
+    async def run():
+        collection = FakeCollection({"_id": 1, "id": "a", "name": "knight"})
+        cache = ConfigCache(collection)
+        first, second = await asyncio.gather(cache.get(), cache.get())
+        assert first == second == {"id": "a", "name": "knight"}
+        # Callers get copies
+        first["name"] = "changed"
+        assert (await cache.get())["name"] == "knight"
+        return cache, collection
+
+    cache, collection = asyncio.run(run())
+    assert collection.queries == 1
+    assert cache.etag == '"1-a"'
+
+
+def test_set_bumps_the_etag():
+    cache = ConfigCache(FakeCollection())
+    assert asyncio.run(cache.get()) is None
+    assert not cache.matches('"0-None"')
+
+    cache.set({"_id": 2, "id": "b", "name": "paladin"})
+    etag = cache.etag
+    assert cache.matches(etag) and cache.matches(f'"x", W/{etag}')
+    cache.set({"id": "b", "name": "druid"})
+    assert not cache.matches(etag)
+    assert cache.not_modified == 2
@@ -0,0 +1,42 @@
+import numpy as np
+
+from frame_diff import DirtyRegionTracker
+
+
+class Frame:
+    def __init__(self, **regions):
+        self.regions = regions
+
+
+def test_small_changes_are_seen_in_full_resolution_regions():
+    tracker = DirtyRegionTracker(step=4, steps={"hp_mp": 1})
+    bars = np.zeros((30, 160, 3), dtype=np.uint8)
+    panel = np.zeros((32, 32, 3), dtype=np.uint8)
+    assert tracker.update(Frame(hp_mp=bars, loot=panel)) == {"hp_mp", "loot"}
+
+    # Two pixels off the sampling grid
+    bars, panel = bars.copy(), panel.copy()
+    bars[1, 1:3] = 200
+    panel[1, 1:3] = 200
+    assert tracker.update(Frame(hp_mp=bars, loot=panel)) == {"hp_mp"}
+    assert tracker.update(Frame(hp_mp=bars, loot=panel)) == set()
+
+
+def test_results_are_reused_only_while_clean():
+    tracker = DirtyRegionTracker(steps={"hp_mp": 1})
+    bars = np.zeros((30, 160, 3), dtype=np.uint8)
+    calls = []
+
+    def read():
+        calls.append(1)
+        return len(calls)
+
+    tracker.update(Frame(hp_mp=bars))
+    assert tracker.reuse("hp_mp", "detect", read) == 1
+    tracker.update(Frame(hp_mp=bars))
+    assert tracker.reuse("hp_mp", "detect", read) == 1
+
+    bars = bars.copy()
+    bars[5, 5] = 255
+    tracker.update(Frame(hp_mp=bars))
+    assert tracker.reuse("hp_mp", "detect", read) == 2
@@ -0,0 +1,54 @@
+import numpy as np
+
+from game_sim import render_hp_mp
+from hp_mp_reader import DEFAULT_HP_BAR, HpMpBarReader
+
+SIZE = (160, 30)
+
+
+def panel(hp_percent, mp_percent, size=SIZE):
+    """'hp_mp' region as captured (BGR)"""
+    return np.ascontiguousarray(render_hp_mp(size, hp_percent, mp_percent)[..., ::-1])
+
+
+def text_ocr(hp_text, mp_text):
+    """OCR stand-in reading the HP text, then the MP text"""
+    texts = []
+    def ocr(image):
+        if not texts:
+            texts.extend([mp_text, hp_text])
+        return texts.pop()
+    return ocr
+
+
+def test_bar_fill_gives_the_percentages():
+    reader = HpMpBarReader(ocr_every=0)
+    status = reader.read(panel(50, 25))
+    assert abs(status['hp_percent'] - 50) <= 1
+    assert abs(status['mp_percent'] - 25) <= 1
+    assert reader.bar_reads == 1
+
+
+def test_hidden_bars_fall_back_to_ocr_or_read_as_unknown():
+    hidden = np.zeros((SIZE[1], SIZE[0], 3), dtype=np.uint8)
+    assert HpMpBarReader(ocr_every=0).read(hidden) is None
+
+    reader = HpMpBarReader(ocr=text_ocr("30/200", "80/80"))
+    status = reader.read(hidden)
+    assert (status['hp_percent'], status['mp_percent']) == (15, 100)
+    assert reader.ocr_fallbacks == 1
+
+
+def test_bars_are_fitted_when_ocr_reads_them_full():
+    # A client whose bars start 10 columns further right than the default
+    crop = np.zeros((SIZE[1], SIZE[0], 3), dtype=np.uint8)
+    crop[:, 10:] = panel(100, 100, (SIZE[0] - 10, SIZE[1]))
+    reader = HpMpBarReader(ocr=text_ocr("200/200", "80/80"), ocr_every=1)
+    reader.recalibrate()
+
+    reader.read(crop)
+    assert reader.calibrations == 1
+    assert reader.hp_bar.cols == (DEFAULT_HP_BAR.cols[0] + 10, DEFAULT_HP_BAR.cols[1] + 10)
+    # Calibrated once until the next recalibrate
+    reader.read(crop)
+    assert reader.calibrations == 1
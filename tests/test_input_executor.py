@@ -0,0 +1,49 @@
+import asyncio
+import threading
+
+from input_executor import PRIORITY_HEAL, PRIORITY_IDLE, InputExecutor
+
+
+def test_actions_run_by_priority():
+    async def run():
+        executor = InputExecutor()
+        gate = threading.Event()
+        order = []
+        blocker = executor.submit(gate.wait, 5)
+        await asyncio.sleep(0.05)
+        idle = executor.submit(order.append, "idle", priority=PRIORITY_IDLE)
+        heal = executor.submit(order.append, "heal", priority=PRIORITY_HEAL)
+        gate.set()
+        await asyncio.gather(blocker, idle, heal)
+        executor.stop()
+        return order
+
+    assert asyncio.run(run()) == ["heal", "idle"]
+
+
+def test_timed_out_stop_keeps_a_single_worker():
+    async def run():
+        executor = InputExecutor()
+        gate = threading.Event()
+        busy = executor.submit(gate.wait, 5)
+        await asyncio.sleep(0.05)
+        worker = executor._thread
+
+        assert executor.stop(timeout=0.05) is False
+        assert executor.is_running
+        executor.start()
+        assert executor._thread is worker
+
+        # Queued before the stop takes effect, so the old worker runs it
+        late = executor.submit(lambda: "late")
+        gate.set()
+        assert await late == "late"
+        assert await busy is True
+        assert executor.stop() is True
+        assert not executor.is_running
+
+        # The next submission starts a fresh worker
+        assert await executor.submit(lambda: "again") == "again"
+        executor.stop()
+
+    asyncio.run(run())
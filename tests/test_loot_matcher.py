@@ -0,0 +1,83 @@
+from loot_matcher import DISCARD, LOOT, LootLog, LootMatcher, loot_counts, loot_entries
+
+
+def test_exact_names_ignore_case_and_punctuation():
+    matcher = LootMatcher(["Gold Coin"], ["Cheese"])
+    assert matcher.match("gold  coin") == ("Gold Coin", LOOT)
+    assert matcher.match("CHEESE.") == ("Cheese", DISCARD)
+    assert matcher.exact == 2
+
+
+def test_edits_allowed_grow_with_name_length():
+    matcher = LootMatcher(["cheese", "gold coin"])
+    # Six characters allow one edit, nine allow two
+    assert matcher.match("chease") == ("cheese", LOOT)
+    assert matcher.match("chxxse") is None
+    assert matcher.match("golb coim") == ("gold coin", LOOT)
+
+
+def test_short_names_need_an_exact_match():
+    matcher = LootMatcher(["ham"])
+    assert matcher.match("jam") is None
+    assert matcher.match("ham") == ("ham", LOOT)
+
+
+def test_max_edits_caps_long_names():
+    matcher = LootMatcher(["platinum coin"], max_edits=2)
+    assert matcher.match("platinun coim") == ("platinum coin", LOOT)
+    assert matcher.match("plathnun coim") is None
+
+
+def test_chars_per_edit_is_configurable():
+    matcher = LootMatcher(["cheese"], chars_per_edit=3)
+    assert matcher.match("chxxse") == ("cheese", LOOT)
+
+
+def test_closest_name_wins():
+    matcher = LootMatcher(["plate legs", "plate armor"], ["plate shield"])
+    assert matcher.match("plate lgs") == ("plate legs", LOOT)
+    assert matcher.match("plate armur") == ("plate armor", LOOT)
+    assert matcher.match("plate shie1d") == ("plate shield", DISCARD)
+
+
+def test_loot_wins_when_on_both_lists():
+    matcher = LootMatcher(["rope"], ["rope", "torch"])
+    assert matcher.match("rope") == ("rope", LOOT)
+    assert matcher.match("torch") == ("torch", DISCARD)
+    assert matcher.size == 2
+
+
+def test_results_are_memoized():
+    matcher = LootMatcher(["gold coin"])
+    matcher.match("gold coim")
+    matcher.match("gold coim")
+    matcher.match("nothing here")
+    assert (matcher.hits, matcher.misses) == (1, 2)
+    assert (matcher.fuzzy, matcher.unmatched) == (1, 1)
+
+
+def test_loot_entries_strip_counts_and_articles():
+    text = "12:01 Loot of a rat: 3 gold coins, a cheese.\n12:02 Loot of a bug: nothing."
+    assert loot_entries(text) == ["gold coins", "cheese"]
+
+
+def test_loot_counts_parse_quantities():
+    lines = ["12:01 Loot of a cyclops: 27 gold coins, a chain armor, an ham.", "12:02 Loot of a rat: nothing."]
+    assert loot_counts(lines) == [("gold coins", 27), ("chain armor", 1), ("ham", 1)]
+
+
+def test_loot_log_returns_only_lines_scrolled_in():
+    log = LootLog()
+    first = "Loot of a rat: a cheese.\nLoot of a rat: 3 gold coins."
+    assert log.new_lines(first) == ["Loot of a rat: a cheese.", "Loot of a rat: 3 gold coins."]
+    assert log.new_lines(first) == []
+    # Panel full: the oldest line scrolls out as a new one comes in
+    assert log.new_lines("Loot of a rat: 3 gold coins.\nLoot of a troll: a ham.") == ["Loot of a troll: a ham."]
+
+
+def test_loot_log_counts_repeated_messages_by_position():
+    log = LootLog()
+    assert len(log.new_lines("Loot of a rat: nothing.")) == 1
+    assert len(log.new_lines("Loot of a rat: nothing.\nLoot of a rat: nothing.")) == 1
+    assert len(log.new_lines("Loot of a rat: nothing.\nLoot of a rat: nothing.")) == 0
+    assert log.get_stats() == {"reads": 3, "new_lines": 2, "repeated_lines": 3}
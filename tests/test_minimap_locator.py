@@ -0,0 +1,55 @@
+import numpy as np
+
+from minimap_locator import MinimapLocator, PatchIndex, patch_hashes
+from tile_store import TileStore, palette_rgb, write_tile_store
+
+ORIGIN = (32000, 31000)
+
+
+def make_store(tmp_path):
+    rng = np.random.default_rng(7)
+    colors = rng.choice(np.array([24, 30, 86, 129, 186, 210], dtype=np.uint8), size=(160, 200))
+    cost = np.full(colors.shape, 100, dtype=np.uint8)
+    path = tmp_path / "minimap.tiles"
+    write_tile_store(path, {7: (ORIGIN, colors, cost)})
+    return TileStore(path), colors
+
+
+def minimap_crop(colors, x, y, zoom=2, size=54):
+    """Minimap screenshot (BGR) centered on map position x, y"""
+    top, left = y - ORIGIN[1] - size // 2, x - ORIGIN[0] - size // 2
+    image = palette_rgb(colors[top:top + size, left:left + size])
+    image = np.repeat(np.repeat(image, zoom, 0), zoom, 1)
+    center = image.shape[0] // 2
+    image[center - 3:center + 3, center - 3:center + 3] = 255
+    return np.ascontiguousarray(image[..., ::-1])
+
+
+def test_strided_hashes_match_every_patch_hashes():
+    tiles = np.random.default_rng(1).integers(0, 256, size=(37, 45)).astype(np.uint8)
+    for stride in (1, 3, 4):
+        assert np.array_equal(patch_hashes(tiles, 8, stride), patch_hashes(tiles, 8)[::stride, ::stride])
+
+
+def test_index_is_saved_next_to_the_store_and_reloaded(tmp_path):
+    store, _ = make_store(tmp_path)
+    locator = MinimapLocator(store)
+    locator.indexes._thread.join()
+    assert locator.indexes.get_stats()["built"] == 1
+
+    path = locator.indexes.path(7)
+    assert path.parent == store.path.parent
+    saved, loaded = locator.indexes.get(7), PatchIndex.load(path)
+    assert np.array_equal(saved.hashes, loaded.hashes)
+    assert np.array_equal(saved.xs, loaded.xs) and np.array_equal(saved.ys, loaded.ys)
+
+
+def test_locate_uses_the_index_once_built(tmp_path):
+    store, colors = make_store(tmp_path)
+    locator = MinimapLocator(store)
+    locator.indexes._thread.join()
+
+    assert locator.locate(minimap_crop(colors, 32100, 31080)) == (32100, 31080, 7)
+    assert locator.index_hits == 1
+    assert locator.locate(minimap_crop(colors, 32102, 31079), hint=(32100, 31080, 7)) == (32102, 31079, 7)
+    assert locator.local_hits == 1
@@ -0,0 +1,49 @@
+import numpy as np
+
+from ocr_cache import OCRCache
+
+
+def make_cache(capacity=8):
+    calls = []
+    def ocr(image, config=""):
+        calls.append(config)
+        return f"text {len(calls)}"
+    return OCRCache(ocr, capacity=capacity), calls
+
+
+def crop(rows, value=255):
+    image = np.zeros((16, 16, 3), dtype=np.uint8)
+    image[:rows] = value
+    return image
+
+
+def test_same_text_pixels_hit_the_cache():
+    cache, calls = make_cache()
+    assert cache(crop(4)) == "text 1"
+    # Anti-aliasing noise below the threshold binarizes the same
+    noisy = crop(4)
+    noisy[10:] = 40
+    assert cache(noisy) == "text 1"
+    assert cache(crop(4, value=200)) == "text 1"
+    assert (cache.hits, cache.misses, len(calls)) == (2, 1, 1)
+
+
+def test_other_pixels_or_config_miss():
+    cache, calls = make_cache()
+    cache(crop(4))
+    cache(crop(5))
+    cache(crop(4), config="--psm 7")
+    assert calls == ["", "", "--psm 7"]
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache, calls = make_cache(capacity=2)
+    cache(crop(1))
+    cache(crop(2))
+    cache(crop(1))
+    cache(crop(3))
+    assert cache.evictions == 1
+    cache(crop(1))
+    cache(crop(2))
+    assert len(calls) == 4
+    assert cache.get_stats()["entries"] == 2
@@ -0,0 +1,94 @@
+import numpy as np
+
+from pathfinder import PathFinder, WalkabilityGrid
+
+
+def make_finder(width=20, height=20):
+    grid = WalkabilityGrid(np.ones((height, width), dtype=np.uint8))
+    return grid, PathFinder(grid, margin=4)
+
+
+def assert_walkable_path(grid, path, start, goal):
+    assert path[0] == start and path[-1] == goal
+    for (x1, y1), (x2, y2) in zip(path, path[1:]):
+        assert max(abs(x2 - x1), abs(y2 - y1)) == 1
+    assert all(grid.is_walkable(x, y) for x, y in path)
+
+
+def test_cached_path_is_reused_when_changes_miss_it():
+    grid, finder = make_finder()
+    path = finder.find_path((2, 10), (15, 10))
+    grid.set_walkable(5, 2, False)
+
+    assert finder.find_path((2, 10), (15, 10)) == path
+    assert finder.revalidated == 1
+    assert finder.repairs == 0
+    assert finder.searches == 1
+
+
+def test_revalidate_repairs_a_blocked_path():
+    grid, finder = make_finder()
+    path = finder.find_path((2, 10), (15, 10))
+    version = grid.version
+    blocked = path[len(path) // 2]
+    grid.set_walkable(*blocked, False)
+
+    repaired = finder.revalidate(path, version)
+    assert blocked not in repaired
+    assert_walkable_path(grid, repaired, (2, 10), (15, 10))
+    assert finder.repairs == 1
+    assert finder.searches == 1
+
+
+def test_revalidate_ignores_tiles_cleared_since():
+    grid, finder = make_finder()
+    grid.set_walkable(8, 3, False)
+    version = grid.version
+    path = finder.find_path((2, 10), (15, 10))
+    grid.set_walkable(8, 3, True)
+
+    assert finder.revalidate(path, version) is path
+    assert finder.revalidated == 1
+
+
+def test_repair_detours_around_a_wall():
+    grid, finder = make_finder()
+    path = finder.find_path((2, 10), (15, 10))
+    for y in range(5, 16):
+        grid.set_walkable(8, y, False)
+
+    repaired = finder.repair(path)
+    assert_walkable_path(grid, repaired, (2, 10), (15, 10))
+    assert not any(x == 8 and 5 <= y <= 15 for x, y in repaired)
+
+
+def test_repair_replans_when_no_local_detour_exists():
+    grid, finder = make_finder(width=40)
+    path = finder.find_path((2, 10), (30, 10))
+    # Wall with its only gap far outside the local repair window
+    for y in range(20):
+        if y != 0:
+            grid.set_walkable(15, y, False)
+
+    repaired = finder.repair(path)
+    assert_walkable_path(grid, repaired, (2, 10), (30, 10))
+    assert (15, 0) in repaired
+    assert finder.searches == 2
+
+
+def test_repair_fails_when_goal_is_cut_off():
+    grid, finder = make_finder()
+    path = finder.find_path((2, 10), (15, 10))
+    for y in range(20):
+        grid.set_walkable(8, y, False)
+
+    assert finder.repair(path) is None
+    assert finder.find_path((2, 10), (15, 10)) is None
+
+
+def test_repair_fails_when_start_is_blocked():
+    grid, finder = make_finder()
+    path = finder.find_path((2, 10), (15, 10))
+    grid.set_walkable(2, 10, False)
+
+    assert finder.repair(path) is None
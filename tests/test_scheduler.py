@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+from pydantic import ValidationError
+
+import server
+from scheduler import ScheduledTask, TickScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def make_scheduler(*tasks):
+    clock = FakeClock()
+    scheduler = TickScheduler(clock=clock, sleep=clock.sleep)
+    for name, period, priority in tasks:
+        async def callback(frame, name=name):
+            return name
+        scheduler.add(ScheduledTask(name, period, priority, callback, jitter=0))
+    return clock, scheduler
+
+
+def test_due_tasks_run_by_priority_and_on_their_periods():
+    async def run():
+        clock, scheduler = make_scheduler(("loot", 1.0, 4), ("heal", 0.05, 1))
+        assert [task.name for task in scheduler.due()] == ["heal", "loot"]
+        for task in scheduler.due():
+            await scheduler.run_task(task, None)
+
+        assert [task.name for task in await scheduler.wait_due()] == ["heal"]
+        assert [round(seconds, 3) for seconds in clock.slept] == [0.05]
+        clock.now += 1.0
+        assert [task.name for task in scheduler.due()] == ["heal", "loot"]
+
+    asyncio.run(run())
+
+
+def test_lateness_is_recorded_when_a_task_runs():
+    async def run():
+        clock, scheduler = make_scheduler(("attack", 0.5, 3))
+        task = scheduler.tasks["attack"]
+        clock.now += 0.2
+        await scheduler.run_task(task, None)
+        assert round(task.max_lateness_ms) == 200
+        assert task.next_run == clock.now + 0.5
+        return scheduler.get_stats()["tasks"]["attack"]
+
+    assert asyncio.run(run())["runs"] == 1
+
+
+def test_wait_due_yields_when_a_task_is_already_due():
+    async def run():
+        clock, scheduler = make_scheduler(("heal", 0.05, 1))
+        ran = []
+        asyncio.get_running_loop().call_soon(ran.append, True)
+        assert await scheduler.wait_due()
+        assert clock.slept == [] and ran == [True]
+
+    asyncio.run(run())
+
+
+def test_shorter_period_takes_effect_immediately():
+    clock, scheduler = make_scheduler(("food", 20.0, 2))
+    task = scheduler.tasks["food"]
+    task.next_run = clock.now + 20.0
+    scheduler.set_period("food", 2.0)
+    assert (task.period, task.next_run) == (2.0, clock.now + 2.0)
+    # Non-positive periods are ignored
+    scheduler.set_period("food", 0)
+    assert task.period == 2.0
+
+
+def test_config_rejects_non_positive_periods():
+    assert server.BotConfig(name="test", task_periods={"heal": 0.1}).task_periods == {"heal": 0.1}
+    with pytest.raises(ValidationError):
+        server.BotConfig(name="test", task_periods={"heal": 0})
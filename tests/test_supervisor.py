@@ -0,0 +1,120 @@
+import asyncio
+import functools
+import os
+
+import pytest
+
+from supervisor import RemoteError, Supervisor, shard_main
+
+# This module doubles as the server module of the shard processes
+SESSIONS = {}
+
+
+class ControlError(Exception):
+    def __init__(self, status_code, detail):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+async def handle_control(op, bot_id, payload):
+    if op == "create":
+        SESSIONS[bot_id] = {"is_running": False, "start": None, "config": payload}
+        return {"bot_id": bot_id}
+    session = SESSIONS.get(bot_id)
+    if session is None:
+        raise ControlError(404, f"no session {bot_id}")
+    if op == "start":
+        session.update(is_running=True, start=payload)
+    elif op == "status":
+        return dict(session, pid=os.getpid())
+    elif op == "crash":
+        os._exit(1)
+    elif op == "remove":
+        del SESSIONS[bot_id]
+    return {"message": op}
+
+
+def shard_stats(bot_ids):
+    return {bot_id: {"is_running": SESSIONS[bot_id]["is_running"]} for bot_id in bot_ids if bot_id in SESSIONS}
+
+
+async def close_sessions():
+    SESSIONS.clear()
+
+
+async def eventually(check, timeout=10):
+    async def poll():
+        while not await check():
+            await asyncio.sleep(0.05)
+    await asyncio.wait_for(poll(), timeout)
+
+
+def make_supervisor():
+    return Supervisor(
+        sessions_per_worker=2, target=functools.partial(shard_main, module_name=__name__),
+        call_timeout=20, check_interval=0.1
+    )
+
+
+def test_sessions_are_spread_over_shards():
+    async def run():
+        supervisor = make_supervisor()
+        await supervisor.start()
+        try:
+            for bot_id in ("a", "b", "c"):
+                await supervisor.create(bot_id, {"name": bot_id})
+            pids = {bot_id: (await supervisor.call(bot_id, "status"))["pid"] for bot_id in ("a", "b", "c")}
+            assert pids["a"] == pids["b"] != pids["c"]
+            assert (await supervisor.call("c", "status"))["config"] == {"name": "c"}
+
+            with pytest.raises(RemoteError) as error:
+                await supervisor.create("a")
+            assert error.value.status_code == 409
+            with pytest.raises(RemoteError) as error:
+                await supervisor.call("missing", "status")
+            assert error.value.status_code == 404
+
+            await supervisor.call("a", "remove")
+            assert [sorted(shard.sessions) for shard in supervisor.shards] == [["b"], ["c"]]
+        finally:
+            await supervisor.stop()
+
+    asyncio.run(run())
+
+
+def test_crashed_shard_is_restarted_with_its_sessions():
+    async def run():
+        supervisor = make_supervisor()
+        await supervisor.start()
+        try:
+            await supervisor.create("a", {"name": "a"})
+            await supervisor.create("b")
+            await supervisor.call("a", "start", {"client": {"pid": 42}})
+            before = (await supervisor.call("a", "status"))["pid"]
+
+            async def reported_running():
+                return supervisor.session_stats.get("a", {}).get("is_running")
+            await eventually(reported_running)
+
+            with pytest.raises(RemoteError) as error:
+                await supervisor.call("b", "crash")
+            assert error.value.status_code == 503
+
+            # Recreated, then started again
+            async def restored():
+                try:
+                    return (await supervisor.call("a", "status"))["is_running"]
+                except RemoteError:
+                    return False
+            await eventually(restored)
+            assert supervisor.shards[0].restarts == 1
+            status = await supervisor.call("a", "status")
+            assert status["pid"] != before
+            assert status["is_running"] and status["start"] == {"client": {"pid": 42}}
+            assert status["config"] == {"name": "a"}
+            assert not (await supervisor.call("b", "status"))["is_running"]
+        finally:
+            await supervisor.stop()
+
+    asyncio.run(run())